@@ -17,6 +17,7 @@ class ConfigResponse(BaseModel):
     xo_url: str
     xo_username: str
     api_key_preview: Optional[str] = None
+    api_key_count: int = 0
 
 class ModelInfo(BaseModel):
     """OpenRouter model information"""
@@ -31,6 +32,10 @@ class TaskRequest(BaseModel):
     models: List[str] = Field(default_factory=lambda: ["deepseek/deepseek-r1"])
     tasks: Optional[List[str]] = None  # None means all tasks
     max_iterations: int = Field(default=20, ge=1, le=50)
+    profile: bool = False  # Sample the server process while the run is active
+    budget_usd: Optional[float] = Field(default=None, gt=0)  # Stop starting iterations once spent
+    best_of: int = Field(default=1, ge=1, le=8)  # Completions sampled and pre-flighted per iteration
+    trials: int = Field(default=1, ge=1, le=16)  # Independent concurrent trials per task (pass@k)
 
 class TaskStatus(BaseModel):
     """Status of an automation task"""
@@ -59,6 +64,10 @@ class RunInfo(BaseModel):
     completed_tasks: int = 0
     failed_tasks: int = 0
     task_statuses: List[TaskStatus] = Field(default_factory=list)
+    profile: bool = False
+    profile_files: Optional[Dict[str, str]] = None  # kind (wall, cpu, summary, summary_text) -> path
+    budget_usd: Optional[float] = None
+    usage: Optional[Dict[str, Any]] = None  # Tokens and cost so far, per model and task (see CostLedger.summary)
 
 class LogEntry(BaseModel):
     """Log entry"""
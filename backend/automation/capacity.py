@@ -0,0 +1,232 @@
+"""Host-capacity admission control for terraform apply"""
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+# Plan actions that leave a VM (re)allocated on the host after apply
+ALLOCATING_ACTIONS = ("create", "update", "replace")
+
+class HostCapacity:
+    """Reserve RAM and vCPUs on the single XCP-ng host before each apply
+    
+    Reservations are keyed by workspace and VM name: name labels need not be
+    unique on the host, so two workspaces with an `app-01` hold two VMs.
+    Updates, deletes and destroys of a VM the workspace did not create (e.g.
+    fixture VMs in a seeded workspace) settle the reservation of that name
+    held by another workspace. Applies that do not fit wait while another
+    apply or a background destroy is pending, since either may free capacity;
+    with nothing pending they are admitted at once and left to fail on their
+    own.
+    """
+    
+    def __init__(self, total_ram_gb: float = 20, total_vcpus: int = 32, max_wait_seconds: float = 900):
+        self.total_ram_gb = total_ram_gb
+        self.total_vcpus = total_vcpus
+        self.max_wait_seconds = max_wait_seconds
+        self.condition = threading.Condition()
+        self.reservations: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        # Admitted applies not yet committed and destroys not yet released
+        self.applies_in_flight = 0
+        self.pending_releases = 0
+    
+    def usage(self) -> Dict:
+        """Currently reserved capacity
+        
+        Returns:
+            Dict with reserved and total RAM/vCPUs
+        """
+        with self.condition:
+            return {
+                "reserved_ram_gb": round(sum(ram for ram, _ in self.reservations.values()), 2),
+                "reserved_vcpus": sum(vcpus for _, vcpus in self.reservations.values()),
+                "total_ram_gb": self.total_ram_gb,
+                "total_vcpus": self.total_vcpus,
+                "vm_count": len(self.reservations)
+            }
+    
+    def _key(self, workspace: str, name: str, create: bool = False) -> Tuple[str, str]:
+        """Reservation of a VM in a workspace
+        
+        A VM the workspace did not create is looked up by name in the other
+        workspaces; creates always get their own reservation.
+        """
+        key = (workspace, name)
+        if create or key in self.reservations:
+            return key
+        return next((other for other in self.reservations if other[1] == name), key)
+    
+    def _fits(self, workspace: str, planned_vms: List[Dict]) -> bool:
+        """Whether the host can hold the planned VMs next to all other reservations"""
+        allocating = {
+            self._key(workspace, vm["name"], create=vm["action"] == "create"): vm
+            for vm in planned_vms if vm["action"] in ALLOCATING_ACTIONS
+        }
+        
+        ram = sum(vm["ram_gb"] for vm in allocating.values())
+        vcpus = sum(vm["vcpus"] for vm in allocating.values())
+        for key, (reserved_ram, reserved_vcpus) in self.reservations.items():
+            if key not in allocating:
+                ram += reserved_ram
+                vcpus += reserved_vcpus
+        
+        return ram <= self.total_ram_gb and vcpus <= self.total_vcpus
+    
+    def _pending(self) -> bool:
+        """Whether another apply or a background destroy may still free capacity"""
+        return self.applies_in_flight > 0 or self.pending_releases > 0
+    
+    def admit(self, planned_vms: List[Dict], work_dir: Path) -> Dict:
+        """Wait until the planned VMs fit on the host, then reserve them
+        
+        Waits only while another apply or a background destroy is pending;
+        otherwise nothing could free capacity and the apply is admitted at
+        once. VMs the plan deletes keep their reservation until commit(),
+        since Terraform does not guarantee destroying before creating.
+        
+        Args:
+            planned_vms: VM changes (name, action, ram_gb, vcpus)
+            work_dir: Workspace the apply runs in
+        
+        Returns:
+            Admission dict for commit() with waited_seconds
+        """
+        start_time = time.time()
+        workspace = str(work_dir)
+        requested_ram = sum(vm["ram_gb"] for vm in planned_vms if vm["action"] in ALLOCATING_ACTIONS)
+        
+        with self.condition:
+            if requested_ram > self.total_ram_gb:
+                # Can never fit (e.g. the over-provisioning edge case): let the apply fail on its own
+                logger.warning(f"Apply requests {requested_ram:.1f} GB, more than the host's {self.total_ram_gb} GB")
+            elif not self._fits(workspace, planned_vms):
+                if self._pending():
+                    logger.info(f"Apply queued until {requested_ram:.1f} GB RAM is available on the host...")
+                    self.condition.wait_for(
+                        lambda: self._fits(workspace, planned_vms) or not self._pending(),
+                        timeout=self.max_wait_seconds
+                    )
+                if not self._fits(workspace, planned_vms):
+                    usage = sum(ram for ram, _ in self.reservations.values())
+                    logger.warning(
+                        f"Apply requests {requested_ram:.1f} GB with {usage:.1f} of {self.total_ram_gb} GB reserved "
+                        f"and nothing pending that could free capacity, admitting anyway"
+                    )
+            
+            keys = {
+                vm["name"]: self._key(workspace, vm["name"], create=vm["action"] == "create")
+                for vm in planned_vms
+            }
+            previous = {key: self.reservations.get(key) for key in keys.values()}
+            for vm in planned_vms:
+                if vm["action"] in ALLOCATING_ACTIONS:
+                    self.reservations[keys[vm["name"]]] = (vm["ram_gb"], vm["vcpus"])
+            self.applies_in_flight += 1
+        
+        return {
+            "waited_seconds": round(time.time() - start_time, 2),
+            "planned_vms": planned_vms,
+            "keys": keys,
+            "previous": previous
+        }
+    
+    def commit(self, admission: Dict, success: bool):
+        """Settle the reservations of an admitted apply
+        
+        Args:
+            admission: Result of admit()
+            success: Whether the apply succeeded (otherwise reservations are rolled back)
+        """
+        with self.condition:
+            if success:
+                for vm in admission["planned_vms"]:
+                    if vm["action"] == "delete":
+                        self.reservations.pop(admission["keys"][vm["name"]], None)
+            else:
+                for key, reservation in admission["previous"].items():
+                    if reservation is None:
+                        self.reservations.pop(key, None)
+                    else:
+                        self.reservations[key] = reservation
+            self.applies_in_flight -= 1
+            self.condition.notify_all()
+    
+    def expect_release(self):
+        """Record a scheduled destroy; applies that do not fit wait for its release()"""
+        with self.condition:
+            self.pending_releases += 1
+    
+    def release(self, work_dir: Path, vm_names: Iterable[str]):
+        """Settle a destroy scheduled with expect_release()
+        
+        Args:
+            work_dir: Destroyed workspace
+            vm_names: Names of VMs that no longer exist (empty if the destroy failed)
+        """
+        workspace = str(work_dir)
+        with self.condition:
+            for name in vm_names:
+                self.reservations.pop(self._key(workspace, name), None)
+            self.pending_releases = max(0, self.pending_releases - 1)
+            self.condition.notify_all()
+
+def planned_vms_from_plan(plan_document: Dict) -> List[Dict]:
+    """Extract VM changes from `terraform show -json tfplan` output
+    
+    Args:
+        plan_document: Parsed plan JSON
+    
+    Returns:
+        List of dicts with name, action, ram_gb and vcpus (planned values)
+    """
+    planned = []
+    
+    for resource_change in plan_document.get("resource_changes") or []:
+        if resource_change.get("type") != "xenorchestra_vm" or resource_change.get("mode") != "managed":
+            continue
+        
+        change = resource_change.get("change") or {}
+        actions = change.get("actions") or []
+        before = change.get("before") or {}
+        after = change.get("after") or {}
+        
+        if actions in (["no-op"], ["read"]):
+            continue
+        if actions == ["delete"]:
+            action, values = "delete", before
+        elif "delete" in actions:
+            action, values = "replace", after
+        else:
+            action, values = actions[0], after
+        
+        planned.append({
+            "name": values.get("name_label") or before.get("name_label") or resource_change.get("address"),
+            "action": action,
+            "ram_gb": round((values.get("memory_max") or 0) / GB, 2),
+            "vcpus": int(values.get("cpus") or 0)
+        })
+    
+    return planned
+
+def estimate_planned_vms(vm_names: Iterable[str], ram_gb: Optional[float], cpus: Optional[int]) -> List[Dict]:
+    """Fallback VM changes when the plan has no planned values
+    
+    Args:
+        vm_names: VM names from the configuration
+        ram_gb: Task's expected RAM (split evenly across the VMs)
+        cpus: Task's expected vCPUs per VM
+    
+    Returns:
+        List of planned VM dicts
+    """
+    vm_names = sorted(vm_names)
+    if not vm_names:
+        return []
+    
+    ram_each = round((ram_gb or 0) / len(vm_names), 2)
+    return [{"name": name, "action": "create", "ram_gb": ram_each, "vcpus": cpus or 0} for name in vm_names]
@@ -0,0 +1,233 @@
+"""Token usage and cost accounting
+
+ModelCatalog caches OpenRouter's /models listing (with per-token pricing)
+on disk. CostLedger accumulates usage and cost per model, task and
+iteration for one run and enforces an optional budget: once the spend
+reaches it, the orchestrator stops starting new iterations.
+
+Costs come from the provider's own accounting (usage.cost, requested with
+usage.include) when present, otherwise from catalog prices. The cancelled
+request of a hedged call is recorded as hedge overhead: it counts towards
+the totals and the budget and is also reported on its own.
+"""
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TTL_SECONDS = 24 * 3600
+
+def normalize_usage(usage: Optional[Dict]) -> Dict:
+    """Token counts from an OpenAI/OpenRouter usage block
+    
+    Returns:
+        Dict with prompt_tokens, completion_tokens (including reasoning),
+        cached_tokens, reasoning_tokens and reported_cost (None if absent)
+    """
+    usage = usage or {}
+    prompt_details = usage.get("prompt_tokens_details") or {}
+    completion_details = usage.get("completion_tokens_details") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+        "cached_tokens": prompt_details.get("cached_tokens") or 0,
+        "reasoning_tokens": completion_details.get("reasoning_tokens") or 0,
+        "reported_cost": usage.get("cost")
+    }
+
+def price(usage: Dict, pricing: Optional[Dict]) -> Optional[float]:
+    """Cost in USD of normalized usage under catalog pricing
+    
+    Cached prompt tokens are billed at input_cache_read when the model has
+    that price. Reasoning tokens are part of completion_tokens.
+    
+    Returns:
+        Cost, or None when the model has no known pricing
+    """
+    if not pricing:
+        return None
+    
+    def rate(key: str, default: float = 0.0) -> float:
+        try:
+            return float(pricing.get(key, default))
+        except (TypeError, ValueError):
+            return default
+    
+    prompt_rate = rate("prompt")
+    cached = min(usage["cached_tokens"], usage["prompt_tokens"])
+    return (
+        (usage["prompt_tokens"] - cached) * prompt_rate
+        + cached * rate("input_cache_read", prompt_rate)
+        + usage["completion_tokens"] * rate("completion")
+        + rate("request")
+    )
+
+class ModelCatalog:
+    """OpenRouter model listing, cached on disk for a day"""
+    
+    def __init__(self, cache_path: Path, base_url: str, ttl_seconds: float = CATALOG_TTL_SECONDS):
+        self.cache_path = Path(cache_path)
+        self.base_url = base_url.rstrip('/')
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self._models: Optional[List[Dict]] = None
+    
+    def models(self) -> List[Dict]:
+        """Catalog entries (id, name, pricing, ...); empty if unavailable"""
+        with self.lock:
+            if self._models is None:
+                self._models = self._load()
+            return self._models
+    
+    def pricing(self, model_id: str) -> Optional[Dict]:
+        """Per-token prices of a model, None if it is not in the catalog"""
+        for model in self.models():
+            if model.get("id") == model_id:
+                return model.get("pricing") or None
+        return None
+    
+    def _load(self) -> List[Dict]:
+        cached = None
+        if self.cache_path.exists():
+            try:
+                cached = json.loads(self.cache_path.read_text())
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable model catalog cache: {e}")
+        
+        if cached and time.time() - cached.get("fetched_at", 0) < self.ttl_seconds and cached.get("base_url") == self.base_url:
+            return cached.get("data", [])
+        
+        try:
+            response = requests.get(f"{self.base_url}/models", timeout=10)
+            response.raise_for_status()
+            models = response.json().get("data", [])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Could not fetch model catalog ({e}), {'using stale cache' if cached else 'costs unavailable'}")
+            return (cached or {}).get("data", [])
+        
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_path.write_text(json.dumps({"fetched_at": time.time(), "base_url": self.base_url, "data": models}))
+        return models
+
+def _empty_totals() -> Dict:
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "reasoning_tokens": 0,
+        "cost_usd": 0.0,
+        "unpriced_calls": 0
+    }
+
+def _add(totals: Dict, usage: Dict, cost: Optional[float]):
+    totals["calls"] += 1
+    for key in ("prompt_tokens", "completion_tokens", "cached_tokens", "reasoning_tokens"):
+        totals[key] += usage[key]
+    if cost is None:
+        totals["unpriced_calls"] += 1
+    else:
+        totals["cost_usd"] += cost
+
+class CostLedger:
+    """Usage and cost of a run, per model and task, with an optional budget"""
+    
+    def __init__(self, catalog: Optional[ModelCatalog] = None, budget_usd: Optional[float] = None):
+        self.catalog = catalog
+        self.budget_usd = budget_usd
+        self.lock = threading.Lock()
+        self.totals = _empty_totals()
+        self.by_model: Dict[str, Dict] = {}
+        self.by_task: Dict[str, Dict] = {}
+        self.hedge_overhead = _empty_totals()
+        self.succeeded_tasks = 0
+        self.finished_tasks = 0
+    
+    def record(self, model_id: str, task_key: str, usage: Optional[Dict], hedge_overhead: bool = False) -> Dict:
+        """Account for one LLM call
+        
+        Args:
+            model_id: Model API id (catalog key)
+            task_key: Task key (e.g. 'c1_2')
+            usage: Raw usage block of the response
+            hedge_overhead: The usage is that of the cancelled request of a
+                hedged call (also added to the hedge_overhead totals)
+        
+        Returns:
+            Normalized usage with cost_usd (None when unpriced)
+        """
+        normalized = normalize_usage(usage)
+        cost = normalized.pop("reported_cost")
+        if cost is None and self.catalog:
+            cost = price(normalized, self.catalog.pricing(model_id))
+        normalized["cost_usd"] = cost
+        
+        with self.lock:
+            _add(self.totals, normalized, cost)
+            _add(self.by_model.setdefault(model_id, _empty_totals()), normalized, cost)
+            _add(self.by_task.setdefault(f"{model_id}/{task_key}", _empty_totals()), normalized, cost)
+            if hedge_overhead:
+                _add(self.hedge_overhead, normalized, cost)
+        return normalized
+    
+    def task_finished(self, success: bool):
+        with self.lock:
+            self.finished_tasks += 1
+            self.succeeded_tasks += bool(success)
+    
+    @property
+    def spent_usd(self) -> float:
+        return self.totals["cost_usd"]
+    
+    @property
+    def exhausted(self) -> bool:
+        """Whether the budget is used up (never without a budget)"""
+        return self.budget_usd is not None and self.spent_usd >= self.budget_usd
+    
+    def summary(self) -> Dict:
+        """Totals, per-model and per-task breakdown, budget and tasks per dollar"""
+        with self.lock:
+            cost = self.totals["cost_usd"]
+            return {
+                **{key: round(value, 6) if key == "cost_usd" else value for key, value in self.totals.items()},
+                "budget_usd": self.budget_usd,
+                "budget_exhausted": self.exhausted,
+                "finished_tasks": self.finished_tasks,
+                "succeeded_tasks": self.succeeded_tasks,
+                # Throughput per dollar: successful dataset entries per USD spent
+                "succeeded_tasks_per_usd": round(self.succeeded_tasks / cost, 3) if cost else None,
+                "by_model": {model: dict(totals, cost_usd=round(totals["cost_usd"], 6)) for model, totals in self.by_model.items()},
+                "by_task": {task: dict(totals, cost_usd=round(totals["cost_usd"], 6)) for task, totals in self.by_task.items()},
+                "hedge_overhead": dict(self.hedge_overhead, cost_usd=round(self.hedge_overhead["cost_usd"], 6))
+            }
+
+def format_summary(summary: Dict) -> str:
+    """Human-readable usage and cost per model, with run totals"""
+    rows = list(summary["by_model"].items()) + [("total", summary)]
+    width = max(len(name) for name, _ in rows) + 2
+    lines = [f"{'Model':<{width}}{'calls':>7}{'prompt':>10}{'cached':>10}{'completion':>12}{'reasoning':>11}{'cost USD':>12}"]
+    for name, totals in rows:
+        lines.append(
+            f"{name:<{width}}{totals['calls']:>7}{totals['prompt_tokens']:>10}{totals['cached_tokens']:>10}"
+            f"{totals['completion_tokens']:>12}{totals['reasoning_tokens']:>11}{totals['cost_usd']:>12.4f}"
+        )
+    
+    if summary["unpriced_calls"]:
+        lines.append(f"{summary['unpriced_calls']} call(s) without pricing are not included in the cost")
+    overhead = summary.get("hedge_overhead") or {}
+    if overhead.get("calls"):
+        lines.append(
+            f"Hedge overhead (included above): {overhead['calls']} cancelled request(s), "
+            f"{overhead['prompt_tokens'] + overhead['completion_tokens']} tokens, ${overhead['cost_usd']:.4f}"
+        )
+    if summary["budget_usd"] is not None:
+        lines.append(f"Budget: ${summary['budget_usd']:g}{' (exhausted)' if summary['budget_exhausted'] else ''}")
+    if summary["succeeded_tasks_per_usd"] is not None:
+        lines.append(f"Succeeded tasks per USD: {summary['succeeded_tasks_per_usd']}")
+    return "\n".join(lines)
@@ -5,8 +5,12 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
 
+from . import timeline as iteration_timeline
+
 logger = logging.getLogger(__name__)
 
+CANDIDATES_SUFFIX = ".candidates.jsonl"
+
 class DatasetGenerator:
     """Generate JSON dataset entries following the schema"""
     
@@ -27,7 +31,11 @@ class DatasetGenerator:
         screenshots: Dict[str, str],
         iteration_count: int,
         worked_as_generated: bool,
-        evaluator_notes: str = ""
+        evaluator_notes: str = "",
+        iteration_control: Optional[Dict] = None,
+        timeline: Optional[List[Dict]] = None,
+        candidates: Optional[List[Dict]] = None,
+        trial: Optional[int] = None
     ) -> Path:
         """Generate a complete JSON dataset entry
         
@@ -44,6 +52,12 @@ class DatasetGenerator:
             iteration_count: Number of iterations needed
             worked_as_generated: Whether code worked without fixes
             evaluator_notes: Additional notes
+            iteration_control: Repeated-error tracking outcome
+            timeline: Per-iteration timing records; the entry gets their totals
+                and the records go to a <entry>.timeline.jsonl sidecar
+            candidates: Best-of-N candidate records (code, pre-flight outcome);
+                they go to a <entry>.candidates.jsonl sidecar
+            trial: pass@k trial number (part of the entry ID)
             
         Returns:
             Path to generated JSON file
@@ -54,6 +68,8 @@ class DatasetGenerator:
         # Generate entry ID and filename
         task_id_lower = task_id.lower().replace('.', '_')
         entry_id = f"{task_id_lower}_{model_short_name}_{timestamp_str}"
+        if trial is not None:
+            entry_id = f"{task_id_lower}_{model_short_name}_t{trial}_{timestamp_str}"
         filename = f"{entry_id}.json"
         
         # Build the complete JSON structure
@@ -127,13 +143,142 @@ class DatasetGenerator:
         if prompt_data.get("is_idempotency_test"):
             entry["idempotency_test"] = verification_data.get("idempotency_test", {})
         
-        # Write JSON file
+        if iteration_control:
+            entry["iteration_control"] = iteration_control
+        
+        if trial is not None:
+            entry["trial"] = trial
+        
         output_path = self.output_dir / filename
+        if timeline:
+            sidecar = iteration_timeline.write_sidecar(output_path, timeline)
+            entry["timeline"] = dict(iteration_timeline.summarize(timeline), file=sidecar.name)
+        if candidates:
+            sidecar = iteration_timeline.write_sidecar(output_path, candidates, suffix=CANDIDATES_SUFFIX)
+            entry["llm_response"]["candidates"] = {
+                "count": len(candidates),
+                "passed": sum(record["status"] == "passed" for record in candidates),
+                "file": sidecar.name
+            }
+        
+        # Write JSON file
         output_path.write_text(json.dumps(entry, indent=2))
         logger.info(f"Generated dataset entry: {output_path}")
         
         return output_path
     
+    def generate_trial_summary(
+        self,
+        task_id: str,
+        task_description: str,
+        model_name: str,
+        model_short_name: str,
+        summary: Dict
+    ) -> Path:
+        """Write the pass@k summary of a task's trials next to their entries
+        
+        Args:
+            task_id: Task ID (e.g., 'C1.2')
+            task_description: Task description
+            model_name: Full model name
+            model_short_name: Short model name for filenames
+            summary: trials.summarize result
+        
+        Returns:
+            Path to generated JSON file
+        """
+        timestamp = datetime.now(timezone.utc)
+        entry_id = f"{task_id.lower().replace('.', '_')}_{model_short_name}_passk_{timestamp.strftime('%Y%m%d_%H%M%S')}"
+        entry = {
+            "dataset_version": "1.0",
+            "entry_id": entry_id,
+            "entry_type": "pass_at_k_summary",
+            "task_id": task_id,
+            "task_description": task_description,
+            "timestamp": timestamp.isoformat(),
+            "evaluator": "Automated System",
+            "metadata": {
+                "model_name": model_name,
+                "model_version": model_name
+            },
+            **summary
+        }
+        
+        output_path = self.output_dir / f"{entry_id}.json"
+        output_path.write_text(json.dumps(entry, indent=2))
+        logger.info(f"Generated pass@k summary: {output_path}")
+        
+        return output_path
+    
+    def generate_failure_entry(
+        self,
+        task_id: str,
+        task_description: str,
+        model_name: str,
+        model_short_name: str,
+        error: str,
+        iteration_count: int,
+        terraform_results: Dict,
+        iteration_control: Dict,
+        timeline: Optional[List[Dict]] = None,
+        trial: Optional[int] = None
+    ) -> Path:
+        """Record a task that ended without a successful apply
+        
+        Args:
+            task_id: Task ID (e.g., 'C1.2')
+            task_description: Task description
+            model_name: Full model name
+            model_short_name: Short model name for filenames
+            error: Why the task stopped (budget, abort, max iterations, ...)
+            iteration_count: Iterations run
+            terraform_results: Latest result per Terraform phase
+            iteration_control: Repeated-error tracking outcome
+            timeline: Per-iteration timing records; the entry gets their totals
+                and the records go to a <entry>.timeline.jsonl sidecar
+            trial: pass@k trial number (part of the entry ID)
+        
+        Returns:
+            Path to generated JSON file
+        """
+        timestamp = datetime.now(timezone.utc)
+        trial_part = f"_t{trial}" if trial is not None else ""
+        entry_id = (
+            f"{task_id.lower().replace('.', '_')}_{model_short_name}{trial_part}_failed_"
+            f"{timestamp.strftime('%Y%m%d_%H%M%S')}"
+        )
+        entry = {
+            "dataset_version": "1.0",
+            "entry_id": entry_id,
+            "entry_type": "failed_attempt",
+            "task_id": task_id,
+            "task_description": task_description,
+            "timestamp": timestamp.isoformat(),
+            "evaluator": "Automated System",
+            "metadata": {
+                "model_name": model_name,
+                "model_version": model_name
+            },
+            "error": error,
+            "iteration_count": iteration_count,
+            "execution_results": {
+                f"terraform_{phase}": self._format_tf_result(result) for phase, result in terraform_results.items()
+            },
+            "iteration_control": iteration_control
+        }
+        if trial is not None:
+            entry["trial"] = trial
+        
+        output_path = self.output_dir / f"{entry_id}.json"
+        if timeline:
+            sidecar = iteration_timeline.write_sidecar(output_path, timeline)
+            entry["timeline"] = dict(iteration_timeline.summarize(timeline), file=sidecar.name)
+        
+        output_path.write_text(json.dumps(entry, indent=2))
+        logger.info(f"Generated failure entry: {output_path}")
+        
+        return output_path
+    
     def _format_tf_result(self, result: Dict) -> Dict:
         """Format terraform result for JSON
         
@@ -0,0 +1,310 @@
+"""Condense Terraform output into compact diagnostic records for error feedback"""
+import re
+import json
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;?]*[ -/]*[@-~]')
+
+# "on main.tf line 12, in resource "xenorchestra_vm" "vm":"
+LOCATION_PATTERN = re.compile(r'^on (?P<filename>\S+) line (?P<line>\d+)(?:, in (?P<context>.+?))?:$')
+BOX_BORDER_PATTERN = re.compile(r'^\s*[│╷╵]\s?')
+SNIPPET_LINE_PATTERN = re.compile(r'^\s*(?P<line>\d+):\s?(?P<code>.*)$')
+BLOCK_CONTEXT_PATTERN = re.compile(r'^(?P<kind>resource|data) "(?P<type>[^"]+)" "(?P<name>[^"]+)"')
+
+MAX_DETAIL_CHARS = 500
+
+def strip_ansi(text: str) -> str:
+    """Remove ANSI colour codes from terminal output
+    
+    Args:
+        text: Raw command output
+    
+    Returns:
+        Text without escape sequences
+    """
+    return ANSI_ESCAPE_PATTERN.sub('', text or '')
+
+def truncate_middle(text: str, limit: int) -> str:
+    """Shorten text by cutting out its middle
+    
+    Terraform tends to print the cause first and the failing resource last,
+    so keeping both ends preserves more signal than a plain head cut.
+    
+    Args:
+        text: Text to shorten
+        limit: Maximum number of characters to keep
+    
+    Returns:
+        Text of at most roughly `limit` characters
+    """
+    if len(text) <= limit:
+        return text
+    
+    half = limit // 2
+    return f"{text[:half]}\n... [{len(text) - limit} chars omitted] ...\n{text[-half:]}"
+
+def _address_from_context(context: Optional[str]) -> Optional[str]:
+    """Derive a resource address from a snippet context like 'resource "t" "n"'"""
+    if not context:
+        return None
+    
+    match = BLOCK_CONTEXT_PATTERN.match(context.strip())
+    if not match:
+        return None
+    
+    address = f"{match.group('type')}.{match.group('name')}"
+    return f"data.{address}" if match.group('kind') == 'data' else address
+
+def _make_record(
+    severity: str,
+    summary: str,
+    detail: str = "",
+    address: Optional[str] = None,
+    filename: Optional[str] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    snippet: str = ""
+) -> Dict:
+    """Build a compact diagnostic record"""
+    detail = " ".join(detail.split())
+    if len(detail) > MAX_DETAIL_CHARS:
+        detail = detail[:MAX_DETAIL_CHARS] + "..."
+    
+    return {
+        "severity": severity,
+        "summary": summary.strip(),
+        "detail": detail,
+        "address": address,
+        "filename": filename,
+        "start_line": start_line,
+        "end_line": end_line,
+        "snippet": snippet.strip()
+    }
+
+def from_json_diagnostic(diagnostic: Dict) -> Dict:
+    """Convert a Terraform JSON diagnostic object into a compact record
+    
+    Args:
+        diagnostic: Diagnostic as emitted by `-json` output
+    
+    Returns:
+        Compact diagnostic record
+    """
+    range_info = diagnostic.get("range") or {}
+    snippet = diagnostic.get("snippet") or {}
+    
+    return _make_record(
+        severity=diagnostic.get("severity", "error"),
+        summary=diagnostic.get("summary", ""),
+        detail=diagnostic.get("detail", ""),
+        address=diagnostic.get("address") or _address_from_context(snippet.get("context")),
+        filename=range_info.get("filename"),
+        start_line=(range_info.get("start") or {}).get("line"),
+        end_line=(range_info.get("end") or {}).get("line"),
+        snippet=snippet.get("code", "")
+    )
+
+def parse_json_output(stdout: str) -> List[Dict]:
+    """Parse diagnostics from `terraform validate -json` or streamed `-json` output
+    
+    Args:
+        stdout: Command stdout
+    
+    Returns:
+        List of compact diagnostic records
+    """
+    records = []
+    stdout = stdout or ""
+    
+    # validate -json prints a single document with a "diagnostics" list
+    try:
+        document = json.loads(stdout)
+        if isinstance(document, dict) and "diagnostics" in document:
+            return [from_json_diagnostic(d) for d in document["diagnostics"]]
+    except json.JSONDecodeError:
+        pass
+    
+    # plan/apply -json stream one message per line
+    for line in stdout.splitlines():
+        line = line.strip()
+        if not line.startswith('{'):
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if message.get("type") == "diagnostic" and message.get("diagnostic"):
+            records.append(from_json_diagnostic(message["diagnostic"]))
+    
+    return records
+
+def parse_text_output(text: str) -> List[Dict]:
+    """Parse diagnostics from human-readable Terraform output
+    
+    Args:
+        text: Command stdout/stderr (colour codes and box borders are tolerated)
+    
+    Returns:
+        List of compact diagnostic records
+    """
+    records = []
+    current = None
+    
+    for raw_line in strip_ansi(text).splitlines():
+        line = BOX_BORDER_PATTERN.sub('', raw_line).rstrip()
+        stripped = line.strip()
+        
+        header = re.match(r'^(Error|Warning): (.*)$', stripped)
+        if header:
+            if current:
+                records.append(current)
+            current = {
+                "severity": header.group(1).lower(),
+                "summary": header.group(2),
+                "detail_lines": [],
+                "snippet_lines": [],
+                "address": None,
+                "filename": None,
+                "start_line": None,
+                "end_line": None
+            }
+            continue
+        
+        if current is None or not stripped:
+            continue
+        
+        location = LOCATION_PATTERN.match(stripped)
+        if location and current["filename"] is None:
+            current["filename"] = location.group("filename")
+            current["start_line"] = current["end_line"] = int(location.group("line"))
+            current["address"] = _address_from_context(location.group("context"))
+            continue
+        
+        snippet = SNIPPET_LINE_PATTERN.match(line)
+        if snippet and current["filename"] and not current["detail_lines"]:
+            current["snippet_lines"].append(snippet.group("code").strip())
+            current["end_line"] = max(current["end_line"] or 0, int(snippet.group("line")))
+            continue
+        
+        current["detail_lines"].append(stripped)
+    
+    if current:
+        records.append(current)
+    
+    return [
+        _make_record(
+            severity=r["severity"],
+            summary=r["summary"],
+            detail=" ".join(r["detail_lines"]),
+            address=r["address"],
+            filename=r["filename"],
+            start_line=r["start_line"],
+            end_line=r["end_line"],
+            snippet="\n".join(r["snippet_lines"])
+        )
+        for r in records
+    ]
+
+def deduplicate(records: List[Dict]) -> List[Dict]:
+    """Drop repeated diagnostics, keeping first occurrence order
+    
+    Args:
+        records: Diagnostic records
+    
+    Returns:
+        Unique diagnostic records
+    """
+    seen = set()
+    unique = []
+    
+    for record in records:
+        key = (
+            record["severity"],
+            record["summary"],
+            record["detail"],
+            record["address"],
+            record["filename"],
+            record["start_line"]
+        )
+        if key not in seen:
+            seen.add(key)
+            unique.append(record)
+    
+    return unique
+
+def parse_diagnostics(stdout: str, stderr: str, json_output: bool = False) -> List[Dict]:
+    """Extract unique diagnostics from a Terraform command's output
+    
+    Args:
+        stdout: Command stdout
+        stderr: Command stderr
+        json_output: Whether the command was run with `-json`
+    
+    Returns:
+        List of unique compact diagnostic records
+    """
+    records = []
+    
+    if json_output:
+        records.extend(parse_json_output(stdout))
+        # Errors raised before JSON output starts (e.g. bad flags) are plain text
+        records.extend(parse_text_output(stderr))
+    else:
+        records.extend(parse_text_output(stderr))
+        records.extend(parse_text_output(stdout))
+    
+    return deduplicate(records)
+
+def summarize(records: List[Dict]) -> Optional[str]:
+    """One-line summary of the error diagnostics
+    
+    Args:
+        records: Diagnostic records
+    
+    Returns:
+        Summary string, or None when there are no errors
+    """
+    errors = [r for r in records if r["severity"] == "error"]
+    if not errors:
+        return None
+    
+    return "; ".join(
+        f"{r['summary']} ({r['address']})" if r["address"] else r["summary"]
+        for r in errors
+    )
+
+def format_for_feedback(records: List[Dict]) -> str:
+    """Render diagnostic records as compact text for the LLM
+    
+    Args:
+        records: Diagnostic records
+    
+    Returns:
+        Formatted diagnostics block
+    """
+    lines = []
+    
+    for index, record in enumerate(records, 1):
+        location = []
+        if record["address"]:
+            location.append(record["address"])
+        if record["filename"]:
+            line_range = str(record["start_line"] or "?")
+            if record["end_line"] and record["end_line"] != record["start_line"]:
+                line_range += f"-{record['end_line']}"
+            location.append(f"{record['filename']}:{line_range}")
+        
+        header = f"{index}. [{record['severity']}] {record['summary']}"
+        if location:
+            header += f" ({', '.join(location)})"
+        lines.append(header)
+        
+        if record["detail"]:
+            lines.append(f"   {record['detail']}")
+        for code_line in record["snippet"].splitlines():
+            lines.append(f"   > {code_line}")
+    
+    return "\n".join(lines)
@@ -0,0 +1,113 @@
+"""Repeated-error detection and escalation for the iteration loop"""
+import re
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ErrorSignatureTracker:
+    """Track error signatures across iterations and decide when to escalate
+    
+    A signature is the failed phase plus the (summary, resource address) of
+    every error diagnostic. When the same signature repeats `repeat_limit`
+    times in a row, the next policy in `policies` is returned and the streak
+    starts over. Once the policies are exhausted the loop simply continues.
+    """
+    
+    ABORT = "abort"
+    FRESH_CONVERSATION = "fresh_conversation"
+    RAISE_TEMPERATURE = "raise_temperature"
+    POLICIES = (ABORT, FRESH_CONVERSATION, RAISE_TEMPERATURE)
+    
+    DEFAULT_POLICIES = (RAISE_TEMPERATURE, FRESH_CONVERSATION, ABORT)
+    
+    def __init__(self, repeat_limit: int = 3, policies: Optional[List[str]] = None):
+        self.repeat_limit = repeat_limit
+        self.policies = list(policies) if policies is not None else list(self.DEFAULT_POLICIES)
+        
+        unknown = [p for p in self.policies if p not in self.POLICIES]
+        if unknown:
+            raise ValueError(f"Unknown repeated-error policies: {unknown}")
+        
+        self.last_signature: Optional[str] = None
+        self.streak = 0
+        self.longest_streak = 0
+        self.signatures_seen = set()
+        self.escalations: List[Dict] = []
+        self.outcome = "in_progress"
+    
+    @staticmethod
+    def signature(phase: str, result: Dict) -> str:
+        """Build the error signature of a failed phase
+        
+        Args:
+            phase: Failed phase (extract, init, validate, plan, apply)
+            result: Executor result for the phase
+        
+        Returns:
+            Signature string
+        """
+        errors = [d for d in result.get("diagnostics") or [] if d.get("severity") == "error"]
+        
+        if errors:
+            parts = sorted({f"{d.get('summary')}@{d.get('address') or '-'}" for d in errors})
+        else:
+            # No structured diagnostics: first line of the message, numbers masked
+            first_line = (result.get("error_message") or "").strip().split('\n')[0]
+            parts = [re.sub(r'\d+', '#', first_line)]
+        
+        return f"{phase}|{'|'.join(parts)}"
+    
+    def record_failure(self, iteration: int, phase: str, result: Dict) -> Optional[str]:
+        """Record a failed iteration
+        
+        Args:
+            iteration: Iteration number
+            phase: Failed phase
+            result: Executor result for the phase
+        
+        Returns:
+            Policy to apply now, or None to keep iterating normally
+        """
+        signature = self.signature(phase, result)
+        self.signatures_seen.add(signature)
+        
+        if signature == self.last_signature:
+            self.streak += 1
+        else:
+            self.last_signature = signature
+            self.streak = 1
+        self.longest_streak = max(self.longest_streak, self.streak)
+        
+        if self.streak < self.repeat_limit or len(self.escalations) >= len(self.policies):
+            return None
+        
+        action = self.policies[len(self.escalations)]
+        self.escalations.append({
+            "iteration": iteration,
+            "action": action,
+            "signature": signature,
+            "repeats": self.streak
+        })
+        self.streak = 0
+        
+        logger.warning(f"Same error repeated {self.repeat_limit} times ({signature}), applying policy: {action}")
+        
+        if action == self.ABORT:
+            self.outcome = "aborted_repeated_error"
+        return action
+    
+    def summary(self) -> Dict:
+        """Summarize the iteration control outcome for the dataset entry
+        
+        Returns:
+            Summary dict
+        """
+        return {
+            "repeat_limit": self.repeat_limit,
+            "policies": self.policies,
+            "outcome": self.outcome,
+            "escalations": self.escalations,
+            "distinct_error_signatures": len(self.signatures_seen),
+            "longest_repeat_streak": self.longest_streak
+        }
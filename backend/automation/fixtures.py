@@ -0,0 +1,308 @@
+"""Fixture provisioning for task preconditions (infrastructure_state_before)
+
+Dependent tasks such as U1.2 or D2.2 need VMs that an earlier task would
+normally have left behind. The fixture engine creates those preconditions
+directly from canned Terraform configurations in a dedicated workspace, so
+any task can run in isolation. The fixture workspace converges to whichever
+state is requested next and is reused across models while it stays intact.
+"""
+import json
+import shutil
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from . import hcl_scanner
+from .capacity import HostCapacity
+from .namespace import VMNamespace
+from .terraform_executor import TerraformExecutor
+from .task_definitions import TaskDefinition, PROVIDER_VERSION
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+@dataclass
+class FixtureVM:
+    """A VM that must exist for a fixture state"""
+    name: str
+    cpus: int
+    memory_gb: int
+    disk_gb: int
+    
+    @property
+    def resource_name(self) -> str:
+        return self.name.replace('-', '_')
+
+_APP_01 = FixtureVM("app-01", cpus=2, memory_gb=4, disk_gb=50)
+_WEB_VMS = [FixtureVM(f"web-0{i}", cpus=2, memory_gb=4, disk_gb=50) for i in (1, 2, 3)]
+
+# infrastructure_state_before -> VMs that must exist
+FIXTURE_STATES: Dict[str, List[FixtureVM]] = {
+    "clean_server_0_vms": [],
+    "app_01_exists_4gb": [_APP_01],
+    "app_01_exists": [FixtureVM("app-01", cpus=2, memory_gb=6, disk_gb=50)],  # after U1.2
+    "3_vms_from_c2_3": _WEB_VMS,
+    "3_vms_exist": _WEB_VMS,
+}
+
+PROVIDER_CONFIG = f"""terraform {{
+  required_providers {{
+    xenorchestra = {{
+      source  = "terra-farm/xenorchestra"
+      version = "~> {PROVIDER_VERSION}"
+    }}
+  }}
+}}
+
+provider "xenorchestra" {{
+  url      = "ws://localhost:8080"
+  username = "admin@admin.net"
+  password = "admin"
+  insecure = true
+}}
+"""
+
+DATA_SOURCES = """
+data "xenorchestra_pool" "pool" {
+  name_label = "DAO-Agentic-Infra"
+}
+
+data "xenorchestra_template" "template" {
+  name_label = "Other install media"
+}
+
+data "xenorchestra_network" "network" {
+  name_label = "Pool-wide network associated with eth0"
+  pool_id    = data.xenorchestra_pool.pool.id
+}
+
+data "xenorchestra_sr" "sr" {
+  name_label = "Local storage"
+  pool_id    = data.xenorchestra_pool.pool.id
+}
+"""
+
+VM_RESOURCE = """
+resource "xenorchestra_vm" "{resource_name}" {{
+  name_label = "{name}"
+  template   = data.xenorchestra_template.template.id
+  cpus       = {cpus}
+  memory_max = {memory_bytes}
+
+  cdrom {{
+    id = "286a9f23-133c-4cdf-a247-4de9ef4b17e9"
+  }}
+
+  network {{
+    network_id = data.xenorchestra_network.network.id
+  }}
+
+  disk {{
+    sr_id      = data.xenorchestra_sr.sr.id
+    name_label = "{name}-disk"
+    size       = {disk_bytes}
+  }}
+}}
+"""
+
+def render_fixture_config(vms: List[FixtureVM]) -> str:
+    """Render the canned Terraform configuration for a fixture state
+    
+    Args:
+        vms: VMs that must exist
+    
+    Returns:
+        Terraform configuration
+    """
+    config = PROVIDER_CONFIG
+    if vms:
+        config += DATA_SOURCES
+    for vm in vms:
+        config += VM_RESOURCE.format(
+            resource_name=vm.resource_name,
+            name=vm.name,
+            cpus=vm.cpus,
+            memory_bytes=vm.memory_gb * GB,
+            disk_bytes=vm.disk_gb * GB
+        )
+    return config
+
+def same_fixture(state_a: str, state_b: str) -> bool:
+    """Whether two fixture states need the same VMs (e.g. 3_vms_from_c2_3 and 3_vms_exist)"""
+    return state_a == state_b or (
+        state_a in FIXTURE_STATES and state_b in FIXTURE_STATES and FIXTURE_STATES[state_a] == FIXTURE_STATES[state_b]
+    )
+
+def task_manages_fixture(task: TaskDefinition) -> bool:
+    """Whether a task's code is expected to manage the fixture VMs itself
+    
+    Update, delete and incremental tasks get a copy of the fixture state so
+    their plan changes the existing VMs instead of recreating them. Read and
+    plain create tasks must not, or their plan would destroy the fixture VMs
+    they do not declare.
+    """
+    return task.operation_type in ("update", "delete") or task.is_incremental
+
+class FixtureProvisioner:
+    """Create and reuse precondition infrastructure for tasks"""
+    
+    def __init__(
+        self,
+        fixture_dir: Path,
+        capacity: Optional[HostCapacity] = None,
+        namespace: Optional[VMNamespace] = None,
+        terraform_factory: Optional[Callable[[Path], TerraformExecutor]] = None
+    ):
+        self.fixture_dir = Path(fixture_dir)
+        self.capacity = capacity
+        self.namespace = namespace
+        self.terraform = (terraform_factory or TerraformExecutor)(self.fixture_dir)
+        self.active_state: Optional[str] = None
+        self.initialized = False
+        self.lock = threading.Lock()
+    
+    def ensure(self, state_name: str) -> Dict:
+        """Bring the host into a fixture state
+        
+        Skips Terraform entirely when an equivalent state is already active and
+        no task has touched its VMs since.
+        
+        Args:
+            state_name: TaskDefinition.infrastructure_state_before value
+        
+        Returns:
+            Dict with status, state, reused flag and error_message
+        """
+        if state_name not in FIXTURE_STATES:
+            return {
+                "status": "failed",
+                "state": state_name,
+                "reused": False,
+                "error_message": f"No fixture defined for state '{state_name}'"
+            }
+        
+        with self.lock:
+            if self.active_state and same_fixture(self.active_state, state_name):
+                logger.info(f"Reusing fixture '{self.active_state}' for '{state_name}'")
+                return {"status": "success", "state": state_name, "reused": True, "error_message": None}
+            
+            logger.info(f"Provisioning fixture '{state_name}'...")
+            config = render_fixture_config(FIXTURE_STATES[state_name])
+            if self.namespace:
+                config = self.namespace.apply(config)
+            self.terraform.write_main_tf(config)
+            self.active_state = None
+            
+            phases = ["plan", "apply"] if self.initialized else ["init", "plan", "apply"]
+            for phase in phases:
+                admission = None
+                if phase == "apply" and self.capacity:
+                    admission = self.capacity.admit(result.get("planned_vms", []), self.fixture_dir)
+                
+                result = getattr(self.terraform, phase)()
+                
+                if admission:
+                    self.capacity.commit(admission, result["status"] == "success")
+                if result["status"] != "success":
+                    logger.error(f"Fixture {phase} failed: {result['error_message']}")
+                    return {
+                        "status": "failed",
+                        "state": state_name,
+                        "reused": False,
+                        "error_message": f"Fixture {phase} failed: {result['error_message']}"
+                    }
+                if phase == "init":
+                    self.initialized = True
+            
+            self.active_state = state_name
+            return {"status": "success", "state": state_name, "reused": False, "error_message": None}
+    
+    def vm_names(self, state_name: str) -> Set[str]:
+        """VM names a fixture state needs
+        
+        Args:
+            state_name: TaskDefinition.infrastructure_state_before value
+            
+        Returns:
+            Set of host-level VM names
+        """
+        names = {vm.name for vm in FIXTURE_STATES.get(state_name, [])}
+        if self.namespace:
+            names = {self.namespace.qualify(name) for name in names}
+        return names
+    
+    def mark_dirty(self):
+        """Record that a task may have changed or destroyed the fixture VMs"""
+        with self.lock:
+            self.active_state = None
+    
+    def seed_workspace(self, work_dir: Path) -> bool:
+        """Give a task workspace a copy of the fixture state
+        
+        Args:
+            work_dir: Task workspace
+        
+        Returns:
+            True if state was seeded
+        """
+        state_file = self.fixture_dir / "terraform.tfstate"
+        if not state_file.exists():
+            return False
+        
+        shutil.copy2(state_file, Path(work_dir) / "terraform.tfstate")
+        logger.info(f"Seeded {work_dir} with fixture state")
+        return True
+    
+    @staticmethod
+    def align_state(work_dir: Path, code: str) -> int:
+        """Rename seeded VM resources to the addresses used by the generated code
+        
+        The model picks its own resource names, so fixture VMs are matched to
+        resources by their literal name_label. Resources using count/for_each
+        or computed names are left alone.
+        
+        Args:
+            work_dir: Task workspace with seeded state
+            code: Terraform code as written to the workspace
+        
+        Returns:
+            Number of resources renamed
+        """
+        state_file = Path(work_dir) / "terraform.tfstate"
+        if not state_file.exists():
+            return 0
+        
+        try:
+            root = hcl_scanner.parse(code)
+        except hcl_scanner.HCLSyntaxError:
+            return 0
+        
+        address_by_label = {}
+        for block in hcl_scanner.find_blocks(root, "resource", "xenorchestra_vm"):
+            name_label = block.attributes.get("name_label")
+            if len(block.labels) != 2 or not name_label or "count" in block.attributes or "for_each" in block.attributes:
+                continue
+            expression = name_label.expression
+            if expression.startswith('"') and expression.endswith('"') and "${" not in expression:
+                address_by_label[expression[1:-1]] = block.labels[1]
+        
+        state = json.loads(state_file.read_text())
+        renamed = 0
+        for resource in state.get("resources", []):
+            if resource.get("mode") != "managed" or resource.get("type") != "xenorchestra_vm":
+                continue
+            instances = resource.get("instances", [])
+            if len(instances) != 1 or "index_key" in instances[0]:
+                continue
+            target = address_by_label.get(instances[0].get("attributes", {}).get("name_label"))
+            if target and target != resource["name"]:
+                resource["name"] = target
+                renamed += 1
+        
+        if renamed:
+            state_file.write_text(json.dumps(state, indent=2))
+            logger.info(f"Aligned {renamed} seeded resource address(es) with generated code")
+        return renamed
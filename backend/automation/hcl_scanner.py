@@ -0,0 +1,362 @@
+"""Lightweight HCL structure scanner
+
+Parses just enough of HCL to recover blocks, labels and attribute names with
+their line numbers. Expressions are kept as raw text and never evaluated.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+NUMBER_PATTERN = re.compile(r'\d+(\.\d+)?([eE][+-]?\d+)?')
+HEREDOC_PATTERN = re.compile(r'<<(-?)([A-Za-z_][A-Za-z0-9_-]*)[ \t]*\n')
+
+TWO_CHAR_OPERATORS = ("==", "!=", "<=", ">=", "=>", "&&", "||", "...")
+OPENING = {"{": "}", "[": "]", "(": ")"}
+CLOSING = {v: k for k, v in OPENING.items()}
+
+class HCLSyntaxError(Exception):
+    """Raised when the configuration cannot be scanned"""
+    
+    def __init__(self, summary: str, detail: str, line: int):
+        super().__init__(f"{summary} (line {line}): {detail}")
+        self.summary = summary
+        self.detail = detail
+        self.line = line
+
+@dataclass
+class Token:
+    """A lexical token"""
+    kind: str  # ident, string, number, heredoc, op, newline, eof
+    value: str
+    line: int
+
+@dataclass
+class Attribute:
+    """An attribute assignment inside a body"""
+    name: str
+    expression: str
+    line: int
+    end_line: int
+
+@dataclass
+class Block:
+    """A block and its body"""
+    type: str
+    labels: List[str]
+    line: int
+    end_line: int
+    attributes: Dict[str, Attribute] = field(default_factory=dict)
+    blocks: List["Block"] = field(default_factory=list)
+
+def _scan_template(text: str, pos: int, line: int, terminator: str) -> Tuple[int, int]:
+    """Scan a quoted template up to its terminator, honouring ${...} nesting
+    
+    Returns:
+        (position after the terminator, current line)
+    """
+    start_line = line
+    while pos < len(text):
+        char = text[pos]
+        
+        if char == '\\':
+            pos += 2
+            continue
+        
+        if char == '\n':
+            raise HCLSyntaxError(
+                "Invalid multi-line string",
+                "Quoted strings may not be split over multiple lines. To produce a multi-line string, "
+                "either use the \\n escape to represent a newline character or use the \"heredoc\" multi-line template syntax.",
+                line
+            )
+        
+        if text.startswith(('${', '%{'), pos) and not text.startswith(('$${', '%%{'), pos - 1):
+            pos, line = _scan_interpolation(text, pos + 2, line)
+            continue
+        
+        if char == terminator:
+            return pos + 1, line
+        
+        pos += 1
+    
+    raise HCLSyntaxError("Unterminated template string", "No closing marker was found for the string.", start_line)
+
+def _scan_interpolation(text: str, pos: int, line: int) -> Tuple[int, int]:
+    """Scan an interpolation sequence body up to its closing brace"""
+    start_line = line
+    depth = 1
+    while pos < len(text):
+        char = text[pos]
+        if char == '"':
+            pos, line = _scan_template(text, pos + 1, line, '"')
+            continue
+        if char == '\n':
+            line += 1
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return pos + 1, line
+        pos += 1
+    
+    raise HCLSyntaxError("Unclosed template interpolation", "There is no closing brace for this interpolation sequence.", start_line)
+
+def tokenize(text: str) -> List[Token]:
+    """Split HCL source into tokens
+    
+    Args:
+        text: HCL source
+    
+    Returns:
+        List of tokens ending with an eof token
+    """
+    tokens = []
+    pos = 0
+    line = 1
+    
+    while pos < len(text):
+        char = text[pos]
+        
+        if char in ' \t\r':
+            pos += 1
+            continue
+        
+        if char == '\n':
+            tokens.append(Token("newline", "\n", line))
+            line += 1
+            pos += 1
+            continue
+        
+        if char == '#' or text.startswith('//', pos):
+            end = text.find('\n', pos)
+            pos = len(text) if end == -1 else end
+            continue
+        
+        if text.startswith('/*', pos):
+            end = text.find('*/', pos + 2)
+            if end == -1:
+                raise HCLSyntaxError("Unterminated comment", "There is no closing marker for this comment.", line)
+            line += text.count('\n', pos, end)
+            pos = end + 2
+            continue
+        
+        if char == '"':
+            start, start_line = pos, line
+            pos, line = _scan_template(text, pos + 1, line, '"')
+            tokens.append(Token("string", text[start + 1:pos - 1], start_line))
+            continue
+        
+        heredoc = HEREDOC_PATTERN.match(text, pos)
+        if heredoc:
+            start_line = line
+            marker = heredoc.group(2)
+            pos = heredoc.end()
+            line += 1
+            closing = re.compile(rf'^[ \t]*{re.escape(marker)}[ \t]*$', re.MULTILINE)
+            match = closing.search(text, pos)
+            if not match:
+                raise HCLSyntaxError(
+                    "Unterminated template string",
+                    f"No closing marker was found for the heredoc \"{marker}\".",
+                    start_line
+                )
+            line += text.count('\n', pos, match.end())
+            tokens.append(Token("heredoc", text[pos:match.start()], start_line))
+            pos = match.end()
+            continue
+        
+        identifier = IDENTIFIER_PATTERN.match(text, pos)
+        if identifier:
+            tokens.append(Token("ident", identifier.group(0), line))
+            pos = identifier.end()
+            continue
+        
+        number = NUMBER_PATTERN.match(text, pos)
+        if number:
+            tokens.append(Token("number", number.group(0), line))
+            pos = number.end()
+            continue
+        
+        operator = next((op for op in TWO_CHAR_OPERATORS if text.startswith(op, pos)), char)
+        tokens.append(Token("op", operator, line))
+        pos += len(operator)
+    
+    tokens.append(Token("eof", "", line))
+    return tokens
+
+class _Parser:
+    """Recursive descent over the token stream"""
+    
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.pos = 0
+    
+    def peek(self) -> Token:
+        return self.tokens[self.pos]
+    
+    def advance(self) -> Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+    
+    def skip_newlines(self):
+        while self.peek().kind == "newline":
+            self.advance()
+    
+    def parse_body(self, block: Block, closing: Optional[str]):
+        """Parse attributes and nested blocks until the closing brace (or eof)"""
+        while True:
+            self.skip_newlines()
+            token = self.peek()
+            
+            if token.kind == "eof":
+                if closing:
+                    raise HCLSyntaxError(
+                        "Unclosed configuration block",
+                        "There is no closing brace for this block before the end of the file.",
+                        block.line
+                    )
+                return
+            
+            if token.kind == "op" and token.value == "}":
+                if not closing:
+                    raise HCLSyntaxError("Argument or block definition required", "An argument or block definition is required here.", token.line)
+                block.end_line = self.advance().line
+                return
+            
+            if token.kind != "ident":
+                raise HCLSyntaxError(
+                    "Argument or block definition required",
+                    "An argument or block definition is required here.",
+                    token.line
+                )
+            
+            name = self.advance()
+            following = self.peek()
+            
+            if following.kind == "op" and following.value == "=":
+                self.advance()
+                self.parse_attribute(block, name)
+            elif following.kind in ("string", "ident") or (following.kind == "op" and following.value == "{"):
+                self.parse_block(block, name)
+            else:
+                raise HCLSyntaxError(
+                    "Invalid block definition" if following.kind != "newline" else "Argument or block definition required",
+                    "Either a quoted string block label or an opening brace (\"{\") is expected here."
+                    if following.kind != "newline" else
+                    "An argument or block definition is required here. To set an argument, use the equals sign \"=\" to introduce the argument value.",
+                    following.line
+                )
+    
+    def parse_attribute(self, block: Block, name: Token):
+        """Consume an attribute expression up to the end of its line"""
+        if name.value in block.attributes:
+            raise HCLSyntaxError(
+                "Attribute redefined",
+                f"The argument \"{name.value}\" was already set at line {block.attributes[name.value].line}. "
+                "Each argument may be set only once.",
+                name.line
+            )
+        
+        stack = []
+        parts = []
+        end_line = name.line
+        
+        while True:
+            token = self.peek()
+            
+            if token.kind == "eof":
+                if stack:
+                    raise HCLSyntaxError(
+                        "Unbalanced brackets",
+                        f"There is no closing \"{OPENING[stack[-1][0]]}\" for the \"{stack[-1][0]}\" opened here.",
+                        stack[-1][1]
+                    )
+                break
+            
+            if not stack and (token.kind == "newline" or (token.kind == "op" and token.value == "}")):
+                break
+            
+            self.advance()
+            end_line = token.line
+            
+            if token.kind == "op" and token.value in OPENING:
+                stack.append((token.value, token.line))
+            elif token.kind == "op" and token.value in CLOSING:
+                if not stack or stack[-1][0] != CLOSING[token.value]:
+                    raise HCLSyntaxError(
+                        "Unbalanced brackets",
+                        f"Unexpected \"{token.value}\" in the value of argument \"{name.value}\".",
+                        token.line
+                    )
+                stack.pop()
+            
+            if token.kind != "newline":
+                parts.append(f'"{token.value}"' if token.kind == "string" else token.value)
+        
+        if not parts:
+            raise HCLSyntaxError("Missing expression", f"Expected a value for argument \"{name.value}\".", name.line)
+        
+        block.attributes[name.value] = Attribute(name.value, " ".join(parts), name.line, end_line)
+    
+    def parse_block(self, parent: Block, name: Token):
+        """Parse block labels and body"""
+        labels = []
+        while self.peek().kind in ("string", "ident"):
+            labels.append(self.advance().value)
+        
+        opening = self.peek()
+        if not (opening.kind == "op" and opening.value == "{"):
+            raise HCLSyntaxError(
+                "Invalid block definition",
+                "A block definition must have block content delimited by \"{\" and \"}\", starting on the same line as the block header.",
+                opening.line
+            )
+        self.advance()
+        
+        block = Block(type=name.value, labels=labels, line=name.line, end_line=name.line)
+        self.parse_body(block, closing="}")
+        parent.blocks.append(block)
+        
+        after = self.peek()
+        if not (after.kind in ("newline", "eof") or (after.kind == "op" and after.value == "}")):
+            raise HCLSyntaxError(
+                "Missing newline after block definition",
+                "A block definition must end with a newline.",
+                after.line
+            )
+
+def parse(text: str) -> Block:
+    """Parse HCL source into a block tree
+    
+    Args:
+        text: HCL source
+    
+    Returns:
+        Root Block (type "") holding top-level attributes and blocks
+    
+    Raises:
+        HCLSyntaxError: If the source is not structurally valid HCL
+    """
+    parser = _Parser(tokenize(text))
+    root = Block(type="", labels=[], line=1, end_line=text.count('\n') + 1)
+    parser.parse_body(root, closing=None)
+    return root
+
+def find_blocks(root: Block, block_type: str, first_label: Optional[str] = None) -> List[Block]:
+    """Find top-level blocks by type and optionally first label
+    
+    Args:
+        root: Root block from parse()
+        block_type: Block type (e.g. 'resource')
+        first_label: Optional first label (e.g. 'xenorchestra_vm')
+    
+    Returns:
+        Matching blocks
+    """
+    return [
+        block for block in root.blocks
+        if block.type == block_type and (first_label is None or (block.labels and block.labels[0] == first_label))
+    ]
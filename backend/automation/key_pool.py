@@ -0,0 +1,223 @@
+"""Pool of OpenRouter API keys with load-aware rotation
+
+Each request attempt takes the key with the fewest recent 429s, then the
+fewest requests in flight, then the most remaining credit (from OpenRouter's
+/key endpoint, decreased locally by reported costs), then the least recently
+used. Throttled keys (429) are evicted for their Retry-After or an
+exponential cooldown; rejected keys (401, 402, 403) for an hour. Several
+runs can share one pool so they spread over the same accounts.
+
+Keys come from OPENROUTER_API_KEYS (comma-separated) and OPENROUTER_API_KEY.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 429s within this window count against a key
+RECENT_WINDOW_SECONDS = 60
+THROTTLE_COOLDOWN_SECONDS = 5
+MAX_THROTTLE_COOLDOWN_SECONDS = 300
+REJECTED_COOLDOWN_SECONDS = 3600
+# Statuses that take a key out of rotation: invalid/disabled key, no credits
+REJECTED_STATUS = (401, 402, 403)
+QUOTA_REFRESH_SECONDS = 300
+
+def mask(key: str) -> str:
+    """Printable key id (first 8 and last 4 characters)"""
+    return f"{key[:8]}...{key[-4:]}" if len(key) > 12 else "***"
+
+def keys_from_env() -> List[str]:
+    """Keys from OPENROUTER_API_KEYS (comma-separated) and OPENROUTER_API_KEY, without duplicates"""
+    keys = [key.strip() for key in os.getenv('OPENROUTER_API_KEYS', '').split(',') if key.strip()]
+    single = os.getenv('OPENROUTER_API_KEY', '').strip()
+    if single and single not in keys:
+        keys.append(single)
+    return keys
+
+class _KeyState:
+    """Counters and eviction state of one key"""
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.label = mask(key)
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.rejected = 0
+        self.throttle_streak = 0
+        self.recent_throttles: deque = deque()
+        self.evicted_until = 0.0
+        self.evicted_reason: Optional[str] = None
+        self.last_used = 0.0
+        self.limit_remaining: Optional[float] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+    
+    def evicted(self, now: float) -> bool:
+        return self.evicted_until > now or (self.limit_remaining is not None and self.limit_remaining <= 0)
+    
+    def score(self, now: float):
+        while self.recent_throttles and self.recent_throttles[0] < now - RECENT_WINDOW_SECONDS:
+            self.recent_throttles.popleft()
+        remaining = math.inf if self.limit_remaining is None else self.limit_remaining
+        return (len(self.recent_throttles), self.in_flight, -remaining, self.last_used)
+
+class APIKeyPool:
+    """API keys shared by clients (and runs), rotated by load and health"""
+    
+    def __init__(self, keys: List[str], refresh_seconds: float = QUOTA_REFRESH_SECONDS):
+        if not keys:
+            raise ValueError("OpenRouter API key is required")
+        self.keys = list(keys)
+        self.states = {key: _KeyState(key) for key in self.keys}
+        self.refresh_seconds = refresh_seconds
+        self.next_refresh = 0.0
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> "APIKeyPool":
+        return cls(keys_from_env())
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def acquire(self) -> str:
+        """Key for the next request attempt (call release() with the outcome)
+        
+        When every key is evicted, the one that comes back first is used.
+        """
+        now = time.time()
+        with self.lock:
+            candidates = [state for state in self.states.values() if not state.evicted(now)]
+            if candidates:
+                state = min(candidates, key=lambda candidate: candidate.score(now))
+            else:
+                state = min(self.states.values(), key=lambda candidate: candidate.evicted_until)
+                logger.warning(f"All {len(self.keys)} API keys are evicted, using {state.label}")
+            state.in_flight += 1
+            state.last_used = now
+            return state.key
+    
+    def available(self, exclude: Optional[str] = None) -> bool:
+        """Whether a key other than exclude is in rotation"""
+        now = time.time()
+        with self.lock:
+            return any(not state.evicted(now) for key, state in self.states.items() if key != exclude)
+    
+    def release(self, key: str, status_code: Optional[int], retry_after: Optional[float] = None):
+        """Record the outcome of a request attempt
+        
+        Args:
+            key: Key returned by acquire()
+            status_code: HTTP status, None when the request failed to connect
+            retry_after: Server's Retry-After in seconds, if any
+        """
+        now = time.time()
+        with self.lock:
+            state = self.states[key]
+            state.in_flight -= 1
+            state.requests += 1
+            if status_code == 429:
+                state.rate_limited += 1
+                state.throttle_streak += 1
+                state.recent_throttles.append(now)
+                cooldown = min(THROTTLE_COOLDOWN_SECONDS * 2 ** (state.throttle_streak - 1), MAX_THROTTLE_COOLDOWN_SECONDS)
+                self._evict(state, max(cooldown, retry_after or 0), "rate limited", now)
+            elif status_code in REJECTED_STATUS:
+                state.rejected += 1
+                self._evict(state, REJECTED_COOLDOWN_SECONDS, f"rejected (HTTP {status_code})", now)
+            elif status_code is not None and status_code < 400:
+                state.successes += 1
+                state.throttle_streak = 0
+    
+    def _evict(self, state: _KeyState, seconds: float, reason: str, now: float):
+        state.evicted_until = now + seconds
+        state.evicted_reason = reason
+        if len(self.keys) > 1:
+            logger.warning(f"API key {state.label} {reason}, out of rotation for {seconds:.0f}s")
+    
+    def record_usage(self, key: str, usage: Optional[Dict]):
+        """Add a response's tokens and reported cost to the key"""
+        usage = usage or {}
+        cost = usage.get("cost") or 0.0
+        with self.lock:
+            state = self.states[key]
+            state.prompt_tokens += usage.get("prompt_tokens") or 0
+            state.completion_tokens += usage.get("completion_tokens") or 0
+            state.cost_usd += cost
+            if state.limit_remaining is not None:
+                state.limit_remaining -= cost
+    
+    def maybe_refresh(self, base_url: str):
+        """Refresh remaining credit of all keys if the last refresh is older than refresh_seconds"""
+        with self.lock:
+            if time.time() < self.next_refresh:
+                return
+            self.next_refresh = time.time() + self.refresh_seconds
+        self.refresh(base_url)
+    
+    def refresh(self, base_url: str):
+        """Fetch each key's remaining credit from OpenRouter's /key endpoint"""
+        for key in self.keys:
+            try:
+                response = requests.get(f"{base_url}/key", headers={"Authorization": f"Bearer {key}"}, timeout=10)
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"Could not refresh API key {mask(key)}: {e}")
+                continue
+            if response.status_code in REJECTED_STATUS:
+                with self.lock:
+                    self.states[key].rejected += 1
+                    self._evict(self.states[key], REJECTED_COOLDOWN_SECONDS, f"rejected (HTTP {response.status_code})", time.time())
+                continue
+            if not response.ok:
+                continue
+            try:
+                data = response.json().get("data") or {}
+            except ValueError:
+                continue
+            with self.lock:
+                remaining = data.get("limit_remaining")
+                self.states[key].limit_remaining = float(remaining) if remaining is not None else None
+    
+    def stats(self) -> List[Dict]:
+        """Usage and health per key (keys masked)"""
+        now = time.time()
+        with self.lock:
+            return [
+                {
+                    "key": state.label,
+                    "requests": state.requests,
+                    "successes": state.successes,
+                    "rate_limited": state.rate_limited,
+                    "rejected": state.rejected,
+                    "in_flight": state.in_flight,
+                    "prompt_tokens": state.prompt_tokens,
+                    "completion_tokens": state.completion_tokens,
+                    "cost_usd": round(state.cost_usd, 6),
+                    "limit_remaining": state.limit_remaining,
+                    "evicted_seconds": round(state.evicted_until - now, 1) if state.evicted_until > now else 0,
+                    "evicted_reason": state.evicted_reason if state.evicted(now) else None
+                }
+                for state in self.states.values()
+            ]
+
+def format_stats(stats: List[Dict]) -> str:
+    """Human-readable usage per key"""
+    lines = [f"{'Key':<17}{'requests':>10}{'429s':>7}{'rejected':>10}{'tokens':>10}{'cost USD':>11}  status"]
+    for row in stats:
+        status = f"evicted {row['evicted_seconds']:.0f}s ({row['evicted_reason']})" if row["evicted_reason"] else "ok"
+        lines.append(
+            f"{row['key']:<17}{row['requests']:>10}{row['rate_limited']:>7}{row['rejected']:>10}"
+            f"{row['prompt_tokens'] + row['completion_tokens']:>10}{row['cost_usd']:>11.4f}  {status}"
+        )
+    return "\n".join(lines)
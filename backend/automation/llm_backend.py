@@ -0,0 +1,156 @@
+"""Interface of the LLM backends the orchestrator talks to
+
+Each entry of GoldenDatasetOrchestrator.models names its backend:
+"openrouter" (OpenRouterClient, the default) or "local" (LocalLLMClient, an
+OpenAI-compatible server such as llama.cpp's llama-server or vLLM). A
+backend covers chat completions (streamed or not), token usage and model
+listing; parsing a response into answer, reasoning and Terraform code is
+shared by all of them.
+"""
+import re
+import logging
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reasoning models (e.g. DeepSeek R1) may inline their chain of thought in the
+# content wrapped in <think> tags instead of using a dedicated response field
+THINK_BLOCK_PATTERN = re.compile(r'<think>(.*?)</think>', re.DOTALL)
+
+class LLMBackend:
+    """Chat completion backend
+    
+    call_llm returns a dict with success, content, reasoning, model, usage
+    (OpenAI format), time_seconds and attempts (ttft_seconds when
+    streaming), or success False with error and time_seconds.
+    """
+    
+    # Name used in GoldenDatasetOrchestrator.models and in log messages
+    name = ""
+    base_url = ""
+    stream = False
+    
+    def call_llm(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 4000
+    ) -> Dict:
+        """Complete a conversation (see the class docstring for the result)"""
+        raise NotImplementedError
+    
+    def list_models(self) -> List[Dict]:
+        """Models served by the backend (OpenAI /models entries: id, name, ...)"""
+        raise NotImplementedError
+    
+    def split_reasoning(self, message: Dict) -> Tuple[str, str]:
+        """Split a response message into final answer and reasoning
+        
+        Uses the provider reasoning fields when present, otherwise falls
+        back to splitting <think> blocks out of the content.
+        
+        Args:
+            message: Message dict from the first response choice
+        
+        Returns:
+            Tuple of (answer, reasoning)
+        """
+        content = message.get("content") or ""
+        reasoning_parts = []
+        
+        provider_reasoning = message.get("reasoning") or message.get("reasoning_content")
+        if provider_reasoning:
+            reasoning_parts.append(provider_reasoning)
+        
+        think_blocks = THINK_BLOCK_PATTERN.findall(content)
+        if think_blocks:
+            reasoning_parts.extend(think_blocks)
+            content = THINK_BLOCK_PATTERN.sub('', content)
+        
+        if '<think>' in content:
+            # Unterminated block (response cut off by max_tokens)
+            content, _, tail = content.partition('<think>')
+            reasoning_parts.append(tail)
+        elif '</think>' in content:
+            # Some providers strip the opening tag
+            head, _, content = content.partition('</think>')
+            reasoning_parts.append(head)
+        
+        reasoning = '\n\n'.join(part.strip() for part in reasoning_parts if part.strip())
+        return content.strip(), reasoning
+    
+    def extract_terraform_code(self, response_text: str) -> Optional[str]:
+        """Extract Terraform code from LLM response
+        
+        Args:
+            response_text: Full LLM response text
+        
+        Returns:
+            Extracted Terraform code or None
+        """
+        # Try to find code blocks
+        import re
+        
+        # Look for ```terraform, ```hcl, or ``` code blocks
+        patterns = [
+            r'```(?:terraform|hcl)\s*\n(.*?)\n```',
+            r'```\s*\n(.*?)\n```'
+        ]
+        
+        for pattern in patterns:
+            matches = re.findall(pattern, response_text, re.DOTALL)
+            if matches:
+                # Return the first substantial match
+                for match in matches:
+                    if 'provider' in match.lower() or 'resource' in match.lower():
+                        return match.strip()
+        
+        # If no code blocks found, look for terraform/provider keywords
+        if 'provider "xenorchestra"' in response_text:
+            # Try to extract from "provider" to end of likely code section
+            lines = response_text.split('\n')
+            code_lines = []
+            in_code = False
+            
+            for line in lines:
+                if 'provider "xenorchestra"' in line or 'terraform {' in line:
+                    in_code = True
+                
+                if in_code:
+                    code_lines.append(line)
+                    
+                    # Stop at common ending patterns
+                    if line.strip() and not line.strip().startswith('#') and \
+                       any(end in line for end in ['If you have', 'Note:', 'Make sure', 'Remember']):
+                        break
+            
+            if code_lines:
+                return '\n'.join(code_lines).strip()
+        
+        return None
+    
+    def extract_questions_asked(self, response_text: str) -> List[str]:
+        """Extract questions asked by LLM from response
+        
+        Args:
+            response_text: Full LLM response text
+        
+        Returns:
+            List of questions found
+        """
+        import re
+        
+        questions = []
+        
+        # Look for lines ending with ?
+        question_pattern = r'([^.!?\n]+\?+)'
+        matches = re.findall(question_pattern, response_text)
+        
+        for match in matches:
+            question = match.strip()
+            # Filter out very short or code-like questions
+            if len(question) > 20 and not question.startswith('```'):
+                questions.append(question)
+        
+        return questions[:10]  # Limit to first 10 questions
@@ -0,0 +1,79 @@
+"""Client for a local OpenAI-compatible server (llama.cpp, vLLM, Ollama)
+
+Uses the same transport as OpenRouterClient (streaming, retries, scheduler
+slots) against LOCAL_LLM_BASE_URL, without OpenRouter's routing and usage
+extensions. Local calls cost nothing, so they are reported with a cost of 0
+instead of counting as unpriced in the ledger.
+
+    llama-server -m qwen2.5-coder-7b-instruct-q4_k_m.gguf --port 8000
+    LOCAL_LLM_MODEL=qwen2.5-coder python run_automation.py --models local
+"""
+import os
+import logging
+from typing import List, Dict, Optional
+
+from .openrouter_client import OpenRouterClient
+from .key_pool import APIKeyPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_BASE_URL = "http://localhost:8000/v1"
+# API runs select a local model as 'local:<model id>'
+LOCAL_MODEL_PREFIX = "local:"
+
+class LocalLLMClient(OpenRouterClient):
+    """Client for a local OpenAI-compatible chat completions endpoint"""
+    
+    name = "Local LLM"
+    
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_retries: int = 1,
+        retry_backoff: float = 0.5,
+        stream: bool = False
+    ):
+        """Create a client
+        
+        Args:
+            base_url: API root (default: LOCAL_LLM_BASE_URL, then
+                http://localhost:8000/v1)
+            api_key: Key if the server requires one (default: LOCAL_LLM_API_KEY)
+            max_retries: Retries for failed requests
+            retry_backoff: Initial delay between retries, doubled each attempt
+            stream: Stream responses, which also measures time to first token
+        """
+        super().__init__(
+            base_url=base_url or os.getenv('LOCAL_LLM_BASE_URL') or DEFAULT_LOCAL_BASE_URL,
+            max_retries=max_retries,
+            retry_backoff=retry_backoff,
+            stream=stream,
+            key_pool=APIKeyPool([api_key or os.getenv('LOCAL_LLM_API_KEY') or "local"])
+        )
+    
+    def build_payload(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Dict:
+        """Plain OpenAI request body (usage in the last chunk when streaming)"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if self.stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+    
+    def call_llm(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 4000
+    ) -> Dict:
+        """Call the local server (see OpenRouterClient.call_llm)"""
+        response = super().call_llm(model, messages, temperature=temperature, max_tokens=max_tokens)
+        if response["success"]:
+            response["usage"] = dict(response["usage"] or {}, cost=0.0)
+        return response
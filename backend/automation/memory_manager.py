@@ -1,10 +1,13 @@
 """Memory manager for maintaining task-specific conversation history"""
 import json
+import gzip
 import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 
+from .diagnostics import format_for_feedback, strip_ansi, truncate_middle
+
 logger = logging.getLogger(__name__)
 
 class ConversationMemory:
@@ -18,6 +21,7 @@ class ConversationMemory:
         self.iteration_count = 0
         
         self.memory_file = self.work_dir / "conversation_history.json"
+        self.reasoning_dir = self.work_dir / "reasoning"
     
     def add_system_message(self, content: str):
         """Add system message to conversation
@@ -55,23 +59,72 @@ class ConversationMemory:
         })
         self._save()
     
-    def add_error_feedback(self, error_type: str, error_message: str, logs: str):
+    def save_reasoning(self, iteration: int, reasoning: str) -> Optional[Path]:
+        """Persist model reasoning as a compressed artifact
+        
+        Reasoning is kept out of the replayed message history so it is not
+        resent with every request or rewritten on every save.
+        
+        Args:
+            iteration: Iteration the reasoning belongs to
+            reasoning: Reasoning text
+            
+        Returns:
+            Path to the artifact, or None if there was nothing to save
+        """
+        if not reasoning:
+            return None
+        
+        try:
+            self.reasoning_dir.mkdir(parents=True, exist_ok=True)
+            reasoning_path = self.reasoning_dir / f"iteration_{iteration:02d}.txt.gz"
+            with gzip.open(reasoning_path, "wt", encoding="utf-8") as f:
+                f.write(reasoning)
+            return reasoning_path
+        except Exception as e:
+            logger.error(f"Failed to save reasoning: {e}")
+            return None
+    
+    def add_error_feedback(
+        self,
+        error_type: str,
+        error_message: str,
+        logs: str,
+        diagnostics: Optional[List[Dict]] = None,
+        unchanged: bool = False
+    ):
         """Add terraform error feedback to conversation
         
         Args:
             error_type: Type of error (init, validate, plan, apply)
             error_message: Error message
-            logs: Relevant log content
+            logs: Relevant log content (used only when no diagnostics were parsed)
+            diagnostics: Compact diagnostic records from the executor
+            unchanged: Whether the code was identical to an earlier failed attempt
         """
         self.iteration_count += 1
         
-        feedback = f"""The Terraform code from your previous response encountered an error during '{error_type}'.
-
-Error Message:
-{error_message}
+        if diagnostics and any(d["severity"] == "error" for d in diagnostics):
+            error_details = f"Diagnostics:\n{format_for_feedback(diagnostics)}"
+        else:
+            error_message = strip_ansi(error_message or "").strip()
+            logs = strip_ansi(logs or "").strip()
+            error_details = f"Error Message:\n{truncate_middle(error_message, 2000)}"
+            if logs and logs != error_message:
+                error_details += f"\n\nRelevant Logs:\n{truncate_middle(logs, 2000)}"
+        
+        if unchanged:
+            intro = (
+                "The Terraform code from your previous response is unchanged (ignoring whitespace) "
+                f"from code you already submitted, which failed during '{error_type}'. "
+                "Terraform was not re-run. You must change the code to fix the error below."
+            )
+        else:
+            intro = f"The Terraform code from your previous response encountered an error during '{error_type}'."
+        
+        feedback = f"""{intro}
 
-Relevant Logs:
-{logs[:2000]}  # Truncate to 2000 chars
+{error_details}
 
 Iteration: {self.iteration_count}
 
@@ -149,6 +202,14 @@ Provide the complete corrected Terraform code."""
             logger.error(f"Failed to load conversation memory: {e}")
             return False
     
+    def restart(self):
+        """Drop the conversation but keep the iteration count
+        
+        Used to escalate out of a conversation stuck on the same error.
+        """
+        self.messages = []
+        self._save()
+    
     def clear(self):
         """Clear conversation history"""
         self.messages = []
@@ -0,0 +1,275 @@
+"""In-process metrics in the Prometheus text format
+
+A small counter/histogram registry (no client library needed) that the
+orchestrator records into and that the API serves on /metrics. The CLI
+prints a summary of the same registry at the end of a run.
+"""
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; LLM calls and applies range from sub-second to minutes
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+ITERATION_BUCKETS = (1, 2, 3, 5, 8, 13, 20)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Registry:
+    """Collection of metrics rendered together"""
+    
+    def __init__(self):
+        self.metrics: Dict[str, "_Metric"] = {}
+        self.lock = threading.Lock()
+    
+    def register(self, metric: "_Metric"):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+    
+    def summary(self) -> List[Dict]:
+        """One row per metric and label set (counters: value; histograms: count, sum, mean, max)"""
+        rows = []
+        for metric in list(self.metrics.values()):
+            rows.extend(metric.summary())
+        return rows
+    
+    def clear(self):
+        """Drop all recorded values (metrics stay registered)"""
+        for metric in list(self.metrics.values()):
+            metric.clear()
+
+REGISTRY = Registry()
+
+class _Metric:
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional[Registry] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], object] = {}
+        self.lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def clear(self):
+        with self.lock:
+            self.values = {}
+    
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = "counter"
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def render(self) -> List[str]:
+        with self.lock:
+            items = sorted(self.values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+            for key, value in items
+        ]
+    
+    def summary(self) -> List[Dict]:
+        with self.lock:
+            items = sorted(self.values.items())
+        return [
+            {"metric": self.name, "type": self.kind, "labels": dict(zip(self.labelnames, key)), "value": value}
+            for key, value in items
+        ]
+
+class Histogram(_Metric):
+    """Distribution of observed values per label set"""
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = None
+    ):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0, "max": value}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][index] += 1
+                    break
+            state["count"] += 1
+            state["sum"] += value
+            state["max"] = max(state["max"], value)
+    
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def render(self) -> List[str]:
+        with self.lock:
+            items = sorted((key, dict(state, buckets=list(state["buckets"]))) for key, state in self.values.items())
+        lines = self._header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["buckets"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+    
+    def summary(self) -> List[Dict]:
+        with self.lock:
+            items = sorted((key, dict(state)) for key, state in self.values.items())
+        return [
+            {
+                "metric": self.name,
+                "type": self.kind,
+                "labels": dict(zip(self.labelnames, key)),
+                "count": state["count"],
+                "sum": state["sum"],
+                "mean": state["sum"] / state["count"],
+                "max": state["max"]
+            }
+            for key, state in items
+        ]
+
+# Pipeline metrics (model = model short name, task = task key such as c1_2)
+LLM_REQUEST_SECONDS = Histogram(
+    "golden_llm_request_seconds", "LLM call latency including retries", ("model", "task")
+)
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "golden_llm_time_to_first_token_seconds", "Time to the first streamed token (streaming calls only)", ("model", "task")
+)
+LLM_REQUESTS = Counter(
+    "golden_llm_requests_total", "LLM calls by outcome", ("model", "task", "status")
+)
+LLM_TOKENS = Counter(
+    "golden_llm_tokens_total", "Tokens sent (prompt, of which cached) and received (completion, of which reasoning)",
+    ("model", "task", "direction")
+)
+LLM_HEDGES = Counter(
+    "golden_llm_hedges_total", "Hedged LLM calls by the request that answered first (primary or hedge)",
+    ("model", "task", "winner")
+)
+LLM_HEDGE_OVERHEAD_TOKENS = Counter(
+    "golden_llm_hedge_overhead_tokens_total", "Tokens billed for the cancelled request of hedged LLM calls (estimated when cut off)",
+    ("model", "task", "direction")
+)
+LLM_HEDGE_OVERHEAD_COST_USD = Counter(
+    "golden_llm_hedge_overhead_cost_usd_total", "Spend in USD on the cancelled request of hedged LLM calls (part of llm_cost_usd)",
+    ("model", "task")
+)
+LLM_COST_USD = Counter(
+    "golden_llm_cost_usd_total", "LLM spend in USD (provider-reported or priced from the model catalog)", ("model", "task")
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "golden_llm_completion_tokens", "Completion tokens per LLM call", ("model", "task"), buckets=TOKEN_BUCKETS
+)
+TERRAFORM_PHASE_SECONDS = Histogram(
+    "golden_terraform_phase_seconds", "Wall time of each Terraform phase", ("model", "task", "phase")
+)
+TERRAFORM_PHASES = Counter(
+    "golden_terraform_phases_total", "Terraform phases run, by outcome", ("model", "task", "phase", "status")
+)
+SCREENSHOT_SECONDS = Histogram(
+    "golden_screenshot_seconds", "Screenshot capture time per task", ("model", "task")
+)
+DATASET_WRITE_SECONDS = Histogram(
+    "golden_dataset_write_seconds", "Dataset entry generation time", ("model", "task")
+)
+TASK_ITERATIONS = Histogram(
+    "golden_task_iterations", "Iterations per finished task", ("model", "task"), buckets=ITERATION_BUCKETS
+)
+TASKS = Counter(
+    "golden_tasks_total", "Finished tasks by outcome", ("model", "task", "status")
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "golden_queue_wait_seconds", "Time blocked waiting on background destroys or host capacity", ("model", "task", "queue")
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "golden_scheduler_wait_seconds", "Time waiting for a scheduler slot or rate-limit token, across runs",
+    ("queue",)
+)
+
+def format_summary(registry: Registry = REGISTRY) -> str:
+    """Human-readable summary of a registry, aggregated over tasks
+    
+    Histograms show count, total, mean and max per model (and phase or
+    queue); counters show totals per model.
+    """
+    aggregated: Dict[Tuple[str, Tuple], Dict] = {}
+    for row in registry.summary():
+        labels = tuple(sorted((k, v) for k, v in row["labels"].items() if k != "task"))
+        entry = aggregated.setdefault((row["metric"], labels), {"type": row["type"], "count": 0, "sum": 0.0, "max": 0.0, "value": 0})
+        if row["type"] == "histogram":
+            entry["count"] += row["count"]
+            entry["sum"] += row["sum"]
+            entry["max"] = max(entry["max"], row["max"])
+        else:
+            entry["value"] += row["value"]
+    
+    rows = []
+    for (name, labels), entry in sorted(aggregated.items()):
+        label_text = ",".join(f"{k}={v}" for k, v in labels)
+        title = name.replace("golden_", "") + (f"{{{label_text}}}" if label_text else "")
+        rows.append((title, entry))
+    width = max([len(title) for title, _ in rows] + [len("Metric")]) + 2
+    
+    lines = [f"{'Metric':<{width}}{'count':>9}{'total':>12}{'mean':>10}{'max':>10}"]
+    for title, entry in rows:
+        if entry["type"] == "histogram":
+            mean = entry["sum"] / entry["count"] if entry["count"] else 0.0
+            lines.append(f"{title:<{width}}{entry['count']:>9}{entry['sum']:>12.2f}{mean:>10.2f}{entry['max']:>10.2f}")
+        else:
+            lines.append(f"{title:<{width}}{_format_number(entry['value']):>9}")
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+"""Per-run VM name namespacing
+
+Concurrent runs share one Xen Orchestra host, so VM names such as `app-01`
+would collide. A run's namespace prefixes every VM name_label in the code
+before it reaches Terraform and strips the prefix again from anything shown
+to the model or recorded in the dataset, so the namespace stays invisible.
+"""
+import re
+import json
+import uuid
+import logging
+from typing import Dict, Optional
+
+from . import hcl_scanner
+
+logger = logging.getLogger(__name__)
+
+# Blocks whose name_label identifies a VM on the host
+VM_BLOCKS = (("resource", "xenorchestra_vm"), ("data", "xenorchestra_vm"))
+
+class VMNamespace:
+    """Prefix VM names with a run-specific tag"""
+    
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        # Only where a qualified name starts, not inside words like 'host1-web'
+        self.pattern = re.compile(r'(?<![\w-])' + re.escape(prefix))
+    
+    @classmethod
+    def for_run(cls, run_id: str) -> "VMNamespace":
+        """Namespace for a run, e.g. 'r1a2b3c4d-' for a UUID run id
+        
+        Args:
+            run_id: Run identifier
+        
+        Returns:
+            VMNamespace
+        """
+        tag = re.sub(r'[^a-z0-9]', '', run_id.lower())[:8]
+        return cls(f"r{tag}-")
+    
+    @classmethod
+    def for_trial(cls, trial: int, run: Optional["VMNamespace"] = None) -> "VMNamespace":
+        """Namespace for one pass@k trial, nested in the run's, e.g. 'r1a2b3c4d-t2-'
+        
+        Without a run namespace the trial gets a random run tag, so the
+        prefix stays distinctive enough to strip.
+        
+        Args:
+            trial: Trial number
+            run: Namespace of the run, if any
+        
+        Returns:
+            VMNamespace
+        """
+        run = run or cls.for_run(uuid.uuid4().hex)
+        return cls(f"{run.prefix}t{trial}-")
+    
+    def qualify(self, name: str) -> str:
+        """Host-level name of a VM"""
+        return name if name.startswith(self.prefix) else f"{self.prefix}{name}"
+    
+    def strip(self, text: str) -> str:
+        """Remove the namespace from text (names, logs, error messages)
+        
+        Only the prefix at the start of a qualified name is removed; the same
+        characters inside other words are left alone.
+        """
+        return self.pattern.sub("", text)
+    
+    def strip_result(self, result: Dict) -> Dict:
+        """Copy of a phase result with the namespace removed from all strings"""
+        return json.loads(self.strip(json.dumps(result)))
+    
+    def apply(self, code: str) -> str:
+        """Prefix the name_label of every VM resource and data source
+        
+        Only quoted name_label values are rewritten; the prefix goes at the
+        start of the string, so templates like "web-0${count.index + 1}" keep
+        working. Code that cannot be scanned is returned unchanged and left to
+        validation to report.
+        
+        Args:
+            code: Terraform configuration as written by the model
+        
+        Returns:
+            Configuration with host-level VM names
+        """
+        try:
+            root = hcl_scanner.parse(code)
+        except hcl_scanner.HCLSyntaxError:
+            return code
+        
+        lines = code.split('\n')
+        for block_type, label in VM_BLOCKS:
+            for block in hcl_scanner.find_blocks(root, block_type, label):
+                name_label = block.attributes.get("name_label")
+                if not name_label or not name_label.expression.startswith('"'):
+                    continue
+                
+                index = name_label.line - 1
+                lines[index] = re.sub(
+                    r'(\bname_label\s*=\s*")(?!' + re.escape(self.prefix) + ')',
+                    lambda m: m.group(1) + self.prefix,
+                    lines[index],
+                    count=1
+                )
+        
+        return '\n'.join(lines)
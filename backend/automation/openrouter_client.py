@@ -2,28 +2,99 @@
 import os
 import requests
 import json
+import math
 import time
-from typing import List, Dict, Optional
+import queue
 import logging
+import threading
+import contextvars
+from collections import deque
+from typing import List, Dict, Optional, Tuple
+
+from . import tracing
+from . import scheduler as scheduling
+from .llm_backend import LLMBackend
+from .key_pool import APIKeyPool, REJECTED_STATUS, keys_from_env, mask
 
 logger = logging.getLogger(__name__)
 
-class OpenRouterClient:
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Rate limits and transient upstream failures are retried with backoff
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+# Hedged requests go out through OpenRouter's lowest-latency provider
+DEFAULT_HEDGE_ROUTE = {"provider": {"sort": "latency"}}
+# Successful call latencies kept per model for the hedging threshold
+LATENCY_WINDOW = 50
+# Rough size of a token, to estimate what a cancelled hedge request generated
+CHARS_PER_TOKEN = 4
+
+class _Cancelled(Exception):
+    """Raised in the losing request of a hedged call"""
+
+class OpenRouterClient(LLMBackend):
     """Client for interacting with OpenRouter API"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv('OPENROUTER_API_KEY')
-        if not self.api_key:
-            raise ValueError("OpenRouter API key is required")
+    name = "OpenRouter"
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+        stream: bool = False,
+        hedge: bool = False,
+        hedge_quantile: float = 0.9,
+        hedge_min_samples: int = 10,
+        hedge_route: Optional[Dict] = None,
+        key_pool: Optional[APIKeyPool] = None
+    ):
+        """Create a client
         
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        Args:
+            api_key: OpenRouter API key (default: the keys in OPENROUTER_API_KEYS
+                and OPENROUTER_API_KEY)
+            base_url: OpenAI-compatible API root (default: OPENROUTER_BASE_URL,
+                then https://openrouter.ai/api/v1)
+            max_retries: Retries for rate-limited or failed requests
+            retry_backoff: Initial delay between retries, doubled each attempt
+            stream: Stream responses (server-sent events), which also measures
+                time to first token
+            hedge: Send a duplicate request when a call outlives the model's
+                rolling hedge_quantile latency; the first response wins and
+                the other is cancelled. Hedged calls are streamed so the loser
+                can be dropped mid-generation.
+            hedge_quantile: Latency quantile after which to hedge
+            hedge_min_samples: Calls per model needed before hedging starts
+            hedge_route: Payload fields for the duplicate request
+                (default: DEFAULT_HEDGE_ROUTE)
+            key_pool: Keys to rotate between, possibly shared with other
+                clients (default: a pool of api_key or the environment's keys)
+        """
+        self.key_pool = key_pool or APIKeyPool([api_key] if api_key else keys_from_env())
+        self.api_key = self.key_pool.keys[0]
+        
+        self.base_url = (base_url or os.getenv('OPENROUTER_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.completions_url = f"{self.base_url}/chat/completions"
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stream = stream
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_route = DEFAULT_HEDGE_ROUTE if hedge_route is None else hedge_route
+        self.latencies: Dict[str, deque] = {}
+        self.latency_lock = threading.Lock()
+        # Authorization is added per request with the key picked from the pool
         self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://github.com/golden-dataset",
             "X-Title": "Golden Dataset Generator"
         }
     
+    @tracing.traced("llm.call", category="llm")
     def call_llm(
         self,
         model: str,
@@ -40,41 +111,64 @@ class OpenRouterClient:
             max_tokens: Maximum tokens to generate
             
         Returns:
-            Response dict with content, usage, etc.
+            Response dict with content, usage, etc. (ttft_seconds when streaming,
+            hedge when hedging is enabled)
         """
         start_time = time.time()
         
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
+        payload = self.build_payload(model, messages, temperature, max_tokens)
+        span = tracing.current()
+        span.set(model=model, messages=len(messages), temperature=temperature, stream=payload.get("stream", False))
         
         try:
-            logger.info(f"Calling OpenRouter API with model: {model}")
-            response = requests.post(
-                self.base_url,
-                headers=self.headers,
-                json=payload,
-                timeout=120
-            )
-            response.raise_for_status()
-            
-            result = response.json()
+            logger.info(f"Calling {self.name} API with model: {model}")
+            # The model's request slot is held until the (streamed) response is read
+            if len(self.key_pool) > 1:
+                self.key_pool.maybe_refresh(self.base_url)
+            hedge = None
+            with scheduling.llm_slot(model) as waited:
+                if self.hedge:
+                    (result, ttft, attempts, key), hedge = self._hedged_request(payload, start_time)
+                else:
+                    result, ttft, attempts, key = self._request(payload, start_time)
+            if waited:
+                span.set(slot_wait_seconds=round(waited, 3))
             elapsed = time.time() - start_time
+            self._record_latency(model, elapsed - waited)
             
-            return {
+            answer, reasoning = self.split_reasoning(result["choices"][0]["message"])
+            usage = result.get("usage") or {}
+            self.key_pool.record_usage(key, usage)
+            span.set(
+                status="success",
+                attempts=attempts,
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+                ttft_seconds=ttft,
+                content_bytes=len(answer),
+                reasoning_bytes=len(reasoning)
+            )
+            if hedge:
+                span.set(hedge_fired=hedge["fired"], hedge_winner=hedge["winner"])
+            
+            response = {
                 "success": True,
-                "content": result["choices"][0]["message"]["content"],
+                "content": answer,
+                "reasoning": reasoning,
                 "model": result["model"],
                 "usage": result.get("usage", {}),
                 "time_seconds": round(elapsed, 2),
+                "ttft_seconds": round(ttft, 3) if ttft is not None else None,
+                "attempts": attempts,
                 "raw_response": result
             }
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"OpenRouter API error: {str(e)}")
+            if hedge:
+                response["hedge"] = hedge
+            return response
+        
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            logger.error(f"{self.name} API error: {str(e)}")
+            span.set(status="failed", error=str(e))
             elapsed = time.time() - start_time
             return {
                 "success": False,
@@ -82,77 +176,292 @@ class OpenRouterClient:
                 "time_seconds": round(elapsed, 2)
             }
     
-    def extract_terraform_code(self, response_text: str) -> Optional[str]:
-        """Extract Terraform code from LLM response
+    def build_payload(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Dict:
+        """Chat completion request body"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            # OpenRouter adds the charged cost and cached/reasoning token counts to usage
+            "usage": {"include": True}
+        }
+        if self.stream or self.hedge:
+            payload["stream"] = True
+        return payload
+    
+    def list_models(self) -> List[Dict]:
+        """Models listed by the API's /models endpoint"""
+        response = requests.get(
+            f"{self.base_url}/models",
+            headers=dict(self.headers, Authorization=f"Bearer {self.api_key}"),
+            timeout=10
+        )
+        response.raise_for_status()
+        return response.json().get("data", [])
+    
+    def _request(
+        self,
+        payload: Dict,
+        start_time: float,
+        cancel: Optional[threading.Event] = None,
+        progress: Optional[Dict] = None
+    ) -> Tuple[Dict, Optional[float], int, str]:
+        """Send a completion request and read the whole response
         
         Args:
-            response_text: Full LLM response text
-            
+            payload: Request body
+            start_time: When the call started (for time to first token)
+            cancel: Event that aborts the request between retries and stream chunks
+            progress: Updated with the key in use, characters streamed so far
+                and the usage once reported (see _hedged_request)
+        
+        Returns:
+            Tuple of (completion, seconds to first token or None, attempts made,
+            API key of the last attempt)
+        """
+        response, attempts, key = self._post_with_retries(payload, cancel)
+        if progress is not None:
+            progress["key"] = key
+        response.raise_for_status()
+        
+        if payload.get("stream"):
+            result, ttft = self._read_stream(response, start_time, cancel, progress)
+            return result, ttft, attempts, key
+        return response.json(), None, attempts, key
+    
+    def hedge_threshold(self, model: str) -> Optional[float]:
+        """Seconds after which a call to the model is hedged, None until enough calls were seen"""
+        with self.latency_lock:
+            samples = sorted(self.latencies.get(model, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        # Nearest-rank quantile
+        return samples[max(0, math.ceil(self.hedge_quantile * len(samples)) - 1)]
+    
+    def _record_latency(self, model: str, seconds: float):
+        with self.latency_lock:
+            self.latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+    
+    def _hedged_request(self, payload: Dict, start_time: float) -> Tuple[Tuple[Dict, Optional[float], int, str], Dict]:
+        """Race the request against a duplicate sent once it outlives the hedging threshold
+        
+        The first successful response wins; the other request is cancelled
+        (its stream is closed). When the first to finish fails, the other
+        one is awaited.
+        
+        The cancelled request is still billed for its prompt and whatever it
+        generated. Its usage (reported if it finished, otherwise estimated
+        from the winner's prompt tokens and the characters it streamed) is
+        added to its key and returned as the hedge overhead.
+        
         Returns:
-            Extracted Terraform code or None
+            Tuple of (_request result of the winner, hedge dict with
+            threshold_seconds, fired, winner: 'primary' or 'hedge', and
+            overhead: usage of the cancelled request or None)
         """
-        # Try to find code blocks
-        import re
-        
-        # Look for ```terraform, ```hcl, or ``` code blocks
-        patterns = [
-            r'```(?:terraform|hcl)\s*\n(.*?)\n```',
-            r'```\s*\n(.*?)\n```'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, response_text, re.DOTALL)
-            if matches:
-                # Return the first substantial match
-                for match in matches:
-                    if 'provider' in match.lower() or 'resource' in match.lower():
-                        return match.strip()
-        
-        # If no code blocks found, look for terraform/provider keywords
-        if 'provider "xenorchestra"' in response_text:
-            # Try to extract from "provider" to end of likely code section
-            lines = response_text.split('\n')
-            code_lines = []
-            in_code = False
+        threshold = self.hedge_threshold(payload["model"])
+        if threshold is None:
+            return self._request(payload, start_time), {
+                "threshold_seconds": None, "fired": False, "winner": "primary", "overhead": None
+            }
+        
+        outcomes: queue.Queue = queue.Queue()
+        cancel = {"primary": threading.Event(), "hedge": threading.Event()}
+        progress: Dict[str, Dict] = {"primary": {}, "hedge": {}}
+        
+        def attempt(name: str, attempt_payload: Dict):
+            try:
+                with tracing.span("llm.attempt", category="llm", route=name):
+                    outcomes.put((name, self._request(attempt_payload, start_time, cancel[name], progress[name]), None))
+            except Exception as e:
+                if not isinstance(e, _Cancelled):
+                    progress[name]["failed"] = True
+                outcomes.put((name, None, e))
+        
+        def launch(name: str, attempt_payload: Dict):
+            # Copy the context so the attempt keeps the trace and scheduler of the call
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run, args=(attempt, name, attempt_payload), name=f"llm-{name}", daemon=True
+            ).start()
+        
+        launch("primary", payload)
+        try:
+            name, result, error = outcomes.get(timeout=threshold)
+            fired = False
+        except queue.Empty:
+            logger.info(f"No response after {threshold:.1f}s (p{self.hedge_quantile * 100:.0f}), sending a hedged request")
+            launch("hedge", dict(payload, **self.hedge_route))
+            fired = True
+            name, result, error = outcomes.get()
+            if error is not None:
+                logger.warning(f"{name.capitalize()} request failed ({error}), waiting for the other one")
+                name, result, error = outcomes.get()
+        
+        for other, event in cancel.items():
+            if other != name:
+                event.set()
+        if error is not None:
+            raise error
+        overhead = None
+        if fired:
+            logger.info(f"Hedged call won by the {name} request")
+            loser = "hedge" if name == "primary" else "primary"
+            overhead = self._hedge_overhead(progress[loser], result[0].get("usage") or {})
+        return result, {"threshold_seconds": round(threshold, 2), "fired": fired, "winner": name, "overhead": overhead}
+    
+    def _hedge_overhead(self, progress: Dict, winner_usage: Dict) -> Optional[Dict]:
+        """Usage of the losing request of a hedged call (None if it failed and is not billed)"""
+        if progress.get("failed"):
+            return None
+        if progress.get("usage"):
+            usage = dict(progress["usage"], estimated=False)
+        else:
+            # Cancelled mid-stream: the prompt was processed, the rest is what it streamed
+            usage = {
+                "prompt_tokens": winner_usage.get("prompt_tokens") or 0,
+                "completion_tokens": math.ceil(progress.get("chars", 0) / CHARS_PER_TOKEN),
+                "estimated": True
+            }
+        if progress.get("key"):
+            self.key_pool.record_usage(progress["key"], usage)
+        return usage
+    
+    def _post_with_retries(
+        self,
+        payload: Dict,
+        cancel: Optional[threading.Event] = None
+    ) -> Tuple[requests.Response, int, str]:
+        """POST a completion request, retrying 429/5xx responses and connection errors
+        
+        A read timeout is not retried: the server may still be generating,
+        and another 120s attempt would only double the wait (a hedged call
+        covers slow responses instead). Each attempt takes a key from the pool. A throttled or rejected key is
+        retried right away with another key while one is in rotation;
+        otherwise waits for the server's Retry-After when given, or backs off
+        exponentially.
+        
+        Returns:
+            Tuple of (last response, attempts made, API key of the last attempt)
+        
+        Raises:
+            requests.exceptions.RequestException: When the last attempt fails to
+                connect, or a response does not arrive in time
+        """
+        attempt = 0
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise _Cancelled()
+            attempt += 1
+            scheduling.throttle(payload["model"])
+            key = self.key_pool.acquire()
+            try:
+                with tracing.span("llm.http", category="llm", attempt=attempt, api_key=mask(key)) as span:
+                    response = requests.post(
+                        self.completions_url,
+                        headers=dict(self.headers, Authorization=f"Bearer {key}"),
+                        json=payload,
+                        timeout=120,
+                        stream=bool(payload.get("stream"))
+                    )
+                    span.set(status_code=response.status_code)
+            except requests.exceptions.RequestException as e:
+                self.key_pool.release(key, None)
+                # ConnectTimeout is a ConnectionError; ReadTimeout is not
+                if not isinstance(e, requests.exceptions.ConnectionError) or attempt > self.max_retries:
+                    raise
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                logger.warning(f"{self.name} request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
             
-            for line in lines:
-                if 'provider "xenorchestra"' in line or 'terraform {' in line:
-                    in_code = True
-                
-                if in_code:
-                    code_lines.append(line)
-                    
-                    # Stop at common ending patterns
-                    if line.strip() and not line.strip().startswith('#') and \
-                       any(end in line for end in ['If you have', 'Note:', 'Make sure', 'Remember']):
-                        break
+            retry_after = None
+            try:
+                retry_after = float(response.headers.get("Retry-After") or "")
+            except ValueError:
+                pass
+            self.key_pool.release(key, response.status_code, retry_after)
             
-            if code_lines:
-                return '\n'.join(code_lines).strip()
-        
-        return None
+            # Another key can take over from a throttled or rejected one right away
+            rotate = response.status_code in (429,) + REJECTED_STATUS and self.key_pool.available(exclude=key)
+            if attempt > self.max_retries or (response.status_code not in RETRYABLE_STATUS and not rotate):
+                return response, attempt, key
+            if rotate:
+                logger.warning(f"{self.name} returned HTTP {response.status_code} for key {mask(key)}, retrying with another key")
+                response.close()
+                continue
+            
+            delay = retry_after if retry_after is not None else self.retry_backoff * 2 ** (attempt - 1)
+            logger.warning(f"{self.name} returned HTTP {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
     
-    def extract_questions_asked(self, response_text: str) -> List[str]:
-        """Extract questions asked by LLM from response
+    def _read_stream(
+        self,
+        response: requests.Response,
+        start_time: float,
+        cancel: Optional[threading.Event] = None,
+        progress: Optional[Dict] = None
+    ) -> Tuple[Dict, Optional[float]]:
+        """Assemble a streamed (server-sent events) completion
         
         Args:
-            response_text: Full LLM response text
-            
+            response: Streaming response
+            start_time: When the request was started
+            cancel: Event that closes the stream (checked on every line)
+            progress: Updated with the characters received and the usage
+        
         Returns:
-            List of questions found
-        """
-        import re
+            Tuple of (completion in the non-streaming format, seconds to the
+            first content or reasoning token)
         
-        questions = []
+        Raises:
+            ValueError: When the stream reports an error or ends without data
+        """
+        content_parts = []
+        reasoning_parts = []
+        result = {"model": None, "usage": {}}
+        ttft = None
         
-        # Look for lines ending with ?
-        question_pattern = r'([^.!?\n]+\?+)'
-        matches = re.findall(question_pattern, response_text)
+        # text/event-stream comes without a charset, so requests would guess
+        # ISO-8859-1; the body is UTF-8 (a newline byte never splits a character)
+        for raw_line in response.iter_lines():
+            if cancel is not None and cancel.is_set():
+                response.close()
+                raise _Cancelled()
+            line = raw_line.decode("utf-8")
+            # Comments (": OPENROUTER PROCESSING") keep the connection alive
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            
+            chunk = json.loads(data)
+            if "error" in chunk:
+                raise ValueError(f"Stream error: {chunk['error'].get('message', chunk['error'])}")
+            result["model"] = chunk.get("model") or result["model"]
+            if chunk.get("usage"):
+                result["usage"] = chunk["usage"]
+                if progress is not None:
+                    progress["usage"] = chunk["usage"]
+            
+            for choice in chunk.get("choices") or []:
+                delta = choice.get("delta") or {}
+                text = delta.get("content") or ""
+                reasoning = delta.get("reasoning") or delta.get("reasoning_content") or ""
+                if (text or reasoning) and ttft is None:
+                    ttft = time.time() - start_time
+                if progress is not None:
+                    progress["chars"] = progress.get("chars", 0) + len(text) + len(reasoning)
+                content_parts.append(text)
+                reasoning_parts.append(reasoning)
         
-        for match in matches:
-            question = match.strip()
-            # Filter out very short or code-like questions
-            if len(question) > 20 and not question.startswith('```'):
-                questions.append(question)
+        if result["model"] is None:
+            raise ValueError("Stream ended without any completion data")
         
-        return questions[:10]  # Limit to first 10 questions
+        message = {"role": "assistant", "content": "".join(content_parts)}
+        if any(reasoning_parts):
+            message["reasoning"] = "".join(reasoning_parts)
+        result["choices"] = [{"index": 0, "message": message}]
+        return result, ttft
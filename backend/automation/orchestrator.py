@@ -1,28 +1,58 @@
 """Main orchestrator for golden dataset generation"""
 import os
+import time
 import logging
 import asyncio
+import copy
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 import shutil
 
-from .openrouter_client import OpenRouterClient
+from .openrouter_client import OpenRouterClient, DEFAULT_BASE_URL
+from .local_llm_client import LocalLLMClient
+from .llm_backend import LLMBackend
+from .key_pool import APIKeyPool, keys_from_env
 from .terraform_executor import TerraformExecutor
 from .xen_screenshot import XenScreenshot
 from .memory_manager import ConversationMemory
 from .dataset_generator import DatasetGenerator
+from .phase_cache import PhaseResultCache
+from .error_tracker import ErrorSignatureTracker
+from .preflight import PreflightValidator
+from .fixtures import FixtureProvisioner, task_manages_fixture
+from .reaper import DestroyReaper, ResourceLease, vm_names_from_code
+from .capacity import HostCapacity, estimate_planned_vms
+from .scheduler import Scheduler
+from .namespace import VMNamespace
+from . import planner
+from . import metrics
+from . import tracing
+from . import timeline as iteration_timeline
+from . import trials as trial_stats
+from .profiler import SamplingProfiler, DEFAULT_INTERVAL
+from .cost import CostLedger, ModelCatalog
 from .task_definitions import (
     TaskDefinition,
     get_task,
     get_all_tasks,
     build_full_prompt,
     PLATFORM_CONTEXT,
+    PROVIDER_VERSION,
     TASK_ORDER
 )
 
 logger = logging.getLogger(__name__)
 
+# Terraform phases run for each generated configuration, in order
+TERRAFORM_PHASES = ("init", "validate", "plan", "apply")
+# Phases best-of-N candidates run in their scratch workspaces
+CANDIDATE_PHASES = ("init", "validate", "plan")
+
 class GoldenDatasetOrchestrator:
     """Main orchestrator for automating golden dataset generation"""
     
@@ -30,83 +60,271 @@ class GoldenDatasetOrchestrator:
         self,
         base_dir: Path = Path("/app/golden_dataset"),
         max_iterations: int = 20,
-        openrouter_api_key: Optional[str] = None
+        openrouter_api_key: Optional[str] = None,
+        key_pool: Optional[APIKeyPool] = None,
+        backends: Optional[Dict[str, LLMBackend]] = None,
+        repeat_error_limit: int = 3,
+        repeat_error_policies: Optional[List[str]] = None,
+        temperature: float = 0.7,
+        escalation_temperature: float = 1.0,
+        use_fixtures: bool = False,
+        run_id: Optional[str] = None,
+        capacity: Optional[HostCapacity] = None,
+        scheduler: Optional[Scheduler] = None,
+        terraform_factory: Optional[Callable[[Path], TerraformExecutor]] = None,
+        inter_task_delay: float = 2.0,
+        stream_llm: bool = False,
+        hedge_llm: bool = False,
+        trace: bool = False,
+        profile: bool = False,
+        profile_interval: float = DEFAULT_INTERVAL,
+        budget_usd: Optional[float] = None,
+        best_of: int = 1,
+        trials: int = 1
     ):
         self.base_dir = Path(base_dir)
         self.max_iterations = max_iterations
         
+        # Concurrent runs get their own workspace root and VM name prefix
+        self.run_id = run_id
+        self.run_dir = self.base_dir / "runs" / run_id if run_id else self.base_dir
+        self.namespace = VMNamespace.for_run(run_id) if run_id else None
+        
+        # Repeated-error handling (see ErrorSignatureTracker)
+        self.repeat_error_limit = repeat_error_limit
+        self.repeat_error_policies = repeat_error_policies
+        self.temperature = temperature
+        self.escalation_temperature = escalation_temperature
+        
+        # Executor per task workspace (benchmarks substitute an in-process stub)
+        self.terraform_factory = terraform_factory or TerraformExecutor
+        self.inter_task_delay = inter_task_delay
+        
+        # Write a trace of each run_all_tasks call (see tracing)
+        self.trace = trace
+        self.trace_path: Optional[Path] = None
+        
+        # Sample the process's stacks during run_all_tasks (see profiler)
+        self.profile = profile
+        self.profile_interval = profile_interval
+        self.profile_paths: Optional[Dict[str, str]] = None
+        
         # Initialize clients
-        self.openrouter = OpenRouterClient(api_key=openrouter_api_key)
-        self.xen_screenshot = XenScreenshot()
+        # Streaming also records time to first token (see metrics); hedging
+        # duplicates calls slower than the model's rolling p90 latency.
+        # Requests rotate over key_pool (or the keys in the environment).
+        # Without any key only models on other backends can run.
+        self.openrouter: Optional[OpenRouterClient] = None
+        if key_pool or openrouter_api_key or keys_from_env():
+            self.openrouter = OpenRouterClient(
+                api_key=openrouter_api_key, stream=stream_llm, hedge=hedge_llm, key_pool=key_pool
+            )
+        # Other backends by name, selected per model ("backend" in self.models)
+        self.backends: Dict[str, LLMBackend] = {"local": LocalLLMClient(stream=stream_llm), **(backends or {})}
+        
+        # Token usage and spend of the run; no new iterations start once
+        # budget_usd is used up (see cost)
+        self.catalog = ModelCatalog(
+            self.base_dir / "cache" / "openrouter_models.json",
+            self.openrouter.base_url if self.openrouter else os.getenv('OPENROUTER_BASE_URL') or DEFAULT_BASE_URL
+        )
+        self.ledger = CostLedger(self.catalog, budget_usd=budget_usd)
+        
+        # Completions sampled per iteration; candidates are pre-flighted in
+        # parallel and the first to pass validate and plan is applied
+        self.best_of = max(1, best_of)
+        
+        # Independent trials per (model, task) for pass@k; they run
+        # concurrently, each in its own workspace and VM namespace
+        self.trials = max(1, trials)
+        self.trial: Optional[int] = None
+        self.xen_screenshot = XenScreenshot(base_dir=self.base_dir, run_id=run_id)
+        self.preflight = PreflightValidator(
+            self.base_dir / "cache" / f"xenorchestra_{PROVIDER_VERSION}_schema.json"
+        )
+        
+        # Applies reserve RAM/vCPUs on the host and queue until their VMs fit
+        # (pass a shared controller when several runs use the same host)
+        self.capacity = capacity or HostCapacity()
+        
+        # LLM request slots, provider rate limits and Terraform slots, shared
+        # fairly between runs that use the same scheduler
+        self.scheduler = scheduler or Scheduler.from_env()
+        
+        # Provision task preconditions directly instead of relying on earlier tasks
+        self.fixtures = None
+        if use_fixtures:
+            self.fixtures = FixtureProvisioner(
+                self.run_dir / "fixtures",
+                capacity=self.capacity,
+                namespace=self.namespace,
+                terraform_factory=self.terraform_factory
+            )
+        
+        # Cleanup destroys run in the background; applies wait on their leases
+        self.reaper = DestroyReaper(capacity=self.capacity)
+        
+        # Set by run_all_tasks (see planner.plan_execution)
+        self.execution_plan: Optional[Dict] = None
         
         # Model configurations
         self.models = {
             "deepseek_r1": {
                 "full_name": "DeepSeek R1",
                 "api_id": "deepseek/deepseek-r1",
-                "short_name": "deepseek_r1"
+                "short_name": "deepseek_r1",
+                "backend": "openrouter"
             },
             "google_gemini_3_pro": {
                 "full_name": "Google Gemini 3 Pro",
                 "api_id": "google/gemini-pro-1.5",
-                "short_name": "google_gemini_3_pro"
+                "short_name": "google_gemini_3_pro",
+                "backend": "openrouter"
             }
         }
+        # Model served by a local OpenAI-compatible server (see LocalLLMClient)
+        local_model = os.getenv('LOCAL_LLM_MODEL')
+        if local_model:
+            self.models["local"] = {
+                "full_name": f"{local_model} (local)",
+                "api_id": local_model,
+                "short_name": "local",
+                "backend": "local"
+            }
         
         logger.info(f"Orchestrator initialized with base_dir: {self.base_dir}")
     
-    def run_all_tasks(self, models: Optional[List[str]] = None, tasks: Optional[List[str]] = None):
+    def llm_backend(self, model_config: Dict) -> LLMBackend:
+        """Backend serving a model (model_config["backend"], default openrouter)"""
+        name = model_config.get("backend", "openrouter")
+        if name == "openrouter":
+            if self.openrouter is None:
+                raise ValueError("OpenRouter API key is required")
+            return self.openrouter
+        if name not in self.backends:
+            raise ValueError(f"Unknown LLM backend '{name}' (available: openrouter, {', '.join(sorted(self.backends))})")
+        return self.backends[name]
+    
+    def run_all_tasks(
+        self,
+        models: Optional[List[str]] = None,
+        tasks: Optional[List[str]] = None,
+        ordering: str = planner.AUTO
+    ):
         """Run all tasks for specified models
         
         Args:
             models: List of model keys to run (default: all models)
             tasks: List of task IDs to run (default: all tasks in order)
+            ordering: 'model_major', 'task_major' (requires fixtures) or 'auto'
+                to pick whichever needs fewer applies and destroys
         """
-        models_to_run = models or list(self.models.keys())
-        tasks_to_run = tasks or TASK_ORDER
+        models_to_run = []
+        for model_key in models or list(self.models.keys()):
+            if model_key not in self.models:
+                logger.error(f"Unknown model: {model_key}")
+                continue
+            try:
+                self.llm_backend(self.models[model_key])
+            except ValueError as e:
+                logger.error(f"Skipping model {model_key}: {e}")
+                continue
+            models_to_run.append(model_key)
+        
+        tasks_to_run = []
+        for task_id in tasks or TASK_ORDER:
+            if not get_task(task_id):
+                logger.error(f"Unknown task: {task_id}")
+                continue
+            tasks_to_run.append(task_id)
         
         logger.info(f"Starting golden dataset generation")
         logger.info(f"Models: {models_to_run}")
         logger.info(f"Tasks: {tasks_to_run}")
         
-        results = {}
+        self.execution_plan = planner.plan_execution(
+            models_to_run,
+            tasks_to_run,
+            ordering=ordering,
+            use_fixtures=self.fixtures is not None
+        )
+        chosen = self.execution_plan["estimates"][self.execution_plan["ordering"]]
+        logger.info(
+            f"Ordering: {self.execution_plan['ordering']} "
+            f"(~{chosen['applies']} applies, ~{chosen['destroys']} destroys; "
+            f"saves {self.execution_plan['saving']['applies']} applies and "
+            f"{self.execution_plan['saving']['destroys']} destroys vs model-major)"
+        )
         
-        for model_key in models_to_run:
-            if model_key not in self.models:
-                logger.error(f"Unknown model: {model_key}")
-                continue
-            
-            logger.info(f"\n{'='*80}")
-            logger.info(f"Starting tasks for model: {self.models[model_key]['full_name']}")
-            logger.info(f"{'='*80}\n")
-            
-            model_results = {}
+        if self.trials > 1:
+            logger.info(f"Trials: {self.trials} per task (pass@k)")
+        
+        with self._run_trace(models_to_run, tasks_to_run), self._run_profile(), \
+                self.scheduler.activate(self.run_id or "default"), \
+                tracing.span("run", run_id=self.run_id, ordering=self.execution_plan["ordering"]):
+            results = {model_key: {} for model_key in models_to_run}
+            # One runner per trial, kept across tasks so each trial builds on its own earlier tasks
+            trial_runners = [self._trial_runner(trial) for trial in range(1, self.trials + 1)] if self.trials > 1 else []
+            current_model = None
             
-            for task_id in tasks_to_run:
+            for model_key, task_id in self.execution_plan["schedule"]:
+                if model_key != current_model and self.execution_plan["ordering"] == planner.MODEL_MAJOR:
+                    logger.info(f"\n{'='*80}")
+                    logger.info(f"Starting tasks for model: {self.models[model_key]['full_name']}")
+                    logger.info(f"{'='*80}\n")
+                current_model = model_key
+                
                 task = get_task(task_id)
-                if not task:
-                    logger.error(f"Unknown task: {task_id}")
+                
+                if self.ledger.exhausted:
+                    logger.warning(f"Budget exhausted, skipping {task_id} ({self.models[model_key]['full_name']})")
+                    results[model_key][task_id] = {"success": False, "error": "Budget exhausted", "iteration": 0}
                     continue
                 
                 logger.info(f"\n{'='*60}")
-                logger.info(f"Task: {task.task_id} - {task.task_description}")
+                logger.info(f"Task: {task.task_id} - {task.task_description} ({self.models[model_key]['full_name']})")
                 logger.info(f"{'='*60}\n")
                 
                 # Run the task
-                task_result = self.run_single_task(task, model_key)
-                model_results[task_id] = task_result
+                with tracing.span("task", model=self.models[model_key]["short_name"], task=task_id) as task_span:
+                    if trial_runners:
+                        task_result = self._run_trials(trial_runners, task, model_key)
+                        task_span.set(success=task_result["success"], passed=task_result["passed"], trials=task_result["trials"])
+                    else:
+                        task_result = self.run_single_task(task, model_key)
+                        self._record_task_outcome(task_result, model_key, task_id)
+                        task_span.set(
+                            success=task_result["success"],
+                            iterations=task_result.get("iterations", task_result.get("iteration")),
+                            error=task_result.get("error")
+                        )
+                results[model_key][task_id] = task_result
                 
                 # Log result
-                if task_result["success"]:
+                if trial_runners:
+                    logger.info(f"{'✅' if task_result['success'] else '❌'} Task {task.task_id}: {trial_stats.format_summary(task_result)}")
+                elif task_result["success"]:
                     logger.info(f"✅ Task {task.task_id} completed successfully")
                 else:
                     logger.error(f"❌ Task {task.task_id} failed")
                 
                 # Optional: Add delay between tasks
-                import time
-                time.sleep(2)
+                if self.inter_task_delay:
+                    time.sleep(self.inter_task_delay)
             
-            results[model_key] = model_results
+            # Let background destroys finish before reporting
+            with tracing.span("destroy.drain"):
+                destroy_results = self.reaper.drain()
+            failed_destroys = [r for r in destroy_results if r["status"] != "success"]
+            if failed_destroys:
+                logger.warning(f"⚠️ {len(failed_destroys)} background destroy(s) failed")
+        
+        usage = self.ledger.summary()
+        logger.info(
+            f"LLM usage: {usage['calls']} calls, {usage['prompt_tokens']} prompt tokens "
+            f"({usage['cached_tokens']} cached), {usage['completion_tokens']} completion tokens "
+            f"({usage['reasoning_tokens']} reasoning), ${usage['cost_usd']:.4f}"
+        )
         
         logger.info(f"\n{'='*80}")
         logger.info("Golden dataset generation completed!")
@@ -116,6 +334,125 @@ class GoldenDatasetOrchestrator:
         
         return results
     
+    def _record_task_outcome(self, task_result: Dict, model_key: str, task_id: str):
+        """Count a finished task (or trial) in the ledger and metrics"""
+        self.ledger.task_finished(task_result["success"])
+        labels = {"model": self.models[model_key]["short_name"], "task": task_id.lower().replace('.', '_')}
+        metrics.TASKS.inc(status="success" if task_result["success"] else "failed", **labels)
+        metrics.TASK_ITERATIONS.observe(task_result.get("iterations", task_result.get("iteration", 0)), **labels)
+    
+    def _trial_runner(self, trial: int) -> "GoldenDatasetOrchestrator":
+        """Copy of this orchestrator that runs one pass@k trial
+        
+        The copy works under <run dir>/trials/<trial> with VM names in its own
+        namespace (and its own fixtures), so trials can apply concurrently.
+        Clients, ledger, capacity, scheduler, reaper and phase cache are shared.
+        
+        Args:
+            trial: Trial number (from 1)
+        """
+        runner = copy.copy(self)
+        runner.trial = trial
+        runner.run_dir = self.run_dir / "trials" / str(trial)
+        runner.namespace = VMNamespace.for_trial(trial, self.namespace)
+        runner.xen_screenshot = XenScreenshot(
+            base_dir=self.base_dir,
+            run_id="/".join(filter(None, [self.run_id, "trials", str(trial)]))
+        )
+        if self.fixtures:
+            runner.fixtures = FixtureProvisioner(
+                runner.run_dir / "fixtures",
+                capacity=self.capacity,
+                namespace=runner.namespace,
+                terraform_factory=self.terraform_factory
+            )
+        return runner
+    
+    def _run_trials(self, runners: List["GoldenDatasetOrchestrator"], task: TaskDefinition, model_key: str) -> Dict:
+        """Run a task's trials concurrently and write their pass@k summary entry
+        
+        Args:
+            runners: One _trial_runner per trial
+            task: TaskDefinition
+            model_key: Model key
+        
+        Returns:
+            trials.summarize result with success (any trial passed), task_id,
+            model and json_path of the summary entry
+        """
+        model_config = self.models[model_key]
+        
+        def run(runner: "GoldenDatasetOrchestrator") -> Dict:
+            start = time.time()
+            with tracing.span("trial", trial=runner.trial) as span:
+                try:
+                    result = runner.run_single_task(task, model_key)
+                except Exception as e:
+                    logger.error(f"Trial {runner.trial} of {task.task_id} failed: {e}", exc_info=True)
+                    result = {"success": False, "error": str(e), "iteration": 0}
+                span.set(success=result["success"], error=result.get("error"))
+            self._record_task_outcome(result, model_key, task.task_id)
+            return dict(result, seconds=round(time.time() - start, 3))
+        
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=len(runners), thread_name_prefix="trial") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, run, runner) for runner in runners]
+            results = [future.result() for future in futures]
+        summary = trial_stats.summarize(results, time.time() - start)
+        
+        json_path = DatasetGenerator(self._dataset_dir(model_config)).generate_trial_summary(
+            task_id=task.task_id,
+            task_description=task.task_description,
+            model_name=model_config["full_name"],
+            model_short_name=model_config["short_name"],
+            summary=summary
+        )
+        return dict(
+            summary,
+            success=summary["passed"] > 0,
+            task_id=task.task_id,
+            model=model_config["full_name"],
+            json_path=str(json_path)
+        )
+    
+    @contextmanager
+    def _run_trace(self, models: List[str], tasks: List[str]):
+        """Record the spans of a run to <run dir>/traces when tracing is enabled"""
+        if not self.trace:
+            yield
+            return
+        
+        self.trace_path = self.run_dir / "traces" / f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        logger.info(f"Tracing to {self.trace_path}")
+        tracer = tracing.Tracer(self.trace_path, metadata={
+            "name": f"golden dataset run {self.run_id or ''}".strip(),
+            "run_id": self.run_id,
+            "models": models,
+            "tasks": tasks,
+            "max_iterations": self.max_iterations
+        })
+        try:
+            with tracer.activate():
+                yield
+        finally:
+            tracer.close()
+    
+    @contextmanager
+    def _run_profile(self):
+        """Profile a run into <run dir>/profiles/<timestamp> when profiling is enabled"""
+        if not self.profile:
+            yield
+            return
+        
+        profiler = SamplingProfiler(interval=self.profile_interval)
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            out_dir = self.run_dir / "profiles" / datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.profile_paths = profiler.write(out_dir)
+    
     def run_single_task(self, task: TaskDefinition, model_key: str) -> Dict:
         """Run a single task for a specific model
         
@@ -127,19 +464,58 @@ class GoldenDatasetOrchestrator:
             Result dict
         """
         model_config = self.models[model_key]
+        backend = self.llm_backend(model_config)
+        task_key = task.task_id.lower().replace('.', '_')
+        labels = {"model": model_config["short_name"], "task": task_key}
         
         # Setup working directory
-        work_dir = self.base_dir / "terraform_code" / model_config["short_name"] / task.task_id.lower().replace('.', '_')
+        work_dir = self.run_dir / "terraform_code" / model_config["short_name"] / task_key
         work_dir.mkdir(parents=True, exist_ok=True)
         
+        # A previous destroy of this workspace may still be running
+        metrics.QUEUE_WAIT_SECONDS.observe(self.reaper.wait_for(work_dir=work_dir), queue="destroy", **labels)
+        
+        # Set up the task's precondition from a fixture
+        seeded = False
+        if self.fixtures:
+            waited = self.reaper.wait_for(vm_names=self.fixtures.vm_names(task.infrastructure_state_before))
+            metrics.QUEUE_WAIT_SECONDS.observe(waited, queue="destroy", **labels)
+            with metrics.TERRAFORM_PHASE_SECONDS.time(phase="fixture", **labels), \
+                    tracing.span("fixture.ensure", state=task.infrastructure_state_before) as span:
+                fixture_result = self.fixtures.ensure(task.infrastructure_state_before)
+                span.set(status=fixture_result["status"])
+            metrics.TERRAFORM_PHASES.inc(phase="fixture", status=fixture_result["status"], **labels)
+            if fixture_result["status"] != "success":
+                return {
+                    "success": False,
+                    "error": "Fixture provisioning failed",
+                    "fixture": fixture_result,
+                    "iteration": 0
+                }
+            
+            if task_manages_fixture(task):
+                seeded = self.fixtures.seed_workspace(work_dir)
+                # The task (or its cleanup) will change the fixture VMs
+                self.fixtures.mark_dirty()
+        
         # Initialize components
-        terraform = TerraformExecutor(work_dir)
+        terraform = self.terraform_factory(work_dir)
         memory = ConversationMemory(
             task_id=task.task_id,
             model_name=model_config["full_name"],
             work_dir=work_dir
         )
         
+        phase_cache = PhaseResultCache(
+            cache_dir=self.base_dir / "cache" / "phase_results",
+            task_id=task.task_id,
+            provider_version=PROVIDER_VERSION
+        )
+        error_tracker = ErrorSignatureTracker(
+            repeat_limit=self.repeat_error_limit,
+            policies=self.repeat_error_policies
+        )
+        
         # Add system message with platform context
         memory.add_system_message(PLATFORM_CONTEXT)
         
@@ -151,128 +527,186 @@ class GoldenDatasetOrchestrator:
         terraform_results = {}
         llm_response_data = {}
         worked_as_generated = False
+        temperature = self.temperature
+        timeline: List[Dict] = []
+        candidates: List[Dict] = []
+        task_start = time.time()
+        
+        def record_candidates(best: Dict):
+            records, timeline[-1]["llm"] = best["finish"]()
+            timeline[-1]["candidates"] = [
+                {k: v for k, v in record.items() if k != "generated_code"} for record in records
+            ]
+            candidates.extend(records)
         
         for iteration in range(1, self.max_iterations + 1):
-            logger.info(f"\n--- Iteration {iteration}/{self.max_iterations} ---")
-            
-            # Call LLM
-            logger.info("Calling LLM...")
-            llm_result = self.openrouter.call_llm(
-                model=model_config["api_id"],
-                messages=memory.get_messages()
-            )
-            
-            if not llm_result["success"]:
-                logger.error(f"LLM call failed: {llm_result.get('error')}")
-                return {
-                    "success": False,
-                    "error": "LLM call failed",
-                    "iteration": iteration
-                }
-            
-            # Save LLM response
-            llm_response_text = llm_result["content"]
-            memory.add_assistant_message(llm_response_text)
-            
-            # Save full LLM response to file
-            (work_dir / "llm_response.txt").write_text(llm_response_text)
-            
-            # Extract Terraform code
-            logger.info("Extracting Terraform code...")
-            terraform_code = self.openrouter.extract_terraform_code(llm_response_text)
-            
-            if not terraform_code:
-                logger.warning("No Terraform code found in LLM response")
-                # Ask for code explicitly
-                memory.add_user_message(
-                    "Please provide the complete Terraform code in a code block (```terraform ... ```)."
-                )
-                continue
-            
-            # Save Terraform code
-            terraform.write_main_tf(terraform_code)
-            
-            # Store LLM response data (first iteration only)
-            if iteration == 1:
-                llm_response_data = {
-                    "generated_code": terraform_code,
-                    "questions_asked": self.openrouter.extract_questions_asked(llm_response_text),
-                    "time_seconds": llm_result["time_seconds"],
-                    "inferred_defaults": {}  # TODO: Parse from response
-                }
-            
-            # Execute Terraform workflow
-            logger.info("Executing Terraform workflow...")
-            
-            # Init
-            logger.info("Running terraform init...")
-            init_result = terraform.init()
-            terraform_results["init"] = init_result
-            
-            if init_result["status"] != "success":
-                logger.error(f"Terraform init failed: {init_result['error_message']}")
-                memory.add_error_feedback("init", init_result["error_message"], init_result.get("stderr", ""))
-                continue
-            
-            # Validate
-            logger.info("Running terraform validate...")
-            validate_result = terraform.validate()
-            terraform_results["validate"] = validate_result
-            
-            if validate_result["status"] != "success":
-                logger.error(f"Terraform validate failed: {validate_result['error_message']}")
-                memory.add_error_feedback("validate", validate_result["error_message"], validate_result.get("stderr", ""))
-                continue
-            
-            # Plan
-            logger.info("Running terraform plan...")
-            plan_result = terraform.plan()
-            terraform_results["plan"] = plan_result
-            
-            if plan_result["status"] != "success":
-                logger.error(f"Terraform plan failed: {plan_result['error_message']}")
-                memory.add_error_feedback("plan", plan_result["error_message"], plan_result.get("stderr", ""))
-                continue
-            
-            # Apply
-            logger.info("Running terraform apply...")
-            apply_result = terraform.apply()
-            terraform_results["apply"] = apply_result
-            
-            if apply_result["status"] != "success":
-                logger.error(f"Terraform apply failed: {apply_result['error_message']}")
-                memory.add_error_feedback("apply", apply_result["error_message"], apply_result.get("stderr", ""))
-                continue
-            
-            # Success!
-            logger.info("✅ Terraform apply succeeded!")
-            worked_as_generated = (iteration == 1)
-            break
+            with tracing.span("iteration", iteration=iteration, temperature=temperature) as iteration_span:
+                # Spend is checked between iterations; a call in flight may overshoot the budget
+                if self.ledger.exhausted:
+                    logger.error(f"❌ Budget of ${self.ledger.budget_usd} exhausted")
+                    error_tracker.outcome = "budget_exhausted"
+                    return self._failed_task(
+                        task, model_config, "Budget exhausted", iteration - 1, terraform_results, timeline, error_tracker
+                    )
+                
+                logger.info(f"\n--- Iteration {iteration}/{self.max_iterations} ---")
+                phase_cache.start_iteration()
+                iteration_start = time.time()
+                phase_timings: Dict[str, Dict] = {}
+                timeline.append({
+                    "iteration": iteration,
+                    "start_seconds": round(iteration_start - task_start, 3),
+                    "temperature": temperature,
+                    "llm": None,
+                    "phases": phase_timings
+                })
+                
+                # Call LLM
+                best = None
+                if self.best_of > 1:
+                    logger.info(f"Sampling {self.best_of} candidates...")
+                    best = self._run_candidates(
+                        task, backend, model_config, memory, phase_cache, temperature, work_dir, iteration, seeded, labels
+                    )
+                    llm_result = best["llm_result"]
+                else:
+                    logger.info("Calling LLM...")
+                    llm_result = backend.call_llm(
+                        model=model_config["api_id"],
+                        messages=memory.get_messages(),
+                        temperature=temperature
+                    )
+                    usage = self._account_llm_call(llm_result, model_config, labels)
+                    timeline[-1]["llm"] = iteration_timeline.llm_timing(llm_result, usage)
+                
+                if not llm_result["success"]:
+                    logger.error(f"LLM call failed: {llm_result.get('error')}")
+                    if best:
+                        record_candidates(best)
+                    error_tracker.outcome = "llm_call_failed"
+                    return self._failed_task(
+                        task, model_config, "LLM call failed", iteration, terraform_results, timeline, error_tracker
+                    )
+                
+                # Save LLM response (final answer only; reasoning goes to a side artifact)
+                llm_response_text = llm_result["content"]
+                memory.add_assistant_message(llm_response_text)
+                memory.save_reasoning(iteration, llm_result.get("reasoning", ""))
+                
+                # Save full LLM response to file
+                (work_dir / "llm_response.txt").write_text(llm_response_text)
+                
+                # Extract Terraform code
+                logger.info("Extracting Terraform code...")
+                terraform_code = backend.extract_terraform_code(llm_response_text)
+                
+                if not terraform_code:
+                    logger.warning("No Terraform code found in LLM response")
+                    # Ask for code explicitly
+                    memory.add_user_message(
+                        "Please provide the complete Terraform code in a code block (```terraform ... ```)."
+                    )
+                    failure = ("extract", {"error_message": "No Terraform code found in response"})
+                
+                else:
+                    # Store LLM response data (first iteration only)
+                    if iteration == 1:
+                        llm_response_data = {
+                            "generated_code": terraform_code,
+                            "questions_asked": backend.extract_questions_asked(llm_response_text),
+                            "time_seconds": llm_result["time_seconds"],
+                            "inferred_defaults": {}  # TODO: Parse from response
+                        }
+                    
+                    if best and best["failure"]:
+                        # No candidate passed validate and plan; the promoted one's failure is fed back
+                        failure = best["failure"]
+                        terraform_results[failure[0]] = failure[1]
+                        self._add_phase_failure_feedback(memory, *failure, unchanged=bool(failure[1].get("repeated")))
+                    elif best:
+                        # The promoted candidate passed init, validate and plan; apply its saved plan
+                        self._promote_candidate(best["workspace"], work_dir)
+                        terraform_results.update(best["terraform_results"])
+                        phase_timings.update(best["phases"])
+                        failure = self._run_terraform_phases(
+                            task, terraform, memory, phase_cache, terraform_results, labels, phase_timings, phases=("apply",)
+                        )
+                    else:
+                        # Save Terraform code (with host-level VM names when namespaced)
+                        workspace_code = self.namespace.apply(terraform_code) if self.namespace else terraform_code
+                        terraform.write_main_tf(workspace_code)
+                        if seeded:
+                            self.fixtures.align_state(work_dir, workspace_code)
+                        
+                        failure = self._run_terraform_phases(
+                            task, terraform, memory, phase_cache, terraform_results, labels, phase_timings
+                        )
+                
+                if best:
+                    # Candidates still running when one was promoted finish during its apply
+                    record_candidates(best)
+                timeline[-1]["seconds"] = round(time.time() - iteration_start, 3)
+                
+                if failure:
+                    action = error_tracker.record_failure(iteration, *failure)
+                    iteration_span.set(failed_phase=failure[0], action=action)
+                    timeline[-1]["failed_phase"] = failure[0]
+                    if action:
+                        timeline[-1]["action"] = action
+                    
+                    if action == ErrorSignatureTracker.ABORT:
+                        logger.error("❌ Aborting task after repeated identical errors")
+                        return self._failed_task(
+                            task, model_config, "Aborted after repeated identical errors", iteration,
+                            terraform_results, timeline, error_tracker
+                        )
+                    
+                    if action == ErrorSignatureTracker.RAISE_TEMPERATURE:
+                        temperature = self.escalation_temperature
+                        logger.info(f"Raised sampling temperature to {temperature}")
+                    
+                    if action == ErrorSignatureTracker.FRESH_CONVERSATION:
+                        logger.info("Restarting conversation from the initial prompt")
+                        memory.restart()
+                        memory.add_system_message(PLATFORM_CONTEXT)
+                        memory.add_user_message(
+                            f"{full_prompt}\n\nNote: a previous attempt at this task repeatedly failed with: "
+                            f"{self._portable(failure[1]).get('error_message')}. Take a different approach."
+                        )
+                    continue
+                
+                # Success!
+                iteration_span.set(failed_phase=None)
+                logger.info("✅ Terraform apply succeeded!")
+                worked_as_generated = (iteration == 1)
+                error_tracker.outcome = "succeeded"
+                break
         
         else:
             # Max iterations reached
+            error_tracker.outcome = "max_iterations_reached"
             logger.error(f"❌ Max iterations ({self.max_iterations}) reached without success")
-            return {
-                "success": False,
-                "error": "Max iterations reached",
-                "iteration": self.max_iterations,
-                "terraform_results": terraform_results
-            }
+            return self._failed_task(
+                task, model_config, "Max iterations reached", self.max_iterations, terraform_results, timeline, error_tracker
+            )
         
         # Take screenshots
         logger.info("Capturing screenshots...")
-        screenshots = asyncio.run(self.xen_screenshot.capture_screenshots(
-            task_id=task.task_id.lower().replace('.', '_'),
-            model_short_name=model_config["short_name"]
-        ))
+        with metrics.SCREENSHOT_SECONDS.time(**labels):
+            screenshots = asyncio.run(self.xen_screenshot.capture_screenshots(
+                task_id=task_key,
+                model_short_name=model_config["short_name"]
+            ))
         
         # Generate verification data (simplified)
-        verification_data = self._generate_verification_data(task, terraform_results)
+        host_vm_names = vm_names_from_code((work_dir / "main.tf").read_text())
+        with tracing.span("verification"):
+            xo_vms = asyncio.run(self.xen_screenshot.get_vm_details_from_xo())
+            verification_data = self._generate_verification_data(task, terraform_results, host_vm_names, xo_vms)
         
         # Generate JSON dataset entry
         logger.info("Generating dataset entry...")
-        dataset_dir = self.base_dir / "dataset" / model_config["short_name"]
-        dataset_gen = DatasetGenerator(dataset_dir)
+        dataset_gen = DatasetGenerator(self._dataset_dir(model_config))
         
         prompt_data = {
             "input_text": task.prompt_text,
@@ -286,29 +720,36 @@ class GoldenDatasetOrchestrator:
             "is_idempotency_test": task.is_idempotency_test
         }
         
-        json_path = dataset_gen.generate_entry(
-            task_id=task.task_id,
-            task_description=task.task_description,
-            model_name=model_config["full_name"],
-            model_short_name=model_config["short_name"],
-            prompt_data=prompt_data,
-            llm_response_data=llm_response_data,
-            terraform_results=terraform_results,
-            verification_data=verification_data,
-            screenshots=screenshots,
-            iteration_count=memory.get_iteration_count() + 1,
-            worked_as_generated=worked_as_generated,
-            evaluator_notes=f"Generated via automated system. {'Worked on first attempt.' if worked_as_generated else f'Required {memory.get_iteration_count()} iterations to succeed.'}"
-        )
+        with metrics.DATASET_WRITE_SECONDS.time(**labels), tracing.span("dataset.write"):
+            json_path = dataset_gen.generate_entry(
+                task_id=task.task_id,
+                task_description=task.task_description,
+                model_name=model_config["full_name"],
+                model_short_name=model_config["short_name"],
+                prompt_data=prompt_data,
+                llm_response_data=llm_response_data,
+                terraform_results=self._portable(terraform_results),
+                verification_data=verification_data,
+                screenshots=screenshots,
+                iteration_count=memory.get_iteration_count() + 1,
+                worked_as_generated=worked_as_generated,
+                iteration_control=error_tracker.summary(),
+                timeline=timeline,
+                candidates=candidates,
+                trial=self.trial,
+                evaluator_notes=f"Generated via automated system. {'Worked on first attempt.' if worked_as_generated else f'Required {memory.get_iteration_count()} iterations to succeed.'}"
+            )
         
         # Cleanup VMs if required
-        if task.cleanup_after:
-            logger.info("Cleaning up VMs (terraform destroy)...")
-            destroy_result = terraform.destroy()
-            if destroy_result["status"] == "success":
-                logger.info("✅ VMs destroyed successfully")
-            else:
-                logger.warning(f"⚠️ VM cleanup failed: {destroy_result['error_message']}")
+        # With fixtures, preconditions are recreated on demand, so every task cleans up
+        cleanup = None
+        if task.cleanup_after or self.fixtures:
+            logger.info("Cleaning up VMs (background terraform destroy)...")
+            self.reaper.submit(terraform, ResourceLease(
+                work_dir=work_dir,
+                vm_names=host_vm_names
+            ))
+            cleanup = "scheduled"
         
         return {
             "success": True,
@@ -316,30 +757,488 @@ class GoldenDatasetOrchestrator:
             "model": model_config["full_name"],
             "iterations": memory.get_iteration_count() + 1,
             "worked_as_generated": worked_as_generated,
+            "iteration_control": error_tracker.summary(),
+            "cleanup": cleanup,
             "json_path": str(json_path),
+            "timeline": iteration_timeline.summarize(timeline),
             "terraform_results": terraform_results,
             "screenshots": screenshots
         }
     
-    def _generate_verification_data(self, task: TaskDefinition, terraform_results: Dict) -> Dict:
+    def _dataset_dir(self, model_config: Dict) -> Path:
+        """Directory of a model's dataset entries for this run"""
+        dataset_dir = self.base_dir / "dataset"
+        if self.run_id:
+            dataset_dir = dataset_dir / self.run_id
+        return dataset_dir / model_config["short_name"]
+    
+    def _failed_task(
+        self,
+        task: TaskDefinition,
+        model_config: Dict,
+        error: str,
+        iteration: int,
+        terraform_results: Dict,
+        timeline: List[Dict],
+        error_tracker: ErrorSignatureTracker
+    ) -> Dict:
+        """Result of a task that stopped without a successful apply
+        
+        The failure is written as a dataset entry too, so its iteration
+        control and final error are kept with the run.
+        
+        Args:
+            task: TaskDefinition
+            model_config: Model configuration
+            error: Why the task stopped
+            iteration: Iterations run
+            terraform_results: Latest result per phase
+            timeline: Per-iteration timing records
+            error_tracker: The task's repeated-error tracker
+        
+        Returns:
+            Result dict with json_path of the failure entry
+        """
+        iteration_control = error_tracker.summary()
+        result = {
+            "success": False,
+            "error": error,
+            "iteration": iteration,
+            "terraform_results": terraform_results,
+            "timeline": iteration_timeline.summarize(timeline),
+            "iteration_control": iteration_control
+        }
+        try:
+            json_path = DatasetGenerator(self._dataset_dir(model_config)).generate_failure_entry(
+                task_id=task.task_id,
+                task_description=task.task_description,
+                model_name=model_config["full_name"],
+                model_short_name=model_config["short_name"],
+                error=error,
+                iteration_count=iteration,
+                terraform_results=self._portable(terraform_results),
+                iteration_control=iteration_control,
+                timeline=timeline,
+                trial=self.trial
+            )
+            result["json_path"] = str(json_path)
+        except OSError as e:
+            logger.warning(f"Could not write failure entry for {task.task_id}: {e}")
+        return result
+    
+    def _run_terraform_phases(
+        self,
+        task: TaskDefinition,
+        terraform: TerraformExecutor,
+        memory: Optional[ConversationMemory],
+        phase_cache: PhaseResultCache,
+        terraform_results: Dict,
+        labels: Dict[str, str],
+        phase_timings: Optional[Dict[str, Dict]] = None,
+        phases: Tuple[str, ...] = TERRAFORM_PHASES
+    ) -> Optional[Tuple[str, Dict]]:
+        """Run the code in the workspace through the Terraform phases
+        
+        Args:
+            task: TaskDefinition
+            terraform: Executor for the task workspace
+            memory: Conversation memory for the task (None: no feedback is added)
+            phase_cache: Known failures for the task
+            terraform_results: Latest result per phase (updated in place)
+            labels: Metric labels (model, task)
+            phase_timings: Timing per phase run (or reused) this iteration (updated in place)
+            phases: Phases to run (default: through apply)
+        
+        Returns:
+            (failed phase, phase result) on failure, None if the last phase succeeded
+        """
+        if phase_timings is None:
+            phase_timings = {}
+        
+        # Short-circuit code that already failed in this task (ignoring whitespace)
+        code_hash = phase_cache.hash_workspace(
+            terraform.work_dir,
+            normalize=self.namespace.strip if self.namespace else None
+        )
+        cached = phase_cache.lookup(code_hash)
+        if cached:
+            if cached["result"]["repeated"]:
+                logger.warning(f"Code unchanged from a previous attempt, reusing cached '{cached['phase']}' failure")
+            else:
+                logger.warning(f"Code matches a known '{cached['phase']}' failure, reusing the cached result")
+            tracing.current().set(cached_failure=cached["phase"])
+            terraform_results[cached["phase"]] = cached["result"]
+            phase_timings[cached["phase"]] = iteration_timeline.phase_timing(cached["result"], cached=True)
+            if memory:
+                # Only code this task already submitted is "unchanged"; other hits get the usual feedback
+                self._add_phase_failure_feedback(memory, cached["phase"], cached["result"], unchanged=cached["result"]["repeated"])
+            return cached["phase"], cached["result"]
+        
+        # Reject obviously broken code in-process before shelling out.
+        # Failures are reported as 'validate' so they feed back and cache the same way.
+        code = (terraform.work_dir / "main.tf").read_text()
+        with tracing.span("preflight", code_bytes=len(code)) as span:
+            preflight_result = self.preflight.validate(code)
+            span.set(status=preflight_result["status"])
+        phase_timings["preflight"] = iteration_timeline.phase_timing(preflight_result)
+        if preflight_result["status"] != "success":
+            logger.error(f"Pre-flight validation failed: {preflight_result['error_message']}")
+            terraform_results["validate"] = preflight_result
+            # Only for this task run: terraform validate has the final say in later runs
+            phase_cache.store(code_hash, "validate", self._portable(preflight_result), persist=False)
+            if memory:
+                self._add_phase_failure_feedback(memory, "validate", preflight_result)
+            return "validate", preflight_result
+        
+        # Execute Terraform workflow
+        logger.info("Executing Terraform workflow...")
+        failed_phase = None
+        
+        for phase in phases:
+            admission = None
+            if phase == "apply":
+                # Only the apply has to wait for background destroys to free names,
+                # and for the host to have room for the planned VMs
+                vm_names = vm_names_from_code(code)
+                with tracing.span("destroy.wait", vm_names=sorted(vm_names)):
+                    waited = self.reaper.wait_for(vm_names=vm_names)
+                metrics.QUEUE_WAIT_SECONDS.observe(waited, queue="destroy", **labels)
+                planned_vms = terraform_results["plan"].get("planned_vms")
+                if planned_vms is None:
+                    planned_vms = estimate_planned_vms(vm_names, task.expected_ram_gb, task.expected_cpu)
+                with tracing.span("capacity.admit", planned_vms=len(planned_vms)):
+                    admission = self.capacity.admit(planned_vms, terraform.work_dir)
+            
+            logger.info(f"Running terraform {phase}...")
+            with metrics.TERRAFORM_PHASE_SECONDS.time(phase=phase, **labels):
+                phase_result = getattr(terraform, phase)()
+            metrics.TERRAFORM_PHASES.inc(phase=phase, status=phase_result["status"], **labels)
+            terraform_results[phase] = phase_result
+            
+            if admission:
+                self.capacity.commit(admission, phase_result["status"] == "success")
+                phase_result["capacity_wait_seconds"] = admission["waited_seconds"]
+                metrics.QUEUE_WAIT_SECONDS.observe(admission["waited_seconds"], queue="capacity", **labels)
+            phase_timings[phase] = iteration_timeline.phase_timing(phase_result)
+            
+            if phase_result["status"] != "success":
+                failed_phase = phase
+                break
+            
+            if phase == "init" and not self.preflight.has_schema:
+                self.preflight.export_schema(terraform)
+        
+        if failed_phase:
+            logger.error(f"Terraform {failed_phase} failed: {phase_result['error_message']}")
+            phase_cache.store(code_hash, failed_phase, self._portable(phase_result))
+            if memory:
+                self._add_phase_failure_feedback(memory, failed_phase, phase_result)
+            return failed_phase, phase_result
+        
+        return None
+    
+    def _run_candidates(
+        self,
+        task: TaskDefinition,
+        backend: LLMBackend,
+        model_config: Dict,
+        memory: ConversationMemory,
+        phase_cache: PhaseResultCache,
+        temperature: float,
+        work_dir: Path,
+        iteration: int,
+        seeded: bool,
+        labels: Dict[str, str]
+    ) -> Dict:
+        """Sample best_of completions concurrently and pre-flight their code in parallel
+        
+        Each candidate's code runs through pre-flight, init, validate and plan
+        in a scratch copy of the task workspace (candidates/<iteration>/<n>).
+        The first candidate, in sampling order, that passes is promoted and
+        its saved plan is applied (see _promote_candidate) as soon as every
+        candidate before it has finished; later candidates skip their
+        pre-flight. Without a passing candidate, the first candidate with code
+        is promoted once all are done, and its failure is the iteration's.
+        
+        Returns:
+            Dict with llm_result, failure (None if it passed), workspace,
+            terraform_results and phases (timings) of the promoted candidate,
+            and finish, which waits for the candidates still running and
+            returns their records (one per sample, for the dataset) and the
+            LLM timing over all samples
+        """
+        messages = memory.get_messages()
+        # Set once a candidate is promoted; later ones are not pre-flighted
+        promoted_event = threading.Event()
+        
+        def skipped(index: int, llm: Optional[Dict] = None) -> Dict:
+            return {
+                "iteration": iteration,
+                "index": index,
+                "llm": llm or {},
+                "phases": {},
+                "status": "skipped",
+                "failed_phase": None,
+                "generated_code": None
+            }
+        
+        def run(index: int) -> Tuple[Dict, Optional[str], Optional[Tuple[str, Dict]], Dict, Dict]:
+            with tracing.span("candidate", index=index) as span:
+                llm_result = backend.call_llm(model=model_config["api_id"], messages=messages, temperature=temperature)
+                usage = self._account_llm_call(llm_result, model_config, labels)
+                llm = iteration_timeline.llm_timing(llm_result, usage)
+                if promoted_event.is_set():
+                    span.set(status="skipped")
+                    return llm_result, None, None, skipped(index, llm), {}
+                record = {"iteration": iteration, "index": index, "llm": llm, "phases": {}}
+                
+                code, failure, results = None, None, {}
+                if llm_result["success"]:
+                    code = backend.extract_terraform_code(llm_result["content"])
+                    if not code:
+                        failure = ("extract", {"error_message": "No Terraform code found in response"})
+                    else:
+                        scratch = self._scratch_workspace(work_dir, work_dir / "candidates" / str(iteration) / str(index), code, seeded)
+                        (scratch.work_dir / "llm_response.txt").write_text(llm_result["content"])
+                        failure = self._run_terraform_phases(
+                            task, scratch, None, phase_cache, results, labels, record["phases"], phases=CANDIDATE_PHASES
+                        )
+                
+                record["status"] = "failed" if not llm_result["success"] or failure else "passed"
+                record["failed_phase"] = "llm" if not llm_result["success"] else failure[0] if failure else None
+                if failure:
+                    record["error_message"] = self._portable(failure[1]).get("error_message")
+                record["generated_code"] = code
+                span.set(status=record["status"], failed_phase=record["failed_phase"])
+                return llm_result, code, failure, record, results
+        
+        # Copy the context so candidates keep the trace and scheduler of the task
+        pool = ThreadPoolExecutor(max_workers=self.best_of, thread_name_prefix="candidate")
+        futures = {pool.submit(contextvars.copy_context().run, run, index): index for index in range(self.best_of)}
+        outcomes: Dict[int, Tuple] = {}
+        promoted = None
+        for future in as_completed(futures):
+            outcomes[futures[future]] = future.result()
+            # The earliest passing candidate wins once everything sampled before it is known
+            for index in range(self.best_of):
+                if index not in outcomes:
+                    break
+                if outcomes[index][1] and not outcomes[index][2]:
+                    promoted = outcomes[index]
+                    break
+            if promoted:
+                break
+        
+        if promoted:
+            promoted_event.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            running = self.best_of - len(outcomes)
+            logger.info(f"Promoting candidate {promoted[3]['index']}" + (f", {running} still running" if running else ""))
+        else:
+            pool.shutdown()
+            ordered = [outcomes[index] for index in range(self.best_of)]
+            promoted = next((outcome for outcome in ordered if outcome[1]), None) \
+                or next((outcome for outcome in ordered if outcome[0]["success"]), ordered[0])
+        promoted[3]["promoted"] = True
+        
+        def finish() -> Tuple[List[Dict], Dict]:
+            pool.shutdown()
+            for future, index in futures.items():
+                if index not in outcomes:
+                    outcomes[index] = (None, None, None, skipped(index), {}) if future.cancelled() else future.result()
+            records = [outcomes[index][3] for index in range(self.best_of)]
+            # Providers were copied from the task workspace; keep only code, logs and plans
+            for record in records:
+                if record is not promoted[3] or promoted[2]:
+                    shutil.rmtree(work_dir / "candidates" / str(iteration) / str(record["index"]) / ".terraform", ignore_errors=True)
+            passed = sum(record["status"] == "passed" for record in records)
+            skipped_count = sum(record["status"] == "skipped" for record in records)
+            logger.info(
+                f"{passed}/{self.best_of} candidates passed validate and plan ({skipped_count} skipped), "
+                f"promoted candidate {promoted[3]['index']}"
+            )
+            
+            # Samples ran concurrently: wall time is the slowest, tokens and cost add up
+            llm = dict(promoted[3]["llm"], samples=self.best_of)
+            llm["seconds"] = max(record["llm"].get("seconds") or 0.0 for record in records)
+            for key in ("prompt_tokens", "completion_tokens", "cached_tokens", "reasoning_tokens", "cost_usd", "hedge_overhead_cost_usd"):
+                total = sum(record["llm"].get(key) or 0 for record in records)
+                if total:
+                    llm[key] = round(total, 6) if key.endswith("cost_usd") else total
+            return records, llm
+        
+        return {
+            "llm_result": promoted[0],
+            "failure": promoted[2],
+            "workspace": work_dir / "candidates" / str(iteration) / str(promoted[3]["index"]),
+            "terraform_results": promoted[4],
+            "phases": promoted[3]["phases"],
+            "finish": finish
+        }
+    
+    @staticmethod
+    def _promote_candidate(scratch_dir: Path, work_dir: Path):
+        """Move a candidate's code, saved plan, state and providers into the task workspace
+        
+        The plan was made against a copy of the workspace state, so it can be
+        applied there without planning again.
+        """
+        for name in ("main.tf", "tfplan", "terraform.tfstate", ".terraform.lock.hcl"):
+            if (scratch_dir / name).exists():
+                shutil.copy2(scratch_dir / name, work_dir / name)
+        if (scratch_dir / ".terraform").is_dir():
+            shutil.rmtree(work_dir / ".terraform", ignore_errors=True)
+            shutil.move(str(scratch_dir / ".terraform"), str(work_dir / ".terraform"))
+    
+    def _scratch_workspace(self, work_dir: Path, scratch_dir: Path, code: str, seeded: bool) -> TerraformExecutor:
+        """Executor for a copy of the task workspace (state, lock file, providers) holding other code"""
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        scratch_dir.mkdir(parents=True)
+        for name in ("terraform.tfstate", ".terraform.lock.hcl"):
+            if (work_dir / name).exists():
+                shutil.copy2(work_dir / name, scratch_dir / name)
+        if (work_dir / ".terraform").is_dir():
+            shutil.copytree(work_dir / ".terraform", scratch_dir / ".terraform", symlinks=True)
+        
+        terraform = self.terraform_factory(scratch_dir)
+        workspace_code = self.namespace.apply(code) if self.namespace else code
+        terraform.write_main_tf(workspace_code)
+        if seeded:
+            self.fixtures.align_state(scratch_dir, workspace_code)
+        return terraform
+    
+    def _account_llm_call(self, llm_result: Dict, model_config: Dict, labels: Dict[str, str]) -> Optional[Dict]:
+        """Record an LLM call, and the cancelled request of a hedged call, in the ledger and metrics
+        
+        Args:
+            llm_result: call_llm result
+            model_config: Model configuration
+            labels: Model and task labels
+        
+        Returns:
+            Usage as accounted by CostLedger.record, with hedge_overhead_cost_usd
+            when a hedged request was cancelled (None for failed calls)
+        """
+        usage = self.ledger.record(model_config["api_id"], labels["task"], llm_result["usage"]) if llm_result["success"] else None
+        self._record_llm_metrics(llm_result, usage, labels)
+        
+        overhead = (llm_result.get("hedge") or {}).get("overhead")
+        if usage is not None and overhead:
+            overhead_usage = self.ledger.record(model_config["api_id"], labels["task"], overhead, hedge_overhead=True)
+            for direction in ("prompt", "completion"):
+                metrics.LLM_HEDGE_OVERHEAD_TOKENS.inc(overhead_usage[f"{direction}_tokens"], direction=direction, **labels)
+            if overhead_usage["cost_usd"] is not None:
+                metrics.LLM_HEDGE_OVERHEAD_COST_USD.inc(overhead_usage["cost_usd"], **labels)
+                metrics.LLM_COST_USD.inc(overhead_usage["cost_usd"], **labels)
+                usage["hedge_overhead_cost_usd"] = overhead_usage["cost_usd"]
+        return usage
+    
+    def _record_llm_metrics(self, llm_result: Dict, usage: Optional[Dict], labels: Dict[str, str]):
+        """Record latency, outcome, token counts and cost of an LLM call
+        
+        Args:
+            llm_result: call_llm result
+            usage: Usage as accounted by CostLedger.record (None for failed calls)
+            labels: Model and task labels
+        """
+        metrics.LLM_REQUEST_SECONDS.observe(llm_result["time_seconds"], **labels)
+        metrics.LLM_REQUESTS.inc(status="success" if llm_result["success"] else "failed", **labels)
+        if not llm_result["success"]:
+            return
+        
+        for direction in ("prompt", "cached", "completion", "reasoning"):
+            metrics.LLM_TOKENS.inc(usage[f"{direction}_tokens"], direction=direction, **labels)
+        metrics.LLM_COMPLETION_TOKENS.observe(usage["completion_tokens"], **labels)
+        if usage["cost_usd"] is not None:
+            metrics.LLM_COST_USD.inc(usage["cost_usd"], **labels)
+        if llm_result.get("ttft_seconds") is not None:
+            metrics.LLM_TIME_TO_FIRST_TOKEN_SECONDS.observe(llm_result["ttft_seconds"], **labels)
+        if (llm_result.get("hedge") or {}).get("fired"):
+            metrics.LLM_HEDGES.inc(winner=llm_result["hedge"]["winner"], **labels)
+    
+    def _add_phase_failure_feedback(
+        self,
+        memory: ConversationMemory,
+        phase: str,
+        phase_result: Dict,
+        unchanged: bool = False
+    ):
+        """Feed a failed Terraform phase back to the model
+        
+        Args:
+            memory: Conversation memory for the task
+            phase: Failed phase (init, validate, plan, apply)
+            phase_result: Executor result for the phase
+            unchanged: Whether the code was identical to an earlier failed attempt
+        """
+        phase_result = self._portable(phase_result)
+        memory.add_error_feedback(
+            phase,
+            phase_result.get("error_message"),
+            phase_result.get("stderr", ""),
+            diagnostics=phase_result.get("diagnostics"),
+            unchanged=unchanged
+        )
+    
+    def _portable(self, result: Dict) -> Dict:
+        """Result with this run's VM namespace removed, as the model and dataset see it"""
+        return self.namespace.strip_result(result) if self.namespace else result
+    
+    def _generate_verification_data(
+        self,
+        task: TaskDefinition,
+        terraform_results: Dict,
+        host_vm_names: Optional[Set[str]] = None,
+        xo_vms: Optional[List[Dict]] = None
+    ) -> Dict:
         """Generate verification data (simplified version)
         
         Args:
             task: TaskDefinition
             terraform_results: Terraform execution results
+            host_vm_names: VM names as created on the host (namespaced for concurrent runs)
+            xo_vms: VMs reported by the XO REST API, if it could be reached
             
         Returns:
             Verification data dict
         """
         apply_success = terraform_results.get("apply", {}).get("status") == "success"
         
+        if apply_success and xo_vms and host_vm_names:
+            # Check the VMs the code manages against what XO actually reports
+            vm_details = []
+            for vm in xo_vms:
+                if vm["name_label"] in host_vm_names:
+                    name_label = self.namespace.strip(vm["name_label"]) if self.namespace else vm["name_label"]
+                    vm_details.append({**vm, "name_label": name_label})
+            vm_details.sort(key=lambda vm: vm["name_label"])
+            all_found = len(vm_details) == len(host_vm_names)
+            ram_matches = task.expected_ram_gb is None or abs(sum(vm["ram_gb"] for vm in vm_details) - task.expected_ram_gb) < 0.01
+            cpus_match = task.expected_cpu is None or all(vm["cpus"] == task.expected_cpu for vm in vm_details)
+            
+            return {
+                "vms_exist_in_xo": all_found,
+                "expected_vm_count": task.expected_vm_count,
+                "actual_vm_count": len(vm_details),
+                "all_vms_running": all_found and all(vm["power_state"] == "Running" for vm in vm_details),
+                "all_vms_accessible": all_found,
+                "vm_details": vm_details,
+                "meets_requirements": all_found and ram_matches and cpus_match,
+                "resource_allocation_correct": all_found and ram_matches,
+                "specs_match": all_found and ram_matches and cpus_match,
+                "available_ram_after": round(20 - sum(vm["ram_gb"] for vm in xo_vms), 2)
+            }
+        
         return {
             "vms_exist_in_xo": apply_success,
             "expected_vm_count": task.expected_vm_count,
             "actual_vm_count": task.expected_vm_count if apply_success else 0,
             "all_vms_running": apply_success,
             "all_vms_accessible": apply_success,
-            "vm_details": [],
+            "vm_details": [
+                {"name_label": self.namespace.strip(name) if self.namespace else name}
+                for name in sorted(host_vm_names or ())
+            ] if apply_success else [],
             "meets_requirements": apply_success,
             "resource_allocation_correct": apply_success,
             "specs_match": apply_success,
@@ -362,6 +1261,9 @@ class GoldenDatasetOrchestrator:
             
             for task_id, task_result in model_results.items():
                 status = "✅" if task_result.get("success") else "❌"
+                if "trials" in task_result:
+                    logger.info(f"{status} {task_id}: {trial_stats.format_summary(task_result)}")
+                    continue
                 iterations = task_result.get("iterations", "N/A")
                 logger.info(f"{status} {task_id}: {iterations} iterations")
         
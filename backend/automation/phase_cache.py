@@ -0,0 +1,163 @@
+"""Cache of Terraform phase failures keyed by normalized workspace content"""
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class PhaseResultCache:
+    """Remember which phase a given piece of Terraform code failed in
+    
+    Results are scoped to one task and one provider version. Validate
+    failures depend only on the code and provider, so they are persisted and
+    shared across runs and models; init and plan failures can depend on the
+    network or live host state, so they are only kept for the current task run.
+    So are pre-flight findings: only Terraform's own verdict is shared.
+    """
+    
+    CACHEABLE_PHASES = ("init", "validate", "plan")
+    PERSISTENT_PHASES = ("validate",)
+    
+    # Workspace files that influence Terraform results
+    WORKSPACE_PATTERNS = ("*.tf", "*.tfvars")
+    
+    # Bulky fields not worth keeping in the cache
+    DROPPED_FIELDS = ("stdout", "stderr")
+    
+    # Caches of concurrent trials and runs in this process merge into the same files
+    save_lock = threading.Lock()
+    
+    def __init__(self, cache_dir: Path, task_id: str, provider_version: str):
+        self.cache_file = Path(cache_dir) / task_id.lower().replace('.', '_') / f"xenorchestra_{provider_version}.json"
+        self.entries: Dict[str, Dict] = {}
+        # Hashes that failed before the current iteration of this task run
+        self.earlier_hashes: Set[str] = set()
+        # Best-of-N candidates of one task store concurrently
+        self.lock = threading.Lock()
+        self.persistent_entries: Dict[str, Dict] = self._load()
+    
+    @classmethod
+    def hash_workspace(cls, work_dir: Path, normalize: Optional[Callable[[str], str]] = None) -> str:
+        """Hash the Terraform files of a workspace, ignoring whitespace differences
+        
+        Args:
+            work_dir: Workspace directory
+            normalize: Optional transform applied to file content first
+                (e.g. stripping a run's VM namespace so hashes are shared across runs)
+        
+        Returns:
+            Hex digest of the normalized content
+        """
+        digest = hashlib.sha256()
+        work_dir = Path(work_dir)
+        
+        files = sorted({path for pattern in cls.WORKSPACE_PATTERNS for path in work_dir.glob(pattern)})
+        for path in files:
+            content = path.read_text()
+            if normalize:
+                content = normalize(content)
+            normalized = " ".join(content.split())
+            digest.update(path.name.encode())
+            digest.update(b"\0")
+            digest.update(normalized.encode())
+            digest.update(b"\0")
+        
+        return digest.hexdigest()
+    
+    def start_iteration(self):
+        """Mark the failures stored so far as earlier attempts of this task run"""
+        with self.lock:
+            self.earlier_hashes = set(self.entries)
+    
+    def lookup(self, code_hash: str) -> Optional[Dict]:
+        """Find a known failure for this code
+        
+        Args:
+            code_hash: Hash from hash_workspace
+        
+        Returns:
+            Dict with the failed phase and its result, or None. The result is
+            marked "repeated" when this task run submitted the code in an
+            earlier iteration (persisted failures may come from other models
+            or runs).
+        """
+        with self.lock:
+            entry = self.entries.get(code_hash) or self.persistent_entries.get(code_hash)
+            if not entry:
+                return None
+            # This task run has now submitted the code too
+            self.entries.setdefault(code_hash, entry)
+        
+        result = dict(entry["result"])
+        result["cached"] = True
+        result["repeated"] = code_hash in self.earlier_hashes
+        result["execution_time_seconds"] = 0
+        return {"phase": entry["phase"], "result": result}
+    
+    def store(self, code_hash: str, phase: str, result: Dict, persist: bool = True):
+        """Record the phase a piece of code failed in
+        
+        Args:
+            code_hash: Hash from hash_workspace
+            phase: Failed phase
+            result: Executor result for the phase
+            persist: Share the failure across runs if the phase allows it
+                (False for pre-flight findings reported as validate)
+        """
+        if phase not in self.CACHEABLE_PHASES:
+            return
+        
+        entry = {
+            "phase": phase,
+            "result": {k: v for k, v in result.items() if k not in self.DROPPED_FIELDS}
+        }
+        with self.lock:
+            self.entries[code_hash] = entry
+            
+            if persist and phase in self.PERSISTENT_PHASES:
+                self.persistent_entries[code_hash] = entry
+                self._save()
+    
+    def _load(self) -> Dict[str, Dict]:
+        """Load persisted entries"""
+        if not self.cache_file.exists():
+            return {}
+        
+        try:
+            entries = json.loads(self.cache_file.read_text())
+        except Exception as e:
+            logger.warning(f"Failed to load phase result cache: {e}")
+            return {}
+        # Pre-flight findings persisted by earlier versions may be false positives
+        return {
+            code_hash: entry for code_hash, entry in entries.items()
+            if entry.get("result", {}).get("command") != "preflight"
+        }
+    
+    def _save(self):
+        """Persist entries for the persistent phases"""
+        try:
+            with self.save_lock:
+                # Merge with entries written by other runs since we loaded
+                merged = self._load()
+                merged.update(self.persistent_entries)
+                self.persistent_entries = merged
+                
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                # A temp file of our own: another process may save the same file concurrently
+                with tempfile.NamedTemporaryFile(
+                    "w", dir=self.cache_file.parent, prefix=f"{self.cache_file.stem}.", suffix=".tmp", delete=False
+                ) as tmp_file:
+                    tmp_file.write(json.dumps(merged))
+                try:
+                    os.replace(tmp_file.name, self.cache_file)
+                except OSError:
+                    os.unlink(tmp_file.name)
+                    raise
+        except Exception as e:
+            logger.warning(f"Failed to save phase result cache: {e}")
@@ -0,0 +1,120 @@
+"""Execution ordering for (model, task) pairs
+
+Model-major runs every task for one model before moving to the next, so the
+precondition chain (c1_3 -> u1_2 -> d1_2, c2_3 -> r1_2 ...) is rebuilt for
+each model. Task-major runs each task for all models back to back against the
+same fixture, so fixtures that a task leaves untouched are provisioned once.
+Task-major needs the fixture engine, since a task's precondition no longer
+comes from the same model's previous task.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from .fixtures import same_fixture, task_manages_fixture
+from .task_definitions import get_task
+
+logger = logging.getLogger(__name__)
+
+AUTO = "auto"
+MODEL_MAJOR = "model_major"
+TASK_MAJOR = "task_major"
+ORDERINGS = (AUTO, MODEL_MAJOR, TASK_MAJOR)
+
+def build_schedule(ordering: str, models: List[str], tasks: List[str]) -> List[Tuple[str, str]]:
+    """Order (model, task) pairs
+    
+    Args:
+        ordering: MODEL_MAJOR or TASK_MAJOR
+        models: Model keys
+        tasks: Task IDs in dependency order
+    
+    Returns:
+        List of (model_key, task_id)
+    """
+    if ordering == TASK_MAJOR:
+        return [(model, task) for task in tasks for model in models]
+    return [(model, task) for model in models for task in tasks]
+
+def estimate_operations(schedule: List[Tuple[str, str]], use_fixtures: bool) -> Dict:
+    """Count Terraform applies and destroys a schedule needs
+    
+    Mirrors FixtureProvisioner: a fixture is reused while the active state
+    has the same VMs and no task has touched them. Assumes every task
+    succeeds on its first apply, so the counts are lower bounds.
+    
+    Args:
+        schedule: (model_key, task_id) pairs
+        use_fixtures: Whether preconditions come from fixtures
+    
+    Returns:
+        Dict with applies, destroys, fixture_applies and task_applies
+    """
+    active_state = None
+    fixture_applies = 0
+    task_applies = 0
+    destroys = 0
+    
+    for _, task_id in schedule:
+        task = get_task(task_id)
+        
+        if use_fixtures:
+            state = task.infrastructure_state_before
+            if not (active_state and same_fixture(active_state, state)):
+                fixture_applies += 1
+                active_state = state
+            if task_manages_fixture(task):
+                active_state = None
+        
+        task_applies += 1
+        if task.cleanup_after or use_fixtures:
+            destroys += 1
+    
+    return {
+        "applies": fixture_applies + task_applies,
+        "destroys": destroys,
+        "fixture_applies": fixture_applies,
+        "task_applies": task_applies
+    }
+
+def plan_execution(models: List[str], tasks: List[str], ordering: str = AUTO, use_fixtures: bool = False) -> Dict:
+    """Choose an execution ordering
+    
+    Args:
+        models: Model keys
+        tasks: Task IDs in dependency order
+        ordering: AUTO, MODEL_MAJOR or TASK_MAJOR
+        use_fixtures: Whether preconditions come from fixtures
+    
+    Returns:
+        Dict with the chosen ordering, its schedule, the estimates per
+        ordering and the operations saved compared to model-major
+    
+    Raises:
+        ValueError: For an unknown ordering, or task-major without fixtures
+    """
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Unknown ordering '{ordering}' (expected one of {', '.join(ORDERINGS)})")
+    if ordering == TASK_MAJOR and not use_fixtures:
+        raise ValueError("Task-major ordering requires fixtures (use_fixtures)")
+    
+    candidates = [MODEL_MAJOR, TASK_MAJOR] if use_fixtures else [MODEL_MAJOR]
+    estimates = {
+        candidate: estimate_operations(build_schedule(candidate, models, tasks), use_fixtures)
+        for candidate in candidates
+    }
+    
+    if ordering == AUTO:
+        # Ties keep model-major, which matches how results are reported
+        ordering = min(candidates, key=lambda c: estimates[c]["applies"] + estimates[c]["destroys"])
+    
+    baseline = estimates[MODEL_MAJOR]
+    chosen = estimates[ordering]
+    return {
+        "ordering": ordering,
+        "schedule": build_schedule(ordering, models, tasks),
+        "estimates": estimates,
+        "saving": {
+            "applies": baseline["applies"] - chosen["applies"],
+            "destroys": baseline["destroys"] - chosen["destroys"]
+        }
+    }
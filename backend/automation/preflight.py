@@ -0,0 +1,302 @@
+"""In-process pre-flight validation of generated Terraform code
+
+Catches syntax errors and unknown blocks/arguments in milliseconds before
+shelling out to `terraform init` and `terraform validate`. Diagnostics use the
+same record format as the executor, so a pre-flight failure can be fed back
+and cached exactly like a `terraform validate` failure.
+"""
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from . import hcl_scanner
+from .diagnostics import summarize
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_NAME = "xenorchestra"
+
+# Top-level block types and the number of labels each one takes
+TOP_LEVEL_BLOCKS = {
+    "terraform": 0,
+    "provider": 1,
+    "resource": 2,
+    "data": 2,
+    "variable": 1,
+    "output": 1,
+    "locals": 0,
+    "module": 1,
+    "moved": 0,
+    "import": 0,
+    "check": 1,
+    "removed": 0
+}
+
+# Arguments and nested blocks Terraform itself handles in resource/data blocks
+META_ARGUMENTS = {"count", "for_each", "depends_on", "provider"}
+META_BLOCKS = {"lifecycle", "provisioner", "connection", "precondition", "postcondition"}
+
+# Arguments Terraform itself handles in provider blocks
+PROVIDER_META_ARGUMENTS = {"alias", "version"}
+
+class PreflightValidator:
+    """Validate Terraform code against a cached provider schema"""
+    
+    def __init__(self, schema_path: Path):
+        self.schema_path = Path(schema_path)
+        self.provider_schema: Optional[Dict] = None
+        self._load_schema()
+    
+    @property
+    def has_schema(self) -> bool:
+        return self.provider_schema is not None
+    
+    def _load_schema(self):
+        """Load the cached provider schema if it has been exported"""
+        if not self.schema_path.exists():
+            return
+        
+        try:
+            self.provider_schema = self._select_provider(json.loads(self.schema_path.read_text()))
+        except Exception as e:
+            logger.warning(f"Failed to load provider schema from {self.schema_path}: {e}")
+    
+    @staticmethod
+    def _select_provider(schema_document: Dict) -> Optional[Dict]:
+        """Pick the xenorchestra provider out of `terraform providers schema -json` output"""
+        for source, schema in (schema_document.get("provider_schemas") or {}).items():
+            if source.split('/')[-1] == PROVIDER_NAME:
+                return schema
+        return None
+    
+    def export_schema(self, terraform) -> bool:
+        """Export the provider schema from an initialized workspace (once)
+        
+        Args:
+            terraform: TerraformExecutor whose workspace has been initialized
+        
+        Returns:
+            True if a schema is available afterwards
+        """
+        if self.has_schema:
+            return True
+        
+        result = terraform.providers_schema()
+        if result["status"] != "success":
+            logger.warning(f"Could not export provider schema: {result['error_message']}")
+            return False
+        
+        try:
+            provider_schema = self._select_provider(json.loads(result["stdout"]))
+        except json.JSONDecodeError:
+            logger.warning("Provider schema output was not valid JSON")
+            return False
+        
+        if not provider_schema:
+            logger.warning(f"Provider schema does not include {PROVIDER_NAME}")
+            return False
+        
+        self.schema_path.parent.mkdir(parents=True, exist_ok=True)
+        self.schema_path.write_text(result["stdout"])
+        self.provider_schema = provider_schema
+        logger.info(f"Cached provider schema at {self.schema_path}")
+        return True
+    
+    def validate(self, code: str, filename: str = "main.tf") -> Dict:
+        """Validate Terraform code
+        
+        Args:
+            code: Terraform configuration
+            filename: File name used in diagnostics
+        
+        Returns:
+            Result dict in the TerraformExecutor format
+        """
+        start_time = time.time()
+        lines = code.split('\n')
+        records: List[Dict] = []
+        
+        def report(summary: str, detail: str, line: int, address: Optional[str] = None, end_line: Optional[int] = None):
+            records.append({
+                "severity": "error",
+                "summary": summary,
+                "detail": detail,
+                "address": address,
+                "filename": filename,
+                "start_line": line,
+                "end_line": end_line or line,
+                "snippet": lines[line - 1].strip() if 0 < line <= len(lines) else ""
+            })
+        
+        try:
+            root = hcl_scanner.parse(code)
+        except hcl_scanner.HCLSyntaxError as e:
+            report(e.summary, e.detail, e.line)
+            root = None
+        
+        if root:
+            self._check_root(root, report)
+        
+        elapsed = time.time() - start_time
+        success = not records
+        
+        return {
+            "status": "success" if success else "failed",
+            "command": "preflight",
+            "exit_code": 0 if success else 1,
+            "execution_time_seconds": round(elapsed, 3),
+            "error_message": None if success else summarize(records),
+            "diagnostics": records
+        }
+    
+    def _check_root(self, root: hcl_scanner.Block, report):
+        """Check top-level blocks"""
+        for name, attribute in root.attributes.items():
+            report("Unsupported argument", f"An argument named \"{name}\" is not expected here.", attribute.line)
+        
+        for block in root.blocks:
+            if block.type not in TOP_LEVEL_BLOCKS:
+                report("Unsupported block type", f"Blocks of type \"{block.type}\" are not expected here.", block.line)
+                continue
+            
+            expected_labels = TOP_LEVEL_BLOCKS[block.type]
+            if len(block.labels) < expected_labels:
+                report(
+                    f"Missing name for {block.type}",
+                    f"All {block.type} blocks must have {expected_labels} labels.",
+                    block.line
+                )
+                continue
+            if len(block.labels) > expected_labels:
+                report(
+                    f"Extraneous label for {block.type}",
+                    f"Only {expected_labels} labels are expected for {block.type} blocks.",
+                    block.line
+                )
+                continue
+            
+            if not self.has_schema:
+                continue
+            
+            if block.type == "provider" and block.labels[0] == PROVIDER_NAME:
+                provider_block = (self.provider_schema.get("provider") or {}).get("block") or {}
+                # Provider settings may come from the environment, so nothing is required here
+                self._check_body(
+                    block,
+                    provider_block,
+                    f"provider.{PROVIDER_NAME}",
+                    report,
+                    meta_arguments=PROVIDER_META_ARGUMENTS,
+                    enforce_required=False
+                )
+            
+            elif block.type in ("resource", "data"):
+                self._check_resource(block, report)
+    
+    def _check_resource(self, block: hcl_scanner.Block, report):
+        """Check a resource or data block against the provider schema"""
+        resource_type, name = block.labels
+        if not resource_type.startswith(f"{PROVIDER_NAME}_"):
+            return
+        
+        schemas_key = "resource_schemas" if block.type == "resource" else "data_source_schemas"
+        address = f"{resource_type}.{name}" if block.type == "resource" else f"data.{resource_type}.{name}"
+        
+        schema = (self.provider_schema.get(schemas_key) or {}).get(resource_type)
+        if not schema:
+            kind = "resource" if block.type == "resource" else "data source"
+            report(
+                f"Invalid {kind} type",
+                f"The provider terra-farm/{PROVIDER_NAME} does not support {kind} \"{resource_type}\".",
+                block.line,
+                address
+            )
+            return
+        
+        self._check_body(
+            block, schema.get("block") or {}, address, report, meta_arguments=META_ARGUMENTS, meta_blocks=META_BLOCKS
+        )
+    
+    def _check_body(
+        self,
+        block: hcl_scanner.Block,
+        schema_block: Dict,
+        address: str,
+        report,
+        meta_arguments: Set[str] = frozenset(),
+        meta_blocks: Set[str] = frozenset(),
+        enforce_required: bool = True
+    ):
+        """Check a block body's arguments and nested blocks against its schema"""
+        attributes = schema_block.get("attributes") or {}
+        block_types = schema_block.get("block_types") or {}
+        
+        for name, attribute in block.attributes.items():
+            if name in meta_arguments:
+                continue
+            
+            if name not in attributes:
+                detail = f"An argument named \"{name}\" is not expected here."
+                if name in block_types:
+                    detail += f" Did you mean to define a block of type \"{name}\"?"
+                report("Unsupported argument", detail, attribute.line, address, attribute.end_line)
+                continue
+            
+            attribute_schema = attributes[name]
+            if attribute_schema.get("computed") and not (attribute_schema.get("optional") or attribute_schema.get("required")):
+                report(
+                    "Value for unconfigurable attribute",
+                    f"Can't configure a value for \"{name}\": its value will be decided automatically "
+                    "based on the result of applying this configuration.",
+                    attribute.line,
+                    address,
+                    attribute.end_line
+                )
+        
+        if enforce_required:
+            for name, attribute_schema in attributes.items():
+                if attribute_schema.get("required") and name not in block.attributes:
+                    report(
+                        "Missing required argument",
+                        f"The argument \"{name}\" is required, but no definition was found.",
+                        block.line,
+                        address,
+                        block.end_line
+                    )
+        
+        block_counts: Dict[str, int] = {}
+        for nested in block.blocks:
+            if nested.type in meta_blocks:
+                continue
+            
+            nested_type = nested.type
+            nested_body = nested
+            if nested.type == "dynamic" and nested.labels:
+                nested_type = nested.labels[0]
+                content = [b for b in nested.blocks if b.type == "content"]
+                nested_body = content[0] if content else None
+            
+            if nested_type not in block_types:
+                detail = f"Blocks of type \"{nested_type}\" are not expected here."
+                if nested_type in attributes:
+                    detail += f" Did you mean to define argument \"{nested_type}\"? If so, use the equals sign to assign it a value."
+                report("Unsupported block type", detail, nested.line, address)
+                continue
+            
+            block_counts[nested_type] = block_counts.get(nested_type, 0) + 1
+            if nested_body is not None:
+                self._check_body(nested_body, block_types[nested_type].get("block") or {}, address, report)
+        
+        if enforce_required:
+            for name, block_schema in block_types.items():
+                min_items = block_schema.get("min_items", 0)
+                if min_items and block_counts.get(name, 0) < min_items:
+                    report(
+                        f"Insufficient {name} blocks",
+                        f"At least {min_items} \"{name}\" blocks are required.",
+                        block.line,
+                        address,
+                        block.end_line
+                    )
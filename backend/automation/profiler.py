@@ -0,0 +1,195 @@
+"""Sampling profiler for runs (no external profiler needed)
+
+A background thread snapshots the stacks of all threads in the process at a
+fixed interval. Every sample counts towards the wall-clock profile (where
+threads spend their time, including I/O waits); samples of threads that
+used CPU since the previous sample (per-thread CPU time from /proc on
+Linux) also count towards the CPU profile. That covers both the sweep
+itself, which mostly waits on LLM calls and Terraform, and CPU spikes in
+other threads of the API server.
+
+Output per profile directory:
+    wall.folded / cpu.folded   collapsed stacks ("thread;outer;...;inner count"),
+                               for flamegraph.pl, speedscope or inferno
+    summary.json / summary.txt top functions by self and cumulative samples
+"""
+import sys
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.01
+MAX_DEPTH = 128
+
+def _frame_label(code) -> str:
+    """function (dir/file.py:line) with the path shortened to two components"""
+    path = Path(code.co_filename)
+    short = "/".join(path.parts[-2:]) if len(path.parts) > 1 else code.co_filename
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+def _thread_cpu_ticks(native_id: int) -> Optional[int]:
+    """User + system clock ticks of a thread, None where /proc is unavailable"""
+    try:
+        with open(f"/proc/self/task/{native_id}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    # Fields after the command name start at 'state' (field 3); utime and stime are 14 and 15
+    return int(fields[11]) + int(fields[12])
+
+class SamplingProfiler:
+    """Statistical profiler over all threads of the process
+    
+    Usage:
+        profiler = SamplingProfiler()
+        with profiler:
+            run()
+        profiler.write(out_dir)
+    """
+    
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.wall: Counter = Counter()
+        self.cpu: Counter = Counter()
+        self.thread_samples: Counter = Counter()
+        self.samples = 0
+        self.cpu_ticks: Dict[int, int] = {}
+        self.start_time: Optional[float] = None
+        self.duration = 0.0
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self.start_time = time.time()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.duration += time.time() - self.start_time
+    
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+    
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                # A sampling error must never take down the run
+                logger.debug(f"Profiler sample failed: {e}")
+    
+    def _sample(self):
+        own_ident = threading.get_ident()
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+        self.samples += 1
+        
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            thread = threads.get(ident)
+            name = thread.name if thread else f"thread-{ident}"
+            
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            folded = ";".join([name] + stack[::-1])
+            
+            self.wall[folded] += 1
+            self.thread_samples[name] += 1
+            
+            native_id = getattr(thread, "native_id", None)
+            ticks = _thread_cpu_ticks(native_id) if native_id else None
+            if ticks is not None:
+                if ticks > self.cpu_ticks.get(native_id, ticks):
+                    self.cpu[folded] += 1
+                self.cpu_ticks[native_id] = ticks
+    
+    def _top(self, stacks: Counter, top: int) -> Dict[str, List[Dict]]:
+        """Functions with the most self (innermost frame) and cumulative samples"""
+        self_counts: Counter = Counter()
+        cumulative: Counter = Counter()
+        for folded, count in stacks.items():
+            frames = folded.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                cumulative[label] += count
+        
+        total = sum(stacks.values()) or 1
+        def rows(counter: Counter) -> List[Dict]:
+            return [
+                {"function": label, "samples": count, "percent": round(100 * count / total, 1)}
+                for label, count in counter.most_common(top)
+            ]
+        return {"self": rows(self_counts), "cumulative": rows(cumulative)}
+    
+    def summary(self, top: int = 25) -> Dict:
+        """Sampling statistics and top-N functions for the wall and CPU profiles"""
+        return {
+            "interval_seconds": self.interval,
+            "duration_seconds": round(self.duration, 2),
+            "samples": self.samples,
+            "wall_samples": sum(self.wall.values()),
+            "cpu_samples": sum(self.cpu.values()),
+            "threads": dict(self.thread_samples.most_common()),
+            "wall": self._top(self.wall, top),
+            "cpu": self._top(self.cpu, top)
+        }
+    
+    def write(self, out_dir: Path, top: int = 25) -> Dict[str, str]:
+        """Write collapsed stacks and summaries
+        
+        Args:
+            out_dir: Directory for the profile files
+            top: Functions listed per summary table
+        
+        Returns:
+            Dict mapping wall, cpu, summary and summary_text to file paths
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for kind, stacks in (("wall", self.wall), ("cpu", self.cpu)):
+            path = out_dir / f"{kind}.folded"
+            path.write_text("".join(f"{folded} {count}\n" for folded, count in stacks.most_common()))
+            paths[kind] = str(path)
+        
+        summary = self.summary(top)
+        (out_dir / "summary.json").write_text(json.dumps(summary, indent=2))
+        (out_dir / "summary.txt").write_text(format_summary(summary))
+        paths["summary"] = str(out_dir / "summary.json")
+        paths["summary_text"] = str(out_dir / "summary.txt")
+        logger.info(f"Profile written to {out_dir} ({self.samples} samples)")
+        return paths
+
+def format_summary(summary: Dict, top: int = 15) -> str:
+    """Human-readable top-N tables of a profile summary"""
+    lines = [
+        f"Profile: {summary['duration_seconds']}s, {summary['samples']} samples every "
+        f"{summary['interval_seconds'] * 1000:.0f}ms ({summary['cpu_samples']} on CPU)",
+        "Threads: " + ", ".join(f"{name} ({count})" for name, count in summary["threads"].items())
+    ]
+    for kind, title in (("cpu", "On-CPU"), ("wall", "Wall clock")):
+        for order in ("self", "cumulative"):
+            lines.append("")
+            lines.append(f"{title}, {order}:")
+            for row in summary[kind][order][:top]:
+                lines.append(f"  {row['percent']:>5.1f}%  {row['samples']:>7}  {row['function']}")
+    return "\n".join(lines) + "\n"
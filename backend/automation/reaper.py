@@ -0,0 +1,164 @@
+"""Background terraform destroy with leases on the host resources being freed"""
+import re
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from . import hcl_scanner
+from .capacity import HostCapacity
+
+logger = logging.getLogger(__name__)
+
+COUNT_INDEX_PATTERN = re.compile(r'\$\{\s*count\.index\s*(?:\+\s*(\d+))?\s*\}')
+
+def vm_names_from_code(code: str) -> Set[str]:
+    """Best-effort list of VM names a configuration manages
+    
+    Handles literal name_label values and the common
+    `"web-0${count.index + 1}"` pattern with a literal count.
+    
+    Args:
+        code: Terraform configuration
+    
+    Returns:
+        Set of VM names
+    """
+    try:
+        root = hcl_scanner.parse(code)
+    except hcl_scanner.HCLSyntaxError:
+        return set()
+    
+    names = set()
+    for block in hcl_scanner.find_blocks(root, "resource", "xenorchestra_vm"):
+        name_label = block.attributes.get("name_label")
+        if not name_label or not (name_label.expression.startswith('"') and name_label.expression.endswith('"')):
+            continue
+        template = name_label.expression[1:-1]
+        
+        count = block.attributes.get("count")
+        if count and count.expression.isdigit():
+            for index in range(int(count.expression)):
+                names.add(COUNT_INDEX_PATTERN.sub(lambda m: str(index + int(m.group(1) or 0)), template))
+        elif "${" not in template:
+            names.add(template)
+    
+    return names
+
+@dataclass
+class ResourceLease:
+    """Host resources held by a workspace until its destroy finishes"""
+    work_dir: Path
+    vm_names: Set[str] = field(default_factory=set)
+
+class DestroyReaper:
+    """Run terraform destroy in the background
+    
+    Each destroy holds a lease on its workspace and VM names. Callers that need
+    those resources (an apply creating a VM with the same name) wait on the
+    lease; everything else proceeds in parallel with the teardown. RAM is
+    accounted for by the HostCapacity controller, whose reservations are
+    released once a destroy succeeds.
+    """
+    
+    def __init__(self, capacity: Optional[HostCapacity] = None, max_workers: int = 2):
+        self.capacity = capacity
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reaper")
+        self.condition = threading.Condition()
+        self.leases: List[ResourceLease] = []
+        self.results: List[Dict] = []
+    
+    def submit(self, terraform, lease: ResourceLease) -> Future:
+        """Schedule a destroy and take a lease on its resources
+        
+        Args:
+            terraform: TerraformExecutor of the workspace to destroy
+            lease: Resources held until the destroy finishes
+        
+        Returns:
+            Future resolving to the destroy result
+        """
+        with self.condition:
+            self.leases.append(lease)
+        if self.capacity:
+            self.capacity.expect_release()
+        
+        logger.info(f"Scheduled background destroy of {lease.work_dir} ({len(lease.vm_names)} VM(s))")
+        # Run in a copy of the caller's context so the destroy joins the caller's trace
+        return self.executor.submit(contextvars.copy_context().run, self._destroy, terraform, lease)
+    
+    def _destroy(self, terraform, lease: ResourceLease) -> Dict:
+        """Run the destroy and release the lease"""
+        try:
+            result = terraform.destroy()
+        except Exception as e:
+            result = {"status": "failed", "error_message": f"Unexpected error: {e}"}
+        
+        if result["status"] == "success":
+            logger.info(f"✅ VMs destroyed successfully ({lease.work_dir})")
+        else:
+            logger.warning(f"⚠️ VM cleanup failed ({lease.work_dir}): {result['error_message']}")
+        if self.capacity:
+            self.capacity.release(lease.work_dir, lease.vm_names if result["status"] == "success" else ())
+        
+        with self.condition:
+            self.leases.remove(lease)
+            self.results.append({
+                "work_dir": str(lease.work_dir),
+                "status": result.get("status"),
+                "execution_time_seconds": result.get("execution_time_seconds"),
+                "error_message": result.get("error_message")
+            })
+            self.condition.notify_all()
+        
+        return result
+    
+    def _conflicts(self, vm_names: Set[str], work_dir: Optional[Path]) -> bool:
+        """Whether any pending lease holds resources the caller needs"""
+        return any(
+            (work_dir is not None and Path(work_dir) == lease.work_dir) or vm_names & lease.vm_names
+            for lease in self.leases
+        )
+    
+    def wait_for(
+        self,
+        vm_names: Optional[Set[str]] = None,
+        work_dir: Optional[Path] = None,
+        timeout: Optional[float] = None
+    ) -> float:
+        """Block until no pending destroy holds the requested resources
+        
+        Args:
+            vm_names: VM names about to be created
+            work_dir: Workspace about to be reused
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        
+        Returns:
+            Seconds spent waiting
+        """
+        vm_names = set(vm_names or ())
+        start_time = time.time()
+        
+        with self.condition:
+            if self._conflicts(vm_names, work_dir):
+                logger.info("Waiting for background destroy to release resources...")
+                self.condition.wait_for(lambda: not self._conflicts(vm_names, work_dir), timeout=timeout)
+        
+        return round(time.time() - start_time, 2)
+    
+    def drain(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Wait for all pending destroys
+        
+        Args:
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            Results of all destroys run so far
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: not self.leases, timeout=timeout)
+            return list(self.results)
@@ -0,0 +1,268 @@
+"""Shared scheduling of LLM requests and Terraform commands across runs
+
+Concurrent runs (API runs, sweeps) share one Scheduler, which bounds:
+    - in-flight LLM requests per model (model_concurrency)
+    - request rate per provider, the part of the model id before '/'
+      (provider_rpm, token buckets)
+    - concurrently running Terraform commands (terraform_slots), including
+      background destroys and fixture provisioning
+
+A freed slot goes to the waiting run that currently holds the fewest slots
+of that kind (ties to the run served least recently), so a sweep with many
+queued requests cannot starve a single-task run started from the dashboard.
+
+Like tracing, scheduling is bound to a context: the orchestrator activates
+the scheduler for a run, and OpenRouterClient and TerraformExecutor take
+their slots from whatever scheduler is active (none outside a run):
+
+    with scheduler.activate(run_id):
+        with scheduling.terraform_slot():
+            ...
+"""
+import os
+import time
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import metrics
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_CONCURRENCY = 4
+DEFAULT_TERRAFORM_SLOTS = 4
+
+_active: ContextVar[Optional[Tuple["Scheduler", str]]] = ContextVar("active_scheduler", default=None)
+
+def provider_of(model: str) -> str:
+    """Provider part of an OpenRouter model id ('deepseek/deepseek-r1' -> 'deepseek')"""
+    return model.split("/", 1)[0] if "/" in model else model
+
+def _parse_limits(value: Optional[str]) -> Dict[str, float]:
+    """'deepseek=30,google=60' -> {'deepseek': 30.0, 'google': 60.0}"""
+    limits = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            key, limit = item.split("=", 1)
+            limits[key.strip()] = float(limit)
+    return limits
+
+class _Pool:
+    """Slots of one kind, granted to waiting runs in fair order"""
+    
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_use = 0
+        self.held: Dict[str, int] = {}
+        self.waiting: List[Tuple[int, str]] = []
+        self.last_grant: Dict[str, int] = {}
+    
+    def next_ticket(self) -> Optional[Tuple[int, str]]:
+        """Waiting ticket to serve next: fewest held slots, then least recently served run"""
+        if not self.waiting:
+            return None
+        return min(self.waiting, key=lambda ticket: (
+            self.held.get(ticket[1], 0), self.last_grant.get(ticket[1], -1), ticket[0]
+        ))
+
+class _RateLimit:
+    """Token bucket of requests per minute (burst: up to one second's worth, at least 1)"""
+    
+    def __init__(self, requests_per_minute: float):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def take(self) -> float:
+        """Take a token if one is available
+        
+        Returns:
+            0 when a token was taken, otherwise seconds until the next one
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class Scheduler:
+    """Concurrency limits, rate limits and fair queuing shared by runs"""
+    
+    def __init__(
+        self,
+        model_concurrency: int = DEFAULT_MODEL_CONCURRENCY,
+        model_limits: Optional[Dict[str, int]] = None,
+        provider_rpm: Optional[Dict[str, float]] = None,
+        terraform_slots: int = DEFAULT_TERRAFORM_SLOTS
+    ):
+        """Create a scheduler
+        
+        Args:
+            model_concurrency: In-flight LLM requests per model
+            model_limits: Per-model overrides of model_concurrency (by model id)
+            provider_rpm: Requests per minute per provider (unlimited if absent)
+            terraform_slots: Terraform commands running at once
+        """
+        self.model_concurrency = model_concurrency
+        self.model_limits = model_limits or {}
+        self.terraform_slots = terraform_slots
+        self.condition = threading.Condition()
+        self.tickets = itertools.count()
+        self.grants = itertools.count()
+        self.pools: Dict[str, _Pool] = {}
+        self.rate_limits = {provider: _RateLimit(rpm) for provider, rpm in (provider_rpm or {}).items()}
+        self.runs: Dict[str, int] = {}
+    
+    @classmethod
+    def from_env(cls) -> "Scheduler":
+        """Scheduler configured from the environment
+        
+        SCHEDULER_MODEL_CONCURRENCY (default 4), SCHEDULER_MODEL_LIMITS
+        ('deepseek/deepseek-r1=2,...'), SCHEDULER_PROVIDER_RPM
+        ('deepseek=30,google=60') and SCHEDULER_TERRAFORM_SLOTS (default 4)
+        """
+        return cls(
+            model_concurrency=int(os.getenv("SCHEDULER_MODEL_CONCURRENCY", DEFAULT_MODEL_CONCURRENCY)),
+            model_limits={model: int(limit) for model, limit in _parse_limits(os.getenv("SCHEDULER_MODEL_LIMITS")).items()},
+            provider_rpm=_parse_limits(os.getenv("SCHEDULER_PROVIDER_RPM")),
+            terraform_slots=int(os.getenv("SCHEDULER_TERRAFORM_SLOTS", DEFAULT_TERRAFORM_SLOTS))
+        )
+    
+    @contextmanager
+    def activate(self, run_id: str) -> Iterator["Scheduler"]:
+        """Schedule the LLM requests and Terraform commands of this context as run_id
+        
+        Threads started with a copy of the context (e.g. background destroys)
+        are scheduled as the same run.
+        """
+        with self.condition:
+            self.runs[run_id] = self.runs.get(run_id, 0) + 1
+        token = _active.set((self, run_id))
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+            with self.condition:
+                self.runs[run_id] -= 1
+                if not self.runs[run_id]:
+                    del self.runs[run_id]
+                    for pool in self.pools.values():
+                        pool.last_grant.pop(run_id, None)
+    
+    def _pool(self, name: str, limit: int) -> _Pool:
+        pool = self.pools.get(name)
+        if pool is None:
+            pool = self.pools[name] = _Pool(name, limit)
+        return pool
+    
+    @contextmanager
+    def slot(self, name: str, limit: int, run_id: str) -> Iterator[float]:
+        """Hold one slot of a pool for the block
+        
+        Args:
+            name: Pool name (e.g. 'terraform', 'llm:deepseek/deepseek-r1')
+            limit: Slots in the pool
+            run_id: Run requesting the slot
+        
+        Yields:
+            Seconds waited for the slot
+        """
+        start_time = time.time()
+        with self.condition:
+            pool = self._pool(name, limit)
+            ticket = (next(self.tickets), run_id)
+            pool.waiting.append(ticket)
+            granted = lambda: pool.in_use < pool.limit and pool.next_ticket() == ticket
+            if not granted():
+                logger.debug(f"Run {run_id} queued for {name} ({pool.in_use}/{pool.limit} in use)")
+                with tracing.span("scheduler.wait", queue=name, waiting=len(pool.waiting)):
+                    self.condition.wait_for(granted)
+            pool.waiting.remove(ticket)
+            pool.in_use += 1
+            pool.held[run_id] = pool.held.get(run_id, 0) + 1
+            pool.last_grant[run_id] = next(self.grants)
+            # The next ticket in line may fit as well
+            self.condition.notify_all()
+        
+        waited = time.time() - start_time
+        metrics.SCHEDULER_WAIT_SECONDS.observe(waited, queue=name)
+        try:
+            yield waited
+        finally:
+            with self.condition:
+                pool.in_use -= 1
+                pool.held[run_id] -= 1
+                if not pool.held[run_id]:
+                    del pool.held[run_id]
+                self.condition.notify_all()
+    
+    def throttle(self, provider: str) -> float:
+        """Wait for the provider's rate limit (no-op without one)
+        
+        Returns:
+            Seconds waited
+        """
+        rate_limit = self.rate_limits.get(provider)
+        if rate_limit is None:
+            return 0.0
+        
+        start_time = time.time()
+        with self.condition:
+            delay = rate_limit.take()
+            while delay:
+                self.condition.wait(timeout=delay)
+                delay = rate_limit.take()
+        
+        waited = time.time() - start_time
+        metrics.SCHEDULER_WAIT_SECONDS.observe(waited, queue=f"rate:{provider}")
+        return waited
+    
+    def status(self) -> Dict:
+        """Active runs and, per pool, slots in use, holders and queued requests per run"""
+        with self.condition:
+            pools = {}
+            for name, pool in self.pools.items():
+                waiting: Dict[str, int] = {}
+                for _, run_id in pool.waiting:
+                    waiting[run_id] = waiting.get(run_id, 0) + 1
+                pools[name] = {"limit": pool.limit, "in_use": pool.in_use, "held": dict(pool.held), "waiting": waiting}
+            return {
+                "runs": sorted(self.runs),
+                "pools": pools,
+                "provider_rpm": {provider: round(limit.rate * 60, 2) for provider, limit in self.rate_limits.items()}
+            }
+
+@contextmanager
+def llm_slot(model: str) -> Iterator[float]:
+    """Hold one of the model's LLM request slots (no-op outside a scheduled run)"""
+    active = _active.get()
+    if active is None:
+        yield 0.0
+        return
+    scheduler, run_id = active
+    with scheduler.slot(f"llm:{model}", scheduler.model_limits.get(model, scheduler.model_concurrency), run_id) as waited:
+        yield waited
+
+def throttle(model: str) -> float:
+    """Wait for the rate limit of the model's provider (no-op outside a scheduled run)"""
+    active = _active.get()
+    return active[0].throttle(provider_of(model)) if active else 0.0
+
+@contextmanager
+def terraform_slot() -> Iterator[float]:
+    """Hold one of the Terraform command slots (no-op outside a scheduled run)"""
+    active = _active.get()
+    if active is None:
+        yield 0.0
+        return
+    scheduler, run_id = active
+    with scheduler.slot("terraform", scheduler.terraform_slots, run_id) as waited:
+        yield waited
@@ -0,0 +1,76 @@
+"""Offline stand-ins for the external services the pipeline drives
+
+FakeXOServer replaces the Xen Orchestra host, fake_terraform.py replaces
+the terraform binary with the xenorchestra provider and FakeLLMServer
+replaces OpenRouter, so the whole pipeline can run without network access,
+API credits or real infrastructure.
+"""
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+from .xo_server import FakeXOServer, StandinError
+from .llm_server import FakeLLMServer, ScriptedModel
+
+FAKE_TERRAFORM = Path(__file__).parent / "fake_terraform.py"
+
+def fake_terraform_command() -> str:
+    """TERRAFORM_BIN value that runs the fake terraform CLI"""
+    return f'"{sys.executable}" "{FAKE_TERRAFORM}"'
+
+def start_offline_xo(
+    latency_seconds: float = 0.0,
+    failure_rate: float = 0.0,
+    total_ram_gb: float = 20,
+    seed: Optional[int] = None
+) -> FakeXOServer:
+    """Start a fake XO server and point Terraform and XO clients at it
+    
+    Sets TERRAFORM_BIN, XO_STANDIN_URL and XO_URL for this process and its
+    children, so executors and XenScreenshot created afterwards use the
+    stand-in.
+    
+    Args:
+        latency_seconds: Delay added to every VM operation
+        failure_rate: Probability (0-1) that a VM operation fails
+        total_ram_gb: Host RAM available to VMs
+        seed: Seed for failure injection
+    
+    Returns:
+        The running FakeXOServer
+    """
+    server = FakeXOServer(
+        latency_seconds=latency_seconds,
+        failure_rate=failure_rate,
+        total_ram_gb=total_ram_gb,
+        seed=seed
+    ).start()
+    
+    os.environ["TERRAFORM_BIN"] = fake_terraform_command()
+    os.environ["XO_STANDIN_URL"] = server.url
+    os.environ["XO_URL"] = server.url
+    return server
+
+
+def start_fake_llm(model: Optional[ScriptedModel] = None, **options) -> FakeLLMServer:
+    """Start a fake OpenRouter server and point OpenRouterClient at it
+    
+    Sets OPENROUTER_BASE_URL (and a placeholder OPENROUTER_API_KEY when
+    neither it nor OPENROUTER_API_KEYS is set) for this process, so clients
+    created afterwards use the stand-in. LocalLLMClient uses it too unless
+    LOCAL_LLM_BASE_URL is set.
+    
+    Args:
+        model: Response script (default: canned answers per task)
+        **options: FakeLLMServer options (latency_seconds, rate_limit_rate, ...)
+    
+    Returns:
+        The running FakeLLMServer
+    """
+    server = FakeLLMServer(model=model, **options).start()
+    os.environ["OPENROUTER_BASE_URL"] = server.url
+    os.environ.setdefault("LOCAL_LLM_BASE_URL", server.url)
+    if not os.getenv("OPENROUTER_API_KEYS"):
+        os.environ.setdefault("OPENROUTER_API_KEY", "standin")
+    return server
@@ -0,0 +1,679 @@
+#!/usr/bin/env python3
+"""Fake terraform CLI backed by the fake XO server
+
+Implements the commands TerraformExecutor runs (init, validate, plan, show,
+apply, destroy, providers schema, output) for configurations using the
+xenorchestra provider. Configurations are scanned with hcl_scanner and the
+provider schema is checked by the pre-flight validator; VM changes go to the
+XO REST API, so the stand-in server sees the same VMs Terraform manages.
+
+Point TerraformExecutor at it with:
+
+    TERRAFORM_BIN="python /path/to/backend/automation/standin/fake_terraform.py"
+    XO_STANDIN_URL="http://127.0.0.1:<port>"
+"""
+import os
+import re
+import ast
+import sys
+import json
+import uuid
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from automation import hcl_scanner
+from automation.preflight import PreflightValidator
+from automation.standin.provider_schema import PROVIDER_SOURCE, schema_document
+
+STATE_FILE = "terraform.tfstate"
+SCHEMA_FILE = Path(".terraform") / "standin_schema.json"
+PROVIDER_ADDRESS = f'provider["{PROVIDER_SOURCE}"]'
+TERRAFORM_VERSION = "1.6.6-standin"
+
+# Data source type -> XO REST collection
+DATA_COLLECTIONS = {
+    "xenorchestra_pool": "pools",
+    "xenorchestra_template": "vm-templates",
+    "xenorchestra_network": "networks",
+    "xenorchestra_sr": "srs",
+    "xenorchestra_host": "hosts",
+    "xenorchestra_vm": "vms"
+}
+
+# Attributes compared between configuration and state
+VM_ATTRIBUTES = ("name_label", "cpus", "memory_max", "template", "disks")
+
+INTERPOLATION_PATTERN = re.compile(r'\$\{([^}]*)\}')
+
+class Unknown:
+    """Value that cannot be evaluated offline"""
+    
+    def __repr__(self):
+        return "(known after apply)"
+
+UNKNOWN = Unknown()
+
+class ConfigError(Exception):
+    """An error diagnostic"""
+    
+    def __init__(self, summary: str, detail: str, line: Optional[int] = None, address: Optional[str] = None):
+        super().__init__(summary)
+        self.summary = summary
+        self.detail = detail
+        self.line = line
+        self.address = address
+
+class Evaluator:
+    """Evaluate the subset of HCL expressions used for VM sizing and naming"""
+    
+    FUNCTIONS = {"toset": lambda v: sorted(set(v)), "tolist": list, "tonumber": float, "tostring": str}
+    
+    def __init__(self, root: hcl_scanner.Block, data: Dict[str, Dict]):
+        self.root = root
+        self.data = data
+        self.variables = {}
+        self.locals = {}
+        
+        for block in hcl_scanner.find_blocks(root, "variable"):
+            default = block.attributes.get("default")
+            self.variables[block.labels[0]] = self.evaluate(default.expression) if default else UNKNOWN
+        for block in hcl_scanner.find_blocks(root, "locals"):
+            for name, attribute in block.attributes.items():
+                self.locals[name] = self.evaluate(attribute.expression)
+    
+    def evaluate(self, expression: str, each: Optional[Dict] = None):
+        """Evaluate an expression, returning UNKNOWN when it is out of scope"""
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError:
+            return UNKNOWN
+        try:
+            return self._node(tree.body, each or {})
+        except (TypeError, ValueError, ZeroDivisionError, IndexError, KeyError):
+            return UNKNOWN
+    
+    def _reference(self, parts: List[str], each: Dict):
+        root = parts[0]
+        if root == "var":
+            if parts[1] not in self.variables:
+                raise ConfigError(
+                    "Reference to undeclared input variable",
+                    f"An input variable with the name \"{parts[1]}\" has not been declared."
+                )
+            return self.variables[parts[1]]
+        if root == "local":
+            return self.locals.get(parts[1], UNKNOWN)
+        if root in ("count", "each"):
+            return each.get(".".join(parts[:2]), UNKNOWN)
+        if root == "data":
+            address = ".".join(parts[:3])
+            if address not in self.data:
+                raise ConfigError(
+                    "Reference to undeclared resource",
+                    f"A data resource \"{parts[1]}\" \"{parts[2]}\" has not been declared in the root module."
+                )
+            return self.data[address].get(parts[3], UNKNOWN) if len(parts) > 3 else UNKNOWN
+        return UNKNOWN
+    
+    def _node(self, node, each: Dict):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, str):
+                return self._template(node.value, each)
+            return node.value
+        if isinstance(node, ast.Name):
+            return {"true": True, "false": False, "null": None}.get(node.id, UNKNOWN)
+        if isinstance(node, ast.Attribute):
+            parts = []
+            while isinstance(node, ast.Attribute):
+                parts.insert(0, node.attr)
+                node = node.value
+            if not isinstance(node, ast.Name):
+                return UNKNOWN
+            return self._reference([node.id] + parts, each)
+        if isinstance(node, ast.List):
+            return [self._node(element, each) for element in node.elts]
+        if isinstance(node, ast.Subscript):
+            value = self._node(node.value, each)
+            index = self._node(node.slice, each)
+            return UNKNOWN if Unknown in (type(value), type(index)) else value[int(index) if isinstance(value, list) else index]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            value = self._node(node.operand, each)
+            return UNKNOWN if isinstance(value, Unknown) else -value
+        if isinstance(node, ast.BinOp):
+            left, right = self._node(node.left, each), self._node(node.right, each)
+            if isinstance(left, Unknown) or isinstance(right, Unknown):
+                return UNKNOWN
+            operators = {ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b, ast.Mult: lambda a, b: a * b,
+                         ast.Div: lambda a, b: a / b, ast.Mod: lambda a, b: a % b}
+            operator = operators.get(type(node.op))
+            return operator(left, right) if operator else UNKNOWN
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in self.FUNCTIONS:
+            arguments = [self._node(argument, each) for argument in node.args]
+            if len(arguments) != 1 or isinstance(arguments[0], Unknown):
+                return UNKNOWN
+            return self.FUNCTIONS[node.func.id](arguments[0])
+        return UNKNOWN
+    
+    def _template(self, template: str, each: Dict):
+        """Render ${...} interpolations in a string"""
+        def render(match):
+            value = self.evaluate(match.group(1).strip(), each)
+            if isinstance(value, Unknown):
+                raise ValueError("unknown interpolation")
+            return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+        
+        if "${" not in template:
+            return template
+        try:
+            return INTERPOLATION_PATTERN.sub(render, template)
+        except ValueError:
+            return UNKNOWN
+
+class FakeTerraform:
+    """One invocation of the fake terraform CLI in a workspace"""
+    
+    def __init__(self, work_dir: Path):
+        self.work_dir = Path(work_dir)
+        self.code = ""
+        self.lines: List[str] = []
+    
+    def _diagnostic(self, error: ConfigError) -> Dict:
+        line = error.line or 1
+        return {
+            "severity": "error",
+            "summary": error.summary,
+            "detail": error.detail,
+            "address": error.address,
+            "range": {"filename": "main.tf", "start": {"line": line}, "end": {"line": line}},
+            "snippet": {"code": self.lines[line - 1] if 0 < line <= len(self.lines) else "", "context": None}
+        }
+    
+    def _print_text_error(self, error: ConfigError):
+        """Print an error the way terraform does without -json"""
+        message = f"\nError: {error.summary}\n\n"
+        if error.address:
+            message += f"  with {error.address},\n"
+        if error.line:
+            snippet = self.lines[error.line - 1] if 0 < error.line <= len(self.lines) else ""
+            message += f"  on main.tf line {error.line}:\n  {error.line}: {snippet}\n\n"
+        message += f"{error.detail}\n"
+        sys.stderr.write(message)
+    
+    def _print_json(self, level: str, message_type: str, message: str, **fields):
+        print(json.dumps({"@level": level, "@message": message, "@module": "terraform.ui", "type": message_type, **fields}))
+    
+    def _load_config(self) -> hcl_scanner.Block:
+        files = sorted(self.work_dir.glob("*.tf"))
+        if not files:
+            raise ConfigError("No configuration files", "Apply requires configuration to be present.")
+        self.code = "\n".join(path.read_text() for path in files)
+        self.lines = self.code.split('\n')
+        try:
+            return hcl_scanner.parse(self.code)
+        except hcl_scanner.HCLSyntaxError as e:
+            raise ConfigError(e.summary, e.detail, e.line)
+    
+    def _state(self) -> Dict:
+        state_path = self.work_dir / STATE_FILE
+        if state_path.exists():
+            return json.loads(state_path.read_text())
+        return {"version": 4, "terraform_version": TERRAFORM_VERSION, "serial": 0,
+                "lineage": str(uuid.uuid4()), "outputs": {}, "resources": []}
+    
+    def _save_state(self, state: Dict):
+        state["serial"] = state.get("serial", 0) + 1
+        (self.work_dir / STATE_FILE).write_text(json.dumps(state, indent=2))
+    
+    def _state_instances(self, state: Dict) -> Dict[str, Dict]:
+        """address -> state attributes of managed VMs"""
+        instances = {}
+        for resource in state.get("resources", []):
+            if resource.get("mode") != "managed" or resource.get("type") != "xenorchestra_vm":
+                continue
+            for instance in resource.get("instances", []):
+                address = _address(resource["name"], instance.get("index_key"))
+                instances[address] = instance["attributes"]
+        return instances
+    
+    def _xo_url(self, root: Optional[hcl_scanner.Block]) -> str:
+        url = os.getenv("XO_STANDIN_URL")
+        if not url and root:
+            for block in hcl_scanner.find_blocks(root, "provider", "xenorchestra"):
+                if "url" in block.attributes:
+                    url = ast.literal_eval(block.attributes["url"].expression)
+        url = url or os.getenv("XOA_URL") or "http://localhost:8080"
+        return re.sub(r'^ws(s?)://', r'http\1://', url).rstrip('/')
+    
+    def _request(self, url: str, method: str = "GET", body: Optional[Dict] = None, missing_ok: bool = False):
+        request = urllib.request.Request(
+            url,
+            method=method,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                raw = response.read().decode()
+                return json.loads(raw) if raw else None
+        except urllib.error.HTTPError as e:
+            if missing_ok and e.code == 404:
+                return None
+            try:
+                message = json.loads(e.read().decode()).get("error", str(e))
+            except ValueError:
+                message = str(e)
+            raise ConfigError(message, f"{method} {url} returned HTTP {e.code}")
+        except urllib.error.URLError as e:
+            raise ConfigError("Failed to connect to Xen Orchestra", f"{url}: {e.reason}")
+    
+    def _refresh(self, instances: Dict[str, Dict], xo_url: str) -> Dict[str, Dict]:
+        """Drop state instances whose VM no longer exists in XO, like terraform's refresh
+        
+        Returns:
+            address -> attributes of the dropped instances
+        """
+        missing = {}
+        for address, attributes in list(instances.items()):
+            if attributes.get("id") and self._request(f"{xo_url}/rest/v0/vms/{attributes['id']}", missing_ok=True) is None:
+                missing[address] = instances.pop(address)
+        return missing
+    
+    def _read_data_sources(self, root: hcl_scanner.Block, xo_url: str) -> Dict[str, Dict]:
+        """Look up every data source by name_label"""
+        data = {}
+        collections = {}
+        pending = []
+        for block in hcl_scanner.find_blocks(root, "data"):
+            if len(block.labels) == 2:
+                data[f"data.{block.labels[0]}.{block.labels[1]}"] = {}
+                pending.append(block)
+        
+        evaluator = Evaluator(root, data)
+        for block in pending:
+            data_type, name = block.labels
+            address = f"data.{data_type}.{name}"
+            collection = DATA_COLLECTIONS.get(data_type)
+            name_label = block.attributes.get("name_label")
+            if not collection or not name_label:
+                continue
+            
+            label = evaluator.evaluate(name_label.expression)
+            if collection not in collections:
+                collections[collection] = self._request(f"{xo_url}/rest/v0/{collection}?fields=name_label")
+            match = next((o for o in collections[collection] if o.get("name_label") == label), None)
+            if not match:
+                raise ConfigError(
+                    f"No {data_type.split('_', 1)[1]} found",
+                    f"Could not find {data_type} with name_label \"{label}\"",
+                    block.line,
+                    address
+                )
+            data[address] = {"id": match["id"], "name_label": label}
+        return data
+    
+    def _desired_vms(self, root: hcl_scanner.Block, evaluator: Evaluator) -> Dict[str, Dict]:
+        """address -> planned attributes for every VM instance in the configuration"""
+        desired = {}
+        for block in hcl_scanner.find_blocks(root, "resource", "xenorchestra_vm"):
+            name = block.labels[1]
+            keys: List = [None]
+            
+            if "count" in block.attributes:
+                count = evaluator.evaluate(block.attributes["count"].expression)
+                if isinstance(count, Unknown):
+                    raise ConfigError(
+                        "Invalid count argument",
+                        "The \"count\" value depends on values that cannot be determined until apply.",
+                        block.attributes["count"].line,
+                        f"xenorchestra_vm.{name}"
+                    )
+                keys = list(range(int(count)))
+            elif "for_each" in block.attributes:
+                for_each = evaluator.evaluate(block.attributes["for_each"].expression)
+                if not isinstance(for_each, (list, dict)):
+                    raise ConfigError(
+                        "Invalid for_each argument",
+                        "The \"for_each\" value depends on values that cannot be determined until apply.",
+                        block.attributes["for_each"].line,
+                        f"xenorchestra_vm.{name}"
+                    )
+                keys = list(for_each)
+            
+            for key in keys:
+                each = {}
+                if isinstance(key, int):
+                    each = {"count.index": key}
+                elif key is not None:
+                    each = {"each.key": key, "each.value": for_each[key] if isinstance(for_each, dict) else key}
+                
+                attributes = {
+                    attribute: evaluator.evaluate(block.attributes[attribute].expression, each)
+                    for attribute in ("name_label", "cpus", "memory_max", "template")
+                    if attribute in block.attributes
+                }
+                attributes["disks"] = [
+                    {
+                        "name_label": evaluator.evaluate(disk.attributes["name_label"].expression, each)
+                        if "name_label" in disk.attributes else None,
+                        "size": evaluator.evaluate(disk.attributes["size"].expression, each)
+                        if "size" in disk.attributes else None
+                    }
+                    for disk in block.blocks if disk.type == "disk"
+                ]
+                desired[_address(name, key)] = {"attributes": attributes, "line": block.line}
+        return desired
+    
+    def init(self, args: List[str]) -> int:
+        try:
+            self._load_config()
+        except ConfigError as e:
+            self._print_text_error(e)
+            return 1
+        
+        schema_path = self.work_dir / SCHEMA_FILE
+        schema_path.parent.mkdir(exist_ok=True)
+        schema_path.write_text(json.dumps(schema_document()))
+        (self.work_dir / ".terraform.lock.hcl").write_text(
+            f'provider "{PROVIDER_SOURCE}" {{\n  version = "{schema_document()["provider_version"]}"\n}}\n'
+        )
+        print("Initializing provider plugins...\n- Installed terra-farm/xenorchestra (stand-in)\n")
+        print("Terraform has been successfully initialized!")
+        return 0
+    
+    def _validate(self) -> List[Dict]:
+        """Diagnostics for the configuration (requires init)"""
+        if not (self.work_dir / SCHEMA_FILE).exists():
+            return [self._diagnostic(ConfigError(
+                "Missing required provider",
+                "This configuration requires provider terra-farm/xenorchestra, but that provider isn't available. "
+                "You may be able to install it automatically by running:\n  terraform init"
+            ))]
+        try:
+            self._load_config()
+        except ConfigError as e:
+            return [self._diagnostic(e)]
+        
+        result = PreflightValidator(self.work_dir / SCHEMA_FILE).validate(self.code)
+        return [
+            {
+                "severity": record["severity"],
+                "summary": record["summary"],
+                "detail": record["detail"],
+                "address": record["address"],
+                "range": {
+                    "filename": record["filename"],
+                    "start": {"line": record["start_line"]},
+                    "end": {"line": record["end_line"]}
+                },
+                "snippet": {"code": record["snippet"], "context": None}
+            }
+            for record in result["diagnostics"]
+        ]
+    
+    def validate(self, args: List[str]) -> int:
+        diagnostics = self._validate()
+        if "-json" in args:
+            print(json.dumps({
+                "format_version": "1.0",
+                "valid": not diagnostics,
+                "error_count": len(diagnostics),
+                "warning_count": 0,
+                "diagnostics": diagnostics
+            }, indent=2))
+        elif diagnostics:
+            for diagnostic in diagnostics:
+                self._print_text_error(ConfigError(
+                    diagnostic["summary"], diagnostic["detail"], diagnostic["range"]["start"]["line"], diagnostic["address"]
+                ))
+        else:
+            print("Success! The configuration is valid.")
+        return 1 if diagnostics else 0
+    
+    def plan(self, args: List[str], destroy: bool = False) -> Tuple[int, Optional[Dict]]:
+        json_output = "-json" in args
+        out_file = next((a.split("=", 1)[1] for a in args if a.startswith("-out=")), None)
+        if json_output:
+            self._print_json("info", "version", f"Terraform {TERRAFORM_VERSION}", terraform=TERRAFORM_VERSION)
+        
+        try:
+            diagnostics = self._validate()
+            if diagnostics:
+                raise ConfigError(diagnostics[0]["summary"], diagnostics[0]["detail"],
+                                  diagnostics[0]["range"]["start"]["line"], diagnostics[0]["address"])
+            
+            root = self._load_config()
+            xo_url = self._xo_url(root)
+            data = self._read_data_sources(root, xo_url)
+            desired = {} if destroy else self._desired_vms(root, Evaluator(root, data))
+            current = self._state_instances(self._state())
+            drifted = {} if "-refresh=false" in args else self._refresh(current, xo_url)
+        except ConfigError as e:
+            if json_output:
+                self._print_json("error", "diagnostic", f"Error: {e.summary}", diagnostic=self._diagnostic(e))
+            else:
+                self._print_text_error(e)
+            return 1, None
+        
+        for address in sorted(drifted):
+            if json_output:
+                self._print_json("info", "resource_drift", f"{address}: Drift detected (delete)",
+                                 change={"resource": {"addr": address}, "action": "delete"})
+            else:
+                print(f"{address}: has been deleted outside of Terraform")
+        resource_changes = []
+        for address in sorted(set(desired) | set(current)):
+            before = current.get(address)
+            after = desired[address]["attributes"] if address in desired else None
+            if before is None:
+                actions = ["create"]
+            elif after is None:
+                actions = ["delete"]
+            elif any(before.get(k) != after.get(k) for k in VM_ATTRIBUTES if not isinstance(after.get(k), Unknown)):
+                actions = ["update"]
+            else:
+                actions = ["no-op"]
+            
+            name, index = _parse_address(address)
+            change = {
+                "address": address,
+                "mode": "managed",
+                "type": "xenorchestra_vm",
+                "name": name,
+                "provider_name": PROVIDER_SOURCE,
+                "change": {
+                    "actions": actions,
+                    "before": before,
+                    "after": None if after is None else {
+                        k: (None if isinstance(v, Unknown) else v) for k, v in after.items()
+                    }
+                }
+            }
+            if index is not None:
+                change["index"] = index
+            resource_changes.append(change)
+        
+        plan_document = {
+            "format_version": "1.2",
+            "terraform_version": TERRAFORM_VERSION,
+            "xo_url": xo_url,
+            # Objects deleted outside of Terraform; apply removes them from the state
+            "resource_drift": [
+                {
+                    "address": address,
+                    "mode": "managed",
+                    "type": "xenorchestra_vm",
+                    "name": _parse_address(address)[0],
+                    "provider_name": PROVIDER_SOURCE,
+                    "change": {"actions": ["delete"], "before": before, "after": None}
+                }
+                for address, before in sorted(drifted.items())
+            ],
+            "resource_changes": resource_changes
+        }
+        if out_file:
+            (self.work_dir / out_file).write_text(json.dumps(plan_document, indent=2))
+        
+        counts = {action: sum(1 for c in resource_changes if c["change"]["actions"] == [action])
+                  for action in ("create", "update", "delete")}
+        if json_output:
+            for change in resource_changes:
+                if change["change"]["actions"] != ["no-op"]:
+                    self._print_json("info", "planned_change", f"{change['address']}: Plan to {change['change']['actions'][0]}",
+                                     change={"resource": {"addr": change["address"]}, "action": change["change"]["actions"][0]})
+            self._print_json("info", "change_summary",
+                             f"Plan: {counts['create']} to add, {counts['update']} to change, {counts['delete']} to destroy.",
+                             changes={"add": counts["create"], "change": counts["update"], "remove": counts["delete"],
+                                      "operation": "destroy" if destroy else "plan"})
+        else:
+            print(f"Plan: {counts['create']} to add, {counts['update']} to change, {counts['delete']} to destroy.")
+        return 0, plan_document
+    
+    def show(self, args: List[str]) -> int:
+        plan_file = next((a for a in args if not a.startswith("-")), None)
+        if not plan_file or not (self.work_dir / plan_file).exists():
+            self._print_text_error(ConfigError("Failed to read plan", "No saved plan file was given."))
+            return 1
+        print((self.work_dir / plan_file).read_text())
+        return 0
+    
+    def _execute(self, plan_document: Dict) -> int:
+        """Carry out a plan against the XO REST API"""
+        xo_url = plan_document["xo_url"]
+        state = self._state()
+        errors = []
+        counts = {"create": 0, "update": 0, "delete": 0}
+        
+        for drift in plan_document.get("resource_drift", []):
+            _set_instance(state, drift["address"], None)
+        if plan_document.get("resource_drift"):
+            self._save_state(state)
+        
+        for change in plan_document["resource_changes"]:
+            action = change["change"]["actions"][0]
+            if action == "no-op":
+                continue
+            address = change["address"]
+            before = change["change"]["before"] or {}
+            after = change["change"]["after"] or {}
+            spec = {
+                "name_label": after.get("name_label"),
+                "memory": after.get("memory_max") or 0,
+                "cpus": after.get("cpus") or 1,
+                "disks": after.get("disks") or []
+            }
+            
+            try:
+                if action == "create":
+                    vm = self._request(f"{xo_url}/rest/v0/vms", "POST", spec)
+                    _set_instance(state, address, {**after, "id": vm["id"]})
+                elif action == "update":
+                    self._request(f"{xo_url}/rest/v0/vms/{before['id']}", "PATCH", spec)
+                    _set_instance(state, address, {**after, "id": before["id"]})
+                else:
+                    self._request(f"{xo_url}/rest/v0/vms/{before['id']}", "DELETE")
+                    _set_instance(state, address, None)
+                counts[action] += 1
+                print(f"{address}: {action.capitalize()} complete")
+            except ConfigError as e:
+                e.address = address
+                e.line = _resource_line(self.lines, change["name"])
+                errors.append(e)
+            
+            self._save_state(state)
+        
+        for error in errors:
+            self._print_text_error(error)
+        if errors:
+            return 1
+        
+        print(f"\nApply complete! Resources: {counts['create']} added, {counts['update']} changed, {counts['delete']} destroyed.")
+        return 0
+    
+    def apply(self, args: List[str]) -> int:
+        plan_file = next((a for a in args if not a.startswith("-")), None)
+        if plan_file:
+            plan_document = json.loads((self.work_dir / plan_file).read_text())
+            try:
+                self._load_config()
+            except ConfigError:
+                pass
+        else:
+            exit_code, plan_document = self.plan(args)
+            if exit_code:
+                return exit_code
+        return self._execute(plan_document)
+    
+    def destroy(self, args: List[str]) -> int:
+        exit_code, plan_document = self.plan([], destroy=True)
+        if exit_code:
+            return exit_code
+        return self._execute(plan_document)
+    
+    def providers(self, args: List[str]) -> int:
+        if args[:1] != ["schema"] or "-json" not in args:
+            sys.stderr.write("The stand-in only supports `terraform providers schema -json`\n")
+            return 1
+        print(json.dumps(schema_document()))
+        return 0
+    
+    def output(self, args: List[str]) -> int:
+        print("{}")
+        return 0
+
+def _address(name: str, key) -> str:
+    if key is None:
+        return f"xenorchestra_vm.{name}"
+    return f"xenorchestra_vm.{name}[{json.dumps(key)}]"
+
+def _parse_address(address: str):
+    match = re.match(r'xenorchestra_vm\.([^\[]+)(?:\[(.+)\])?$', address)
+    return match.group(1), json.loads(match.group(2)) if match.group(2) else None
+
+def _resource_line(lines: List[str], name: str) -> Optional[int]:
+    pattern = re.compile(rf'^\s*resource\s+"xenorchestra_vm"\s+"{re.escape(name)}"')
+    return next((i + 1 for i, line in enumerate(lines) if pattern.match(line)), None)
+
+def _set_instance(state: Dict, address: str, attributes: Optional[Dict]):
+    """Create, replace or (with None) remove a VM instance in the state"""
+    name, index = _parse_address(address)
+    resource = next(
+        (r for r in state["resources"] if r["mode"] == "managed" and r["type"] == "xenorchestra_vm" and r["name"] == name),
+        None
+    )
+    if resource is None:
+        if attributes is None:
+            return
+        resource = {"mode": "managed", "type": "xenorchestra_vm", "name": name, "provider": PROVIDER_ADDRESS, "instances": []}
+        state["resources"].append(resource)
+    
+    resource["instances"] = [i for i in resource["instances"] if i.get("index_key") != index]
+    if attributes is not None:
+        instance = {"schema_version": 0, "attributes": attributes}
+        if index is not None:
+            instance["index_key"] = index
+        resource["instances"].append(instance)
+    if not resource["instances"]:
+        state["resources"].remove(resource)
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        sys.stderr.write("Usage: terraform <command> [args]\n")
+        return 1
+    
+    command, args = argv[0], argv[1:]
+    terraform = FakeTerraform(Path.cwd())
+    if command == "plan":
+        return terraform.plan(args)[0]
+    if command in ("init", "validate", "show", "apply", "destroy", "providers", "output"):
+        return getattr(terraform, command)(args)
+    
+    sys.stderr.write(f"Terraform stand-in does not implement `{command}`\n")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,433 @@
+"""Fake OpenRouter (OpenAI-compatible) chat completions server
+
+Replays scripted or recorded responses per (task, iteration) so the
+orchestrator, retry logic and scheduler can be load-tested without spending
+credits. The task is recognised from the "Task: ..." line of the prompt and
+the iteration from the number of assistant turns in the conversation.
+Latency, streaming cadence, 429/5xx injection and token usage are all
+controllable.
+"""
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from ..fixtures import FixtureVM, render_fixture_config, PROVIDER_CONFIG, DATA_SOURCES
+from ..task_definitions import TASKS
+
+logger = logging.getLogger(__name__)
+
+# Default answers: one working configuration per task
+_WEB_VMS = [FixtureVM(f"web-0{i}", cpus=2, memory_gb=4, disk_gb=50) for i in (1, 2, 3)]
+
+DEFAULT_SOLUTIONS: Dict[str, List[FixtureVM]] = {
+    "c1_2": [FixtureVM("ubuntu-vm", cpus=2, memory_gb=2, disk_gb=20)],
+    "c1_3": [FixtureVM("app-01", cpus=2, memory_gb=4, disk_gb=50)],
+    "u1_2": [FixtureVM("app-01", cpus=2, memory_gb=6, disk_gb=50)],
+    "d1_2": [],
+    "c2_2": [FixtureVM(f"ubuntu-vm-{i}", cpus=2, memory_gb=2, disk_gb=20) for i in (1, 2, 3)],
+    "c2_3": _WEB_VMS,
+    "c4_2": _WEB_VMS + [FixtureVM("web-04", cpus=2, memory_gb=4, disk_gb=50)],
+    "d2_2": _WEB_VMS[:1],
+    # Only as many 3GB VMs as fit in the 20GB available
+    "c5_2": [FixtureVM(f"ubuntu-vm-{i:02d}", cpus=1, memory_gb=3, disk_gb=20) for i in range(1, 7)],
+}
+
+READ_SOLUTION = PROVIDER_CONFIG + "".join(
+    f"""
+data "xenorchestra_vm" "{vm.resource_name}" {{
+  name_label = "{vm.name}"
+}}
+
+output "{vm.resource_name}_id" {{
+  value = data.xenorchestra_vm.{vm.resource_name}.id
+}}
+"""
+    for vm in _WEB_VMS
+)
+
+# Catalog prices served by /models (USD per token, as strings like OpenRouter)
+STANDIN_PRICING = {
+    "deepseek/deepseek-r1": {"prompt": "0.00000055", "completion": "0.00000219", "input_cache_read": "0.00000014"},
+    "google/gemini-pro-1.5": {"prompt": "0.00000125", "completion": "0.000005", "input_cache_read": "0.0000003125"},
+}
+
+def default_response(task_key: str, broken: bool = False) -> str:
+    """Canned answer for a task
+    
+    Args:
+        task_key: Task key (e.g. 'c1_2')
+        broken: Use `memory` instead of `memory_max`, which validation rejects
+    
+    Returns:
+        Response text with a fenced HCL block
+    """
+    if task_key == "r1_2":
+        code = READ_SOLUTION
+    elif task_key in DEFAULT_SOLUTIONS:
+        code = render_fixture_config(DEFAULT_SOLUTIONS[task_key])
+    else:
+        code = PROVIDER_CONFIG + DATA_SOURCES
+    if broken:
+        code = code.replace("memory_max =", "memory     =")
+    return f"Here is the Terraform configuration:\n\n```hcl\n{code.strip()}\n```\n"
+
+class ScriptedModel:
+    """Responses per (task, iteration)
+    
+    Scripts map task keys to the responses for iterations 1, 2, ...; the
+    last response repeats once the script runs out. The "*" key applies to
+    tasks without their own entry, and tasks in neither fall back to the
+    canned DEFAULT_SOLUTIONS.
+    """
+    
+    def __init__(self, script: Optional[Dict[str, List[str]]] = None, broken_iterations: int = 0):
+        """Create a scripted model
+        
+        Args:
+            script: task key -> responses per iteration
+            broken_iterations: Leading iterations answered with invalid code
+                when a task falls back to the canned answer
+        """
+        self.script = script or {}
+        self.broken_iterations = broken_iterations
+    
+    @classmethod
+    def from_file(cls, path: Path, broken_iterations: int = 0) -> "ScriptedModel":
+        """Load a JSON script ({"c1_2": ["response 1", "response 2"], "*": [...]})"""
+        return cls(json.loads(Path(path).read_text()), broken_iterations=broken_iterations)
+    
+    @classmethod
+    def from_recordings(cls, root: Path, model_short_name: Optional[str] = None) -> "ScriptedModel":
+        """Replay the assistant turns of recorded conversations
+        
+        Args:
+            root: Directory searched for conversation_history.json files
+                (e.g. a run's terraform_code directory)
+            model_short_name: Only use recordings of this model
+        
+        Returns:
+            ScriptedModel
+        """
+        script = {}
+        for history_file in sorted(Path(root).rglob("conversation_history.json")):
+            try:
+                data = json.loads(history_file.read_text())
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping recording {history_file}: {e}")
+                continue
+            # Histories hold the full model name; the short name is the
+            # workspace directory (terraform_code/<short_name>/<task>/)
+            if model_short_name and history_file.parent.parent.name != model_short_name:
+                continue
+            
+            responses = [m["content"] for m in data.get("messages", []) if m.get("role") == "assistant"]
+            task_key = str(data.get("task_id", "")).lower().replace('.', '_')
+            if responses and task_key not in script:
+                script[task_key] = responses
+        
+        logger.info(f"Loaded recorded responses for {len(script)} tasks from {root}")
+        return cls(script)
+    
+    def respond(self, task_key: Optional[str], iteration: int, broken: bool = False) -> str:
+        """Response text for a task's n-th iteration (1-based); broken forces invalid canned code"""
+        responses = self.script.get(task_key) or self.script.get("*")
+        if responses:
+            return responses[min(iteration, len(responses)) - 1]
+        return default_response(task_key or "", broken=broken or iteration <= self.broken_iterations)
+
+def identify_task(messages: List[Dict]) -> Optional[str]:
+    """Task key of a conversation, from the "Task: <prompt>" user message"""
+    for message in messages:
+        if message.get("role") != "user":
+            continue
+        content = message.get("content") or ""
+        for task_key, task in TASKS.items():
+            if f"Task: {task.prompt_text}" in content:
+                return task_key
+    return None
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (4 characters per token)"""
+    return max(1, len(text) // 4)
+
+class FakeLLMServer:
+    """OpenAI-compatible chat completions server backed by a ScriptedModel"""
+    
+    def __init__(
+        self,
+        model: Optional[ScriptedModel] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency_seconds: float = 0.0,
+        tokens_per_second: float = 0.0,
+        chunk_chars: int = 40,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        retry_after_seconds: float = 0.0,
+        rejected_keys: Optional[List[str]] = None,
+        throttled_keys: Optional[List[str]] = None,
+        broken_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """Create the server (call start() to serve)
+        
+        Args:
+            model: Response script (default: canned answers)
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            latency_seconds: Delay before the first byte of every response
+            tail_rate: Probability (0-1) that a request is a latency outlier
+            tail_latency_seconds: Extra delay of outlier requests
+            tokens_per_second: Generation speed; completions take
+                completion_tokens / tokens_per_second (0 = instant)
+            chunk_chars: Characters per streamed chunk
+            rate_limit_rate: Probability (0-1) of answering 429
+            server_error_rate: Probability (0-1) of answering 503
+            retry_after_seconds: Retry-After sent with injected errors
+            rejected_keys: API keys answered with 401
+            throttled_keys: API keys always answered with 429
+            broken_rate: Probability (0-1) that a canned answer has invalid code
+            seed: Seed for error injection
+        """
+        self.model = model or ScriptedModel()
+        self.host = host
+        self.port = port
+        self.latency_seconds = latency_seconds
+        self.tail_rate = tail_rate
+        self.tail_latency_seconds = tail_latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.chunk_chars = chunk_chars
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.rejected_keys = set(rejected_keys or ())
+        self.throttled_keys = set(throttled_keys or ())
+        self.broken_rate = broken_rate
+        self.requests_by_key: Dict[str, int] = {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.stats = {
+            "requests": 0,
+            "completions": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "tail_requests": 0,
+            "cancelled_streams": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0
+        }
+    
+    @property
+    def url(self) -> str:
+        """API root to use as OpenRouterClient base_url"""
+        return f"http://{self.host}:{self.port}/api/v1"
+    
+    def start(self) -> "FakeLLMServer":
+        """Start serving in a background thread"""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, name="fake-llm", daemon=True).start()
+        logger.info(f"Fake LLM server listening on {self.url}")
+        return self
+    
+    def stop(self):
+        """Stop serving"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+    
+    def _count(self, key: str, delta: int = 1):
+        with self.lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+    
+    def injected_error(self, api_key: Optional[str] = None) -> Optional[int]:
+        """HTTP status to fail the next request with, if any"""
+        with self.lock:
+            self.requests_by_key[api_key] = self.requests_by_key.get(api_key, 0) + 1
+            roll = self.random.random()
+        if api_key in self.rejected_keys:
+            return 401
+        if api_key in self.throttled_keys:
+            self._count("rate_limited")
+            return 429
+        if roll < self.rate_limit_rate:
+            self._count("rate_limited")
+            return 429
+        if roll < self.rate_limit_rate + self.server_error_rate:
+            self._count("server_errors")
+            return 503
+        return None
+    
+    def request_latency(self) -> float:
+        """Delay before answering the next request (latency plus the occasional outlier)"""
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.tail_rate:
+            self._count("tail_requests")
+            return self.latency_seconds + self.tail_latency_seconds
+        return self.latency_seconds
+    
+    def complete(self, request: Dict) -> Dict:
+        """Build a chat completion for a request (without delays)"""
+        messages = request.get("messages") or []
+        task_key = identify_task(messages)
+        iteration = sum(1 for m in messages if m.get("role") == "assistant") + 1
+        with self.lock:
+            broken = self.random.random() < self.broken_rate
+        content = self.model.respond(task_key, iteration, broken=broken)
+        
+        message = {"role": "assistant", "content": content}
+        if "r1" in request.get("model", ""):
+            message["reasoning"] = f"Scripted reasoning for {task_key or 'unknown task'}, iteration {iteration}."
+        
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+        reasoning_tokens = estimate_tokens(message.get("reasoning", ""))
+        completion_tokens = estimate_tokens(content) + reasoning_tokens
+        # Everything before the newest message was sent with the previous request,
+        # so it is served from the provider's prompt cache
+        cached_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages[:-1]) if iteration > 1 else 0
+        self._count("completions")
+        return {
+            "id": f"gen-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "standin"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                "completion_tokens_details": {"reasoning_tokens": reasoning_tokens}
+            }
+        }
+    
+    def generation_seconds(self, completion: Dict) -> float:
+        """Time the completion takes to generate"""
+        if not self.tokens_per_second:
+            return 0.0
+        return completion["usage"]["completion_tokens"] / self.tokens_per_second
+
+def _make_handler(server: FakeLLMServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def log_message(self, format, *args):
+            logger.debug(f"fake-llm: {format % args}")
+        
+        def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def _stream(self, completion: Dict):
+            """Send a completion as server-sent events at the configured cadence"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            
+            message = completion["choices"][0]["message"]
+            content = message["content"]
+            chunks = [content[i:i + server.chunk_chars] for i in range(0, len(content), server.chunk_chars)] or [""]
+            delay = server.generation_seconds(completion) / len(chunks)
+            
+            def event(delta: Dict, finish_reason: Optional[str] = None, usage: Optional[Dict] = None):
+                chunk = {
+                    "id": completion["id"],
+                    "object": "chat.completion.chunk",
+                    "created": completion["created"],
+                    "model": completion["model"],
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                if usage:
+                    chunk["usage"] = usage
+                # Raw UTF-8 without a charset parameter, like OpenRouter
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            
+            try:
+                if message.get("reasoning"):
+                    event({"role": "assistant", "content": "", "reasoning": message["reasoning"]})
+                for chunk in chunks:
+                    event({"content": chunk})
+                    time.sleep(delay)
+                event({}, finish_reason="stop", usage=completion["usage"])
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client dropped the stream (e.g. the losing request of a hedged call)
+                server._count("cancelled_streams")
+        
+        def _api_key(self) -> Optional[str]:
+            authorization = self.headers.get("Authorization") or ""
+            return authorization[len("Bearer "):] if authorization.startswith("Bearer ") else None
+        
+        def do_GET(self):
+            if self.path.rstrip('/').endswith("/key"):
+                if self._api_key() in server.rejected_keys:
+                    return self._send(401, {"error": {"message": "invalid API key", "code": 401}})
+                return self._send(200, {"data": {"label": "stand-in", "limit": None, "limit_remaining": None, "usage": 0}})
+            if self.path.rstrip('/').endswith("/models"):
+                return self._send(200, {"data": [
+                    {
+                        "id": model_id,
+                        "name": f"{model_id} (stand-in)",
+                        "context_length": 128000,
+                        "pricing": pricing
+                    }
+                    for model_id, pricing in STANDIN_PRICING.items()
+                ]})
+            self._send(404, {"error": {"message": "not found", "code": 404}})
+        
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith("/chat/completions"):
+                return self._send(404, {"error": {"message": "not found", "code": 404}})
+            
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return self._send(400, {"error": {"message": "invalid JSON body", "code": 400}})
+            
+            server._count("requests")
+            server._count("in_flight")
+            try:
+                latency = server.request_latency()
+                if latency:
+                    time.sleep(latency)
+                
+                status = server.injected_error(self._api_key())
+                if status:
+                    headers = {"Retry-After": str(server.retry_after_seconds)} if server.retry_after_seconds else {}
+                    message = {429: "Rate limit exceeded", 401: "Invalid API key"}.get(status, "Upstream provider unavailable")
+                    return self._send(status, {"error": {"message": message, "code": status}}, headers)
+                
+                completion = server.complete(request)
+                if request.get("stream"):
+                    return self._stream(completion)
+                time.sleep(server.generation_seconds(completion))
+                self._send(200, completion)
+            finally:
+                server._count("in_flight", -1)
+    
+    return Handler
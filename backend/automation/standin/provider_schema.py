@@ -0,0 +1,127 @@
+"""Schema of the xenorchestra provider subset the stand-in implements
+
+Shaped like `terraform providers schema -json` output, so the pre-flight
+validator and the fake terraform CLI can share it.
+"""
+from ..task_definitions import PROVIDER_VERSION
+
+PROVIDER_SOURCE = "registry.terraform.io/terra-farm/xenorchestra"
+
+def _attribute(type_: str, required: bool = False, optional: bool = False, computed: bool = False) -> dict:
+    attribute = {"type": type_}
+    if required:
+        attribute["required"] = True
+    if optional:
+        attribute["optional"] = True
+    if computed:
+        attribute["computed"] = True
+    return attribute
+
+def _lookup_data_source(*optional: str) -> dict:
+    """Data source looked up by name_label"""
+    attributes = {
+        "id": _attribute("string", optional=True, computed=True),
+        "name_label": _attribute("string", required=True)
+    }
+    for name in optional:
+        attributes[name] = _attribute("string", optional=True)
+    return {"version": 0, "block": {"attributes": attributes}}
+
+VM_SCHEMA = {
+    "version": 0,
+    "block": {
+        "attributes": {
+            "id": _attribute("string", optional=True, computed=True),
+            "name_label": _attribute("string", required=True),
+            "name_description": _attribute("string", optional=True),
+            "template": _attribute("string", required=True),
+            "cpus": _attribute("number", required=True),
+            "memory_max": _attribute("number", required=True),
+            "auto_poweron": _attribute("bool", optional=True),
+            "power_state": _attribute("string", optional=True, computed=True),
+            "cloud_config": _attribute("string", optional=True),
+            "cloud_network_config": _attribute("string", optional=True),
+            "hvm_boot_firmware": _attribute("string", optional=True),
+            "exp_nested_hvm": _attribute("bool", optional=True),
+            "affinity_host": _attribute("string", optional=True),
+            "resource_set": _attribute("string", optional=True),
+            "start_delay": _attribute("number", optional=True),
+            "high_availability": _attribute("string", optional=True),
+            "wait_for_ip": _attribute("bool", optional=True),
+            "tags": _attribute(["set", "string"], optional=True),
+            "ipv4_addresses": _attribute(["list", "string"], computed=True),
+            "ipv6_addresses": _attribute(["list", "string"], computed=True)
+        },
+        "block_types": {
+            "network": {
+                "nesting_mode": "list",
+                "min_items": 1,
+                "block": {
+                    "attributes": {
+                        "network_id": _attribute("string", required=True),
+                        "mac_address": _attribute("string", optional=True, computed=True),
+                        "attached": _attribute("bool", optional=True),
+                        "ipv4_addresses": _attribute(["list", "string"], computed=True),
+                        "ipv6_addresses": _attribute(["list", "string"], computed=True)
+                    }
+                }
+            },
+            "disk": {
+                "nesting_mode": "list",
+                "min_items": 1,
+                "block": {
+                    "attributes": {
+                        "sr_id": _attribute("string", required=True),
+                        "name_label": _attribute("string", required=True),
+                        "name_description": _attribute("string", optional=True),
+                        "size": _attribute("number", required=True),
+                        "attached": _attribute("bool", optional=True),
+                        "position": _attribute("string", optional=True, computed=True),
+                        "vdi_id": _attribute("string", computed=True)
+                    }
+                }
+            },
+            "cdrom": {
+                "nesting_mode": "list",
+                "max_items": 1,
+                "block": {"attributes": {"id": _attribute("string", required=True)}}
+            }
+        }
+    }
+}
+
+PROVIDER_SCHEMA = {
+    "provider": {
+        "version": 0,
+        "block": {
+            "attributes": {
+                "url": _attribute("string", optional=True),
+                "username": _attribute("string", optional=True),
+                "password": _attribute("string", optional=True),
+                "token": _attribute("string", optional=True),
+                "insecure": _attribute("bool", optional=True),
+                "retry_mode": _attribute("string", optional=True),
+                "retry_max_time": _attribute("string", optional=True)
+            }
+        }
+    },
+    "resource_schemas": {
+        "xenorchestra_vm": VM_SCHEMA
+    },
+    "data_source_schemas": {
+        "xenorchestra_pool": _lookup_data_source(),
+        "xenorchestra_template": _lookup_data_source("pool_id"),
+        "xenorchestra_network": _lookup_data_source("pool_id", "bridge"),
+        "xenorchestra_sr": _lookup_data_source("pool_id"),
+        "xenorchestra_host": _lookup_data_source(),
+        "xenorchestra_vm": _lookup_data_source()
+    }
+}
+
+def schema_document() -> dict:
+    """Full `terraform providers schema -json` document"""
+    return {
+        "format_version": "1.0",
+        "provider_schemas": {PROVIDER_SOURCE: PROVIDER_SCHEMA},
+        "provider_version": PROVIDER_VERSION
+    }
@@ -0,0 +1,289 @@
+"""Fake Xen Orchestra server
+
+Serves the parts of XO the pipeline touches: the REST API (`/rest/v0/...`)
+used for verification and by the fake terraform CLI, plus a login page and VM
+list for XenScreenshot. VM operations can be slowed down and made to fail
+to exercise retries and error feedback.
+"""
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+POOL_NAME = "DAO-Agentic-Infra"
+
+class StandinError(Exception):
+    """A VM operation rejected by the stand-in"""
+    
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.status = status
+
+class FakeXOServer:
+    """In-memory XO host with a REST API and minimal web UI"""
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        total_ram_gb: float = 20,
+        seed: Optional[int] = None
+    ):
+        """Create the server (call start() to serve)
+        
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            latency_seconds: Delay added to every VM create/update/destroy
+            failure_rate: Probability (0-1) that a VM operation fails
+            total_ram_gb: Host RAM available to VMs
+            seed: Seed for failure injection
+        """
+        self.host = host
+        self.port = port
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.total_ram_gb = total_ram_gb
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        
+        pool_id = str(uuid.uuid4())
+        self.catalog: Dict[str, List[Dict]] = {
+            "pools": [{"id": pool_id, "name_label": POOL_NAME}],
+            "hosts": [{"id": str(uuid.uuid4()), "name_label": "xcp-ng", "$pool": pool_id}],
+            "vm-templates": [{"id": str(uuid.uuid4()), "name_label": "Other install media", "$pool": pool_id}],
+            "networks": [{"id": str(uuid.uuid4()), "name_label": "Pool-wide network associated with eth0", "$pool": pool_id}],
+            "srs": [
+                {"id": str(uuid.uuid4()), "name_label": "Local storage", "$pool": pool_id},
+                {"id": str(uuid.uuid4()), "name_label": "ISO Library", "$pool": pool_id}
+            ]
+        }
+        self.vms: Dict[str, Dict] = {}
+        self.pool_id = pool_id
+    
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+    
+    def start(self) -> "FakeXOServer":
+        """Start serving in a background thread"""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, name="fake-xo", daemon=True).start()
+        logger.info(f"Fake XO server listening on {self.url}")
+        return self
+    
+    def stop(self):
+        """Stop serving"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+    
+    def _operation(self, action: str):
+        """Apply latency and failure injection to a VM operation"""
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            raise StandinError(f"Injected failure during VM {action}")
+    
+    def _used_ram_bytes(self, exclude: Optional[str] = None) -> int:
+        return sum(vm["memory"]["size"] for vm_id, vm in self.vms.items() if vm_id != exclude)
+    
+    def _check_memory(self, memory: int, exclude: Optional[str] = None):
+        if self._used_ram_bytes(exclude) + memory > self.total_ram_gb * GB:
+            free = self.total_ram_gb * GB - self._used_ram_bytes(exclude)
+            raise StandinError(
+                f"HOST_NOT_ENOUGH_FREE_MEMORY: needed {memory} bytes, {max(free, 0)} available"
+            )
+    
+    def create_vm(self, spec: Dict) -> Dict:
+        """Create and start a VM
+        
+        Args:
+            spec: name_label, memory (bytes), cpus, optional tags/disks
+        
+        Returns:
+            VM object
+        """
+        self._operation("create")
+        with self.lock:
+            memory = int(spec.get("memory") or 0)
+            self._check_memory(memory)
+            vm = {
+                "id": str(uuid.uuid4()),
+                "type": "VM",
+                "name_label": spec.get("name_label", ""),
+                "name_description": spec.get("name_description", ""),
+                "power_state": "Running",
+                "memory": {"size": memory, "static": [memory, memory], "dynamic": [memory, memory]},
+                "CPUs": {"max": int(spec.get("cpus") or 1), "number": int(spec.get("cpus") or 1)},
+                "tags": list(spec.get("tags") or []),
+                "disks": list(spec.get("disks") or []),
+                "$pool": self.pool_id
+            }
+            self.vms[vm["id"]] = vm
+            return vm
+    
+    def update_vm(self, vm_id: str, spec: Dict) -> Dict:
+        """Change a VM's name, memory or vCPUs"""
+        self._operation("update")
+        with self.lock:
+            vm = self.vms.get(vm_id)
+            if not vm:
+                raise StandinError(f"No such VM: {vm_id}", status=404)
+            if "memory" in spec:
+                memory = int(spec["memory"] or 0)
+                self._check_memory(memory, exclude=vm_id)
+                vm["memory"] = {"size": memory, "static": [memory, memory], "dynamic": [memory, memory]}
+            if "cpus" in spec:
+                vm["CPUs"] = {"max": int(spec["cpus"]), "number": int(spec["cpus"])}
+            for key in ("name_label", "name_description", "tags", "disks"):
+                if key in spec:
+                    vm[key] = spec[key]
+            return vm
+    
+    def delete_vm(self, vm_id: str):
+        """Destroy a VM"""
+        self._operation("destroy")
+        with self.lock:
+            if self.vms.pop(vm_id, None) is None:
+                raise StandinError(f"No such VM: {vm_id}", status=404)
+    
+    def collection(self, name: str) -> Optional[List[Dict]]:
+        """Objects of a REST collection (vms, pools, srs, ...)"""
+        with self.lock:
+            if name == "vms":
+                return [dict(vm) for vm in self.vms.values()]
+            return self.catalog.get(name)
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Xen Orchestra</title></head>
+<body>
+<form method="post" action="/signin/local">
+  <input type="email" name="username" placeholder="Username">
+  <input type="password" name="password" placeholder="Password">
+  <button type="submit">Sign in</button>
+</form>
+</body></html>
+"""
+
+def _render_vm_list(vms: List[Dict]) -> str:
+    rows = "\n".join(
+        f'<tr class="vm"><td>{vm["name_label"]}</td><td>{vm["power_state"]}</td>'
+        f'<td>{vm["CPUs"]["number"]} vCPUs</td><td>{vm["memory"]["size"] // GB} GiB</td></tr>'
+        for vm in sorted(vms, key=lambda v: v["name_label"])
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>Xen Orchestra - Home</title></head>
+<body>
+<h1>{POOL_NAME} (stand-in)</h1>
+<table>
+<tr><th>Name</th><th>Power state</th><th>CPUs</th><th>Memory</th></tr>
+{rows}
+</table>
+</body></html>
+"""
+
+def _make_handler(server: FakeXOServer):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(f"fake-xo: {format % args}")
+        
+        def _send(self, status: int, body, content_type: str = "application/json"):
+            data = (json.dumps(body) if content_type == "application/json" else body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def _body(self) -> Dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            raw = self.rfile.read(length).decode()
+            if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                return {key: values[0] for key, values in parse_qs(raw).items()}
+            return json.loads(raw)
+        
+        def _rest_path(self):
+            """(collection, object id) for /rest/v0/<collection>[/<id>]"""
+            parts = [p for p in urlparse(self.path).path.split('/') if p]
+            if len(parts) < 3 or parts[:2] != ["rest", "v0"]:
+                return None, None
+            return parts[2], parts[3] if len(parts) > 3 else None
+        
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path in ("/", "/signin"):
+                return self._send(200, LOGIN_PAGE, "text/html")
+            if parsed.path.startswith("/v5"):
+                return self._send(200, _render_vm_list(server.collection("vms")), "text/html")
+            
+            collection, object_id = self._rest_path()
+            objects = server.collection(collection) if collection else None
+            if objects is None:
+                return self._send(404, {"error": "not found"})
+            
+            if object_id:
+                match = next((o for o in objects if o["id"] == object_id), None)
+                return self._send(200, match) if match else self._send(404, {"error": "no such object"})
+            
+            # Like XO: hrefs by default, objects when fields are requested
+            fields = parse_qs(parsed.query).get("fields")
+            if not fields:
+                return self._send(200, [f"/rest/v0/{collection}/{o['id']}" for o in objects])
+            if fields[0] == "*":
+                return self._send(200, objects)
+            wanted = fields[0].split(',') + ["id"]
+            return self._send(200, [{k: o.get(k) for k in wanted if k in o} for o in objects])
+        
+        def do_POST(self):
+            if urlparse(self.path).path.startswith("/signin"):
+                self.send_response(303)
+                self.send_header("Location", "/v5/")
+                self.send_header("Set-Cookie", "authenticationToken=standin; Path=/")
+                self.end_headers()
+                return
+            
+            collection, object_id = self._rest_path()
+            if collection != "vms" or object_id:
+                return self._send(404, {"error": "not found"})
+            try:
+                self._send(201, server.create_vm(self._body()))
+            except StandinError as e:
+                self._send(e.status, {"error": str(e)})
+        
+        def do_PATCH(self):
+            collection, object_id = self._rest_path()
+            if collection != "vms" or not object_id:
+                return self._send(404, {"error": "not found"})
+            try:
+                self._send(200, server.update_vm(object_id, self._body()))
+            except StandinError as e:
+                self._send(e.status, {"error": str(e)})
+        
+        def do_DELETE(self):
+            collection, object_id = self._rest_path()
+            if collection != "vms" or not object_id:
+                return self._send(404, {"error": "not found"})
+            try:
+                server.delete_vm(object_id)
+                self._send(204, "", "text/plain")
+            except StandinError as e:
+                self._send(e.status, {"error": str(e)})
+    
+    return Handler
@@ -26,6 +26,9 @@ class TaskDefinition:
     is_incremental: bool = False
     is_update: bool = False
 
+# Provider version targeted by all tasks (keys cached Terraform results)
+PROVIDER_VERSION = "0.26.0"
+
 # Platform context that will be prepended to all prompts
 PLATFORM_CONTEXT = """You are an expert Terraform infrastructure engineer working with Xen Orchestra / XCP-NG.
 
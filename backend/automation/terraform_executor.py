@@ -1,24 +1,91 @@
 """Terraform execution wrapper with comprehensive logging"""
 import os
+import json
+import shlex
+import sys
 import subprocess
+import tempfile
 import time
 import logging
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 import shutil
 
+from . import diagnostics
+from . import tracing
+from . import scheduler as scheduling
+from .capacity import planned_vms_from_plan
+
 logger = logging.getLogger(__name__)
 
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+RSS_UNIT_BYTES = 1 if sys.platform == "darwin" else 1024
+
+def _run_with_usage(command: str, cwd: Path, timeout: int) -> Tuple[subprocess.CompletedProcess, Optional[Dict]]:
+    """subprocess.run(shell=True, capture_output=True, text=True) that also returns child usage
+    
+    The child is reaped with os.wait4 to keep its resource usage, which
+    covers the shell and the terraform process (and provider plugins) it
+    waited for: CPU time and the largest peak RSS among them. Output goes to
+    temporary files, so nothing has to read pipes while we wait.
+    
+    Returns:
+        Tuple of (completed process, dict with cpu_user_seconds, cpu_system_seconds
+        and peak_rss_mb, or None where wait4 is unavailable)
+    
+    Raises:
+        subprocess.TimeoutExpired: When the command runs longer than timeout
+    """
+    if not hasattr(os, "wait4"):
+        return subprocess.run(command, shell=True, cwd=cwd, capture_output=True, text=True, timeout=timeout), None
+    
+    with tempfile.TemporaryFile("w+") as stdout_file, tempfile.TemporaryFile("w+") as stderr_file:
+        process = subprocess.Popen(command, shell=True, cwd=cwd, stdout=stdout_file, stderr=stderr_file)
+        deadline = time.monotonic() + timeout
+        delay = 0.0005
+        timed_out = False
+        # Poll like Popen.wait does, so the timeout holds without a second thread
+        while True:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            if time.monotonic() >= deadline:
+                process.kill()
+                pid, status, rusage = os.wait4(process.pid, 0)
+                timed_out = True
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        # Already reaped: Popen must not wait for the pid again
+        process.returncode = os.waitstatus_to_exitcode(status)
+        
+        stdout_file.seek(0)
+        stderr_file.seek(0)
+        stdout, stderr = stdout_file.read(), stderr_file.read()
+    
+    if timed_out:
+        raise subprocess.TimeoutExpired(command, timeout, output=stdout, stderr=stderr)
+    usage = {
+        "cpu_user_seconds": round(rusage.ru_utime, 3),
+        "cpu_system_seconds": round(rusage.ru_stime, 3),
+        "peak_rss_mb": round(rusage.ru_maxrss * RSS_UNIT_BYTES / 1024 ** 2, 1)
+    }
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr), usage
+
 class TerraformExecutor:
     """Execute Terraform commands and capture detailed logs"""
     
-    def __init__(self, work_dir: Path):
+    def __init__(self, work_dir: Path, terraform_bin: Optional[str] = None):
         self.work_dir = Path(work_dir)
         self.work_dir.mkdir(parents=True, exist_ok=True)
         
+        # TERRAFORM_BIN may name another binary or a full command
+        # (e.g. the offline stand-in: "python .../standin/fake_terraform.py")
+        self.terraform_bin = terraform_bin or os.getenv('TERRAFORM_BIN') or 'terraform'
+        
         # Check if terraform is installed
-        if not shutil.which('terraform'):
-            logger.warning("Terraform not found in PATH")
+        if not shutil.which(shlex.split(self.terraform_bin)[0]):
+            logger.warning(f"Terraform not found in PATH ({self.terraform_bin})")
     
     def write_main_tf(self, code: str) -> Path:
         """Write Terraform code to main.tf
@@ -38,7 +105,40 @@ class TerraformExecutor:
         self,
         command: str,
         log_file: str,
-        timeout: int = 300
+        timeout: int = 300,
+        json_output: bool = False
+    ) -> Dict:
+        """Run a terraform command in a trace span (named after its log file) and scheduler slot
+        
+        Args:
+            command: Command to run (e.g., 'terraform init')
+            log_file: Log file name
+            timeout: Command timeout in seconds
+            json_output: Whether the command emits `-json` diagnostics on stdout
+        
+        Returns:
+            Dict with status, exit_code, execution_time, error_message, diagnostics
+        """
+        with tracing.span(f"terraform.{Path(log_file).stem}", category="terraform", work_dir=str(self.work_dir)) as span:
+            with scheduling.terraform_slot() as waited:
+                result = self._execute_command(command, log_file, timeout, json_output)
+            span.set(
+                slot_wait_seconds=round(waited, 3),
+                command=result.get("command"),
+                status=result["status"],
+                exit_code=result.get("exit_code"),
+                stdout_bytes=len(result.get("stdout") or ""),
+                stderr_bytes=len(result.get("stderr") or ""),
+                diagnostics=len(result.get("diagnostics") or [])
+            )
+            return result
+    
+    def _execute_command(
+        self,
+        command: str,
+        log_file: str,
+        timeout: int = 300,
+        json_output: bool = False
     ) -> Dict:
         """Run a terraform command and capture output
         
@@ -46,23 +146,21 @@ class TerraformExecutor:
             command: Command to run (e.g., 'terraform init')
             log_file: Log file name
             timeout: Command timeout in seconds
+            json_output: Whether the command emits `-json` diagnostics on stdout
             
         Returns:
-            Dict with status, exit_code, execution_time, error_message
+            Dict with status, exit_code, execution_time, error_message, diagnostics,
+            resource_usage (child CPU time and peak RSS)
         """
         log_path = self.work_dir / log_file
         start_time = time.time()
         
+        if command.startswith("terraform "):
+            command = self.terraform_bin + command[len("terraform"):]
+        
         try:
             logger.info(f"Running: {command}")
-            result = subprocess.run(
-                command,
-                shell=True,
-                cwd=self.work_dir,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
+            result, usage = _run_with_usage(command, self.work_dir, timeout)
             
             elapsed = time.time() - start_time
             
@@ -79,12 +177,19 @@ class TerraformExecutor:
             
             success = result.returncode == 0
             
+            records = diagnostics.parse_diagnostics(result.stdout, result.stderr, json_output=json_output)
+            error_message = None
+            if not success:
+                error_message = diagnostics.summarize(records) or diagnostics.strip_ansi(result.stderr).strip()
+            
             return {
                 "status": "success" if success else "failed",
                 "command": command,
                 "exit_code": result.returncode,
                 "execution_time_seconds": round(elapsed, 2),
-                "error_message": result.stderr if not success else None,
+                "error_message": error_message,
+                "diagnostics": records,
+                "resource_usage": usage,
                 "stdout": result.stdout,
                 "stderr": result.stderr
             }
@@ -121,40 +226,50 @@ class TerraformExecutor:
     
     def init(self) -> Dict:
         """Run terraform init"""
-        return self._run_command("terraform init", "init.log")
+        return self._run_command("terraform init -input=false -no-color", "init.log")
     
     def validate(self) -> Dict:
         """Run terraform validate"""
-        return self._run_command("terraform validate", "validate.log")
+        return self._run_command(
+            "terraform validate -json -no-color",
+            "validate.log",
+            json_output=True
+        )
     
     def plan(self) -> Dict:
         """Run terraform plan"""
         result = self._run_command(
-            "terraform plan -out=tfplan",
+            "terraform plan -input=false -json -no-color -out=tfplan",
             "plan.log",
-            timeout=180
+            timeout=180,
+            json_output=True
         )
         
-        # Also create human-readable plan
+        # Summarize the saved plan (resource counts and planned VM sizes)
         if result["exit_code"] == 0:
-            readable = self._run_command(
-                "terraform show tfplan",
-                "plan_readable.txt",
+            shown = self._run_command(
+                "terraform show -json tfplan",
+                "plan_show.log",
                 timeout=60
             )
             
-            # Parse plan output for resource counts
-            if readable["exit_code"] == 0:
-                result["resources_to_create"] = self._count_resources(readable["stdout"], "create")
-                result["resources_to_modify"] = self._count_resources(readable["stdout"], "update")
-                result["resources_to_destroy"] = self._count_resources(readable["stdout"], "destroy")
+            if shown["exit_code"] == 0:
+                try:
+                    plan_document = json.loads(shown["stdout"])
+                except json.JSONDecodeError:
+                    logger.warning("Failed to parse terraform show JSON")
+                else:
+                    result["resources_to_create"] = self._count_resources(plan_document, "create")
+                    result["resources_to_modify"] = self._count_resources(plan_document, "update")
+                    result["resources_to_destroy"] = self._count_resources(plan_document, "delete")
+                    result["planned_vms"] = planned_vms_from_plan(plan_document)
         
         return result
     
     def apply(self) -> Dict:
         """Run terraform apply"""
         return self._run_command(
-            "terraform apply -auto-approve tfplan",
+            "terraform apply -input=false -no-color -auto-approve tfplan",
             "apply.log",
             timeout=600  # 10 minutes for VM creation
         )
@@ -162,35 +277,33 @@ class TerraformExecutor:
     def destroy(self) -> Dict:
         """Run terraform destroy"""
         return self._run_command(
-            "terraform destroy -auto-approve",
+            "terraform destroy -input=false -no-color -auto-approve",
             "destroy.log",
             timeout=300
         )
     
-    def _count_resources(self, output: str, action: str) -> int:
-        """Count resources in plan output
+    def providers_schema(self) -> Dict:
+        """Export provider schemas (workspace must be initialized)"""
+        return self._run_command(
+            "terraform providers schema -json",
+            "providers_schema.log",
+            timeout=60
+        )
+    
+    def _count_resources(self, plan_document: Dict, action: str) -> int:
+        """Count resources in a plan
         
         Args:
-            output: Terraform plan output
-            action: Action type (create, update, destroy)
+            plan_document: Parsed `terraform show -json` output
+            action: Action type (create, update, delete)
             
         Returns:
-            Count of resources
+            Count of resources (replacements are not counted)
         """
-        import re
-        
-        # Look for patterns like "# resource will be created"
-        if action == "create":
-            pattern = r'will be created'
-        elif action == "update":
-            pattern = r'will be updated in-place'
-        elif action == "destroy":
-            pattern = r'will be destroyed'
-        else:
-            return 0
-        
-        matches = re.findall(pattern, output, re.IGNORECASE)
-        return len(matches)
+        return sum(
+            1 for resource_change in plan_document.get("resource_changes") or []
+            if (resource_change.get("change") or {}).get("actions") == [action]
+        )
     
     def get_terraform_output(self) -> Dict:
         """Get terraform output values
@@ -206,7 +319,6 @@ class TerraformExecutor:
         
         if result["exit_code"] == 0:
             try:
-                import json
                 return json.loads(result["stdout"])
             except json.JSONDecodeError:
                 logger.error("Failed to parse terraform output JSON")
@@ -0,0 +1,112 @@
+"""Per-iteration timeline of a task: LLM latency, tokens, spend and Terraform phase costs
+
+The orchestrator appends one compact record per iteration. The dataset
+entry keeps only the totals (see summarize); the records go to a JSON
+Lines sidecar next to the entry, so the main JSON does not grow with the
+number of iterations.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_SUFFIX = ".timeline.jsonl"
+
+def llm_timing(llm_result: Dict, usage: Optional[Dict] = None) -> Dict:
+    """Compact timing of an LLMBackend.call_llm result
+    
+    Args:
+        llm_result: call_llm result
+        usage: Usage as accounted by CostLedger.record (adds cached and
+            reasoning tokens, cost_usd and hedge_overhead_cost_usd)
+    """
+    usage = usage or llm_result.get("usage") or {}
+    timing = {
+        "seconds": llm_result.get("time_seconds"),
+        "attempts": llm_result.get("attempts"),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens")
+    }
+    for key in ("cached_tokens", "reasoning_tokens", "cost_usd", "hedge_overhead_cost_usd"):
+        if usage.get(key):
+            timing[key] = usage[key]
+    if llm_result.get("ttft_seconds") is not None:
+        timing["ttft_seconds"] = llm_result["ttft_seconds"]
+    if (llm_result.get("hedge") or {}).get("fired"):
+        timing["hedge_winner"] = llm_result["hedge"]["winner"]
+    if not llm_result.get("success"):
+        timing["error"] = llm_result.get("error")
+    return timing
+
+def phase_timing(phase_result: Dict, cached: bool = False) -> Dict:
+    """Compact timing of a Terraform phase (or pre-flight) result
+    
+    Args:
+        phase_result: TerraformExecutor result
+        cached: Whether the result was reused from the phase cache (nothing ran)
+    """
+    timing = {
+        "status": phase_result.get("status"),
+        "seconds": 0.0 if cached else phase_result.get("execution_time_seconds", 0.0)
+    }
+    usage = phase_result.get("resource_usage")
+    if usage and not cached:
+        timing["cpu_seconds"] = round(usage["cpu_user_seconds"] + usage["cpu_system_seconds"], 3)
+        timing["peak_rss_mb"] = usage["peak_rss_mb"]
+    if phase_result.get("capacity_wait_seconds"):
+        timing["capacity_wait_seconds"] = phase_result["capacity_wait_seconds"]
+    if cached:
+        timing["cached"] = True
+    return timing
+
+def summarize(timeline: List[Dict]) -> Dict:
+    """Totals over a task's iterations
+    
+    Returns:
+        Dict with iterations, llm_seconds, prompt/completion/cached/reasoning
+        tokens, cost_usd, terraform_seconds, child_cpu_seconds, peak_rss_mb and seconds per phase
+    """
+    phase_seconds: Dict[str, float] = {}
+    totals = {
+        "iterations": len(timeline),
+        "llm_seconds": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "reasoning_tokens": 0,
+        "cost_usd": 0.0,
+        "terraform_seconds": 0.0,
+        "child_cpu_seconds": 0.0,
+        "peak_rss_mb": 0.0
+    }
+    for record in timeline:
+        llm = record.get("llm") or {}
+        totals["llm_seconds"] += llm.get("seconds") or 0.0
+        totals["prompt_tokens"] += llm.get("prompt_tokens") or 0
+        totals["completion_tokens"] += llm.get("completion_tokens") or 0
+        totals["cached_tokens"] += llm.get("cached_tokens") or 0
+        totals["reasoning_tokens"] += llm.get("reasoning_tokens") or 0
+        totals["cost_usd"] += (llm.get("cost_usd") or 0.0) + (llm.get("hedge_overhead_cost_usd") or 0.0)
+        for phase, timing in (record.get("phases") or {}).items():
+            totals["terraform_seconds"] += timing.get("seconds") or 0.0
+            totals["child_cpu_seconds"] += timing.get("cpu_seconds") or 0.0
+            totals["peak_rss_mb"] = max(totals["peak_rss_mb"], timing.get("peak_rss_mb") or 0.0)
+            phase_seconds[phase] = phase_seconds.get(phase, 0.0) + (timing.get("seconds") or 0.0)
+    
+    for key in ("llm_seconds", "terraform_seconds", "child_cpu_seconds"):
+        totals[key] = round(totals[key], 3)
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    totals["phase_seconds"] = {phase: round(seconds, 3) for phase, seconds in phase_seconds.items()}
+    return totals
+
+def write_sidecar(entry_path: Path, timeline: List[Dict], suffix: str = TIMELINE_SUFFIX) -> Path:
+    """Write the records next to a dataset entry (<entry>.timeline.jsonl by default)
+    
+    Returns:
+        Path to the sidecar file
+    """
+    path = Path(entry_path).with_suffix(suffix)
+    path.write_text("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in timeline))
+    return path
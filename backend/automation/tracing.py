@@ -0,0 +1,201 @@
+"""Lightweight tracing in the Chrome trace event format
+
+Spans nest per run, task, iteration and phase (LLM call, Terraform command,
+screenshot capture) and carry attributes such as the model, token counts,
+exit codes and output sizes. Finished spans are appended to a JSON trace
+file that chrome://tracing, Perfetto (ui.perfetto.dev) and speedscope open
+directly; a trace cut short by a crash is still readable.
+
+Tracing is off unless a Tracer is activated, so the instrumented code pays
+only a context-variable lookup per span:
+
+    with Tracer(path).activate():
+        with tracing.span("task", model="deepseek_r1", task="c1_2") as span:
+            ...
+            span.set(iterations=3)
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import functools
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_active_tracer: ContextVar[Optional["Tracer"]] = ContextVar("active_tracer", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+class Span:
+    """A timed operation with attributes"""
+    
+    __slots__ = ("name", "category", "attributes", "span_id", "parent_id", "start")
+    
+    def __init__(self, name: str, category: str, attributes: Dict, span_id: int, parent_id: Optional[int]):
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = time.time()
+    
+    def set(self, **attributes):
+        """Add or overwrite attributes (e.g. results known only at the end)"""
+        self.attributes.update(attributes)
+
+class _NullSpan:
+    """Stand-in when tracing is off; attributes are discarded"""
+    
+    def set(self, **attributes):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """Collects spans and appends them to a trace file
+    
+    The file uses the JSON array form of the trace event format, written
+    one event per line as spans finish; close() terminates the array.
+    """
+    
+    def __init__(self, path: Path, metadata: Optional[Dict] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.thread_ids: Dict[int, int] = {}
+        self.events = 0
+        self.file = open(self.path, "w")
+        self.file.write("[\n")
+        self._write({"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                     "args": {"name": (metadata or {}).get("name", "golden dataset run")}})
+        if metadata:
+            self._write({"name": "trace_metadata", "ph": "M", "pid": self.pid, "tid": 0, "args": metadata})
+    
+    def _write(self, event: Dict):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(json.dumps(event, default=str) + ",\n")
+            self.file.flush()
+            self.events += 1
+    
+    def _thread_id(self) -> int:
+        """Small per-thread id, named after the thread on first use"""
+        ident = threading.get_ident()
+        with self.lock:
+            tid = self.thread_ids.get(ident)
+            if tid is None:
+                tid = self.thread_ids[ident] = len(self.thread_ids) + 1
+                new_thread = True
+            else:
+                new_thread = False
+        if new_thread:
+            self._write({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                         "args": {"name": threading.current_thread().name}})
+        return tid
+    
+    def start_span(self, name: str, category: str, attributes: Dict) -> Span:
+        parent = _current_span.get()
+        return Span(name, category, attributes, next(self.ids), parent.span_id if parent else None)
+    
+    def finish_span(self, span: Span, end: Optional[float] = None):
+        end = end if end is not None else time.time()
+        args = dict(span.attributes, span_id=span.span_id)
+        if span.parent_id is not None:
+            args["parent_id"] = span.parent_id
+        self._write({
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": round(span.start * 1e6),
+            "dur": round((end - span.start) * 1e6),
+            "pid": self.pid,
+            "tid": self._thread_id(),
+            "args": args
+        })
+    
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        """Record spans of this context (and threads started with a copy of it)"""
+        token = _active_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _active_tracer.reset(token)
+    
+    def close(self):
+        """Terminate the JSON array; later spans are dropped"""
+        with self.lock:
+            if self.file.closed:
+                return
+            # Closing event so the array has no trailing comma
+            self.file.write(json.dumps({"name": "trace_end", "ph": "i", "s": "g", "pid": self.pid, "tid": 0,
+                                        "ts": round(time.time() * 1e6)}) + "\n]\n")
+            self.file.close()
+        logger.info(f"Trace written to {self.path} ({self.events} events)")
+
+def active() -> bool:
+    """Whether spans are being recorded in this context"""
+    return _active_tracer.get() is not None
+
+def current():
+    """The innermost open span (a no-op span when tracing is off)"""
+    if _active_tracer.get() is None:
+        return NULL_SPAN
+    return _current_span.get() or NULL_SPAN
+
+@contextmanager
+def span(name: str, category: str = "pipeline", **attributes):
+    """Trace a block as a child of the current span
+    
+    Args:
+        name: Span name shown in trace viewers (e.g. 'terraform.apply')
+        category: Trace event category (pipeline, llm, terraform, screenshot, ...)
+        **attributes: Span attributes; add more with span.set()
+    
+    Yields:
+        The Span (a no-op span when tracing is off)
+    """
+    tracer = _active_tracer.get()
+    if tracer is None:
+        yield NULL_SPAN
+        return
+    
+    current_span = tracer.start_span(name, category, attributes)
+    token = _current_span.set(current_span)
+    try:
+        yield current_span
+    except BaseException as e:
+        current_span.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.finish_span(current_span)
+
+def traced(name: str, category: str = "pipeline"):
+    """Decorator tracing each call of a function or coroutine function
+    
+    The function can add attributes through tracing.current().set().
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, category):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,109 @@
+"""pass@k statistics over independent trials of a task
+
+With trials > 1 the orchestrator runs each (model, task) k times
+concurrently, each trial in its own workspace and VM namespace. Every trial
+writes its usual dataset entry; summarize folds their outcomes into one
+compact record (success rate, unbiased pass@j for j = 1..k, iteration
+distribution, timing) that becomes the task's summary entry.
+"""
+import math
+import logging
+import statistics
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """Unbiased estimate of the chance that at least one of k samples passes
+    
+    Args:
+        n: Trials run
+        c: Trials that passed
+        k: Samples drawn (k <= n)
+    
+    Returns:
+        1 - C(n - c, k) / C(n, k)
+    """
+    if n - c < k:
+        return 1.0
+    return 1.0 - math.comb(n - c, k) / math.comb(n, k)
+
+def _stats(values: List[float]) -> Dict:
+    if not values:
+        return {}
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "mean": round(statistics.mean(values), 3),
+        "max": max(values)
+    }
+
+def summarize(results: List[Dict], wall_seconds: float) -> Dict:
+    """Outcome of a task's trials
+    
+    Args:
+        results: run_single_task results in trial order, each with the
+            trial's wall time as "seconds"
+        wall_seconds: Wall time of all trials together
+    
+    Returns:
+        Dict with trials, passed, success_rate, pass_at_k, iterations
+        (distribution of passing trials and failure reasons), timing and one
+        compact row per trial
+    """
+    n = len(results)
+    passed = [result for result in results if result.get("success")]
+    iterations = [result.get("iterations", result.get("iteration", 0)) for result in results]
+    passed_iterations = [result["iterations"] for result in passed]
+    distribution: Dict[str, int] = {}
+    for count in sorted(passed_iterations):
+        distribution[str(count)] = distribution.get(str(count), 0) + 1
+    failures: Dict[str, int] = {}
+    for result in results:
+        if not result.get("success"):
+            error = result.get("error") or "unknown"
+            failures[error] = failures.get(error, 0) + 1
+    
+    timelines = [result.get("timeline") or {} for result in results]
+    trial_seconds = [result["seconds"] for result in results]
+    return {
+        "trials": n,
+        "passed": len(passed),
+        "success_rate": round(len(passed) / n, 4),
+        "pass_at_k": {str(k): round(pass_at_k(n, len(passed), k), 4) for k in range(1, n + 1)},
+        "worked_as_generated": sum(bool(result.get("worked_as_generated")) for result in passed),
+        "iterations": dict(_stats(passed_iterations), distribution=distribution, failures=failures),
+        "timing": {
+            "wall_seconds": round(wall_seconds, 3),
+            "trial_seconds": _stats(trial_seconds),
+            # Serial time of the trials over their wall time
+            "parallel_speedup": round(sum(trial_seconds) / wall_seconds, 2) if wall_seconds else None,
+            "llm_seconds": round(sum(timeline.get("llm_seconds", 0.0) for timeline in timelines), 3),
+            "terraform_seconds": round(sum(timeline.get("terraform_seconds", 0.0) for timeline in timelines), 3),
+            "cost_usd": round(sum(timeline.get("cost_usd", 0.0) for timeline in timelines), 6)
+        },
+        "trial_results": [
+            {
+                "trial": index,
+                "success": bool(result.get("success")),
+                "iterations": count,
+                "seconds": result["seconds"],
+                "error": result.get("error"),
+                "entry": Path(result["json_path"]).name if result.get("json_path") else None
+            }
+            for index, (result, count) in enumerate(zip(results, iterations), start=1)
+        ]
+    }
+
+def format_summary(summary: Dict) -> str:
+    """One line per task: passed trials, pass@1, pass@k and timing"""
+    k = str(summary["trials"])
+    iterations = summary["iterations"]
+    timing = summary["timing"]
+    return (
+        f"{summary['passed']}/{summary['trials']} trials passed "
+        f"(pass@1 {summary['pass_at_k']['1']:.2f}, pass@{k} {summary['pass_at_k'][k]:.2f}; "
+        f"median {iterations.get('median', 'n/a')} iterations; "
+        f"{timing['wall_seconds']:.1f}s wall, {timing['parallel_speedup']}x parallel)"
+    )
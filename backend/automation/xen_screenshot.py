@@ -1,11 +1,14 @@
 """Xen Orchestra screenshot automation using Playwright"""
 import os
+import re
 import time
 import logging
 from pathlib import Path
 from typing import List, Dict, Optional
 import asyncio
 
+from . import tracing
+
 logger = logging.getLogger(__name__)
 
 class XenScreenshot:
@@ -13,16 +16,23 @@ class XenScreenshot:
     
     def __init__(
         self,
-        xo_url: str = "http://localhost:8080",
-        username: str = "admin@admin.net",
-        password: str = "admin"
+        xo_url: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        base_dir: Path = Path("/app/golden_dataset"),
+        run_id: Optional[str] = None
     ):
-        self.xo_url = xo_url
-        self.username = username
-        self.password = password
-        self.screenshot_dir = Path("/app/golden_dataset/screenshots")
+        self.xo_url = xo_url or os.getenv("XO_URL", "http://localhost:8080")
+        self.username = username or os.getenv("XO_USERNAME", "admin@admin.net")
+        self.password = password or os.getenv("XO_PASSWORD", "admin")
+        self.base_dir = Path(base_dir)
+        # Concurrent runs capture into their own subdirectory
+        self.screenshot_dir = self.base_dir / "screenshots"
+        if run_id:
+            self.screenshot_dir = self.screenshot_dir / run_id
         self.screenshot_dir.mkdir(parents=True, exist_ok=True)
     
+    @tracing.traced("screenshot.capture", category="screenshot")
     async def capture_screenshots(
         self,
         task_id: str,
@@ -37,10 +47,12 @@ class XenScreenshot:
         Returns:
             Dict mapping screenshot types to file paths
         """
+        tracing.current().set(task=task_id, model=model_short_name)
         try:
             from playwright.async_api import async_playwright
         except ImportError:
             logger.error("Playwright not installed. Install with: pip install playwright && playwright install")
+            tracing.current().set(placeholders=True)
             return self._generate_placeholder_screenshots(task_id, model_short_name)
         
         screenshots = {}
@@ -78,7 +90,7 @@ class XenScreenshot:
                 # Screenshot 1: VM List
                 vm_list_path = self.screenshot_dir / f"{task_id}_{model_short_name}_xo_list.png"
                 await page.screenshot(path=str(vm_list_path), full_page=True)
-                screenshots["xen_orchestra_vm_list"] = str(vm_list_path.relative_to("/app/golden_dataset"))
+                screenshots["xen_orchestra_vm_list"] = str(vm_list_path.relative_to(self.base_dir))
                 logger.info(f"Captured VM list screenshot: {vm_list_path}")
                 
                 # Screenshot 2: VM Details (click first VM)
@@ -90,7 +102,7 @@ class XenScreenshot:
                         
                         vm_details_path = self.screenshot_dir / f"{task_id}_{model_short_name}_vm_details.png"
                         await page.screenshot(path=str(vm_details_path), full_page=True)
-                        screenshots["vm_details"] = str(vm_details_path.relative_to("/app/golden_dataset"))
+                        screenshots["vm_details"] = str(vm_details_path.relative_to(self.base_dir))
                         logger.info(f"Captured VM details screenshot: {vm_details_path}")
                 except Exception as e:
                     logger.warning(f"Could not capture VM details screenshot: {e}")
@@ -102,17 +114,19 @@ class XenScreenshot:
                     
                     resources_path = self.screenshot_dir / f"{task_id}_{model_short_name}_resources.png"
                     await page.screenshot(path=str(resources_path), full_page=True)
-                    screenshots["resource_usage"] = str(resources_path.relative_to("/app/golden_dataset"))
+                    screenshots["resource_usage"] = str(resources_path.relative_to(self.base_dir))
                     logger.info(f"Captured resources screenshot: {resources_path}")
                 except Exception as e:
                     logger.warning(f"Could not capture resources screenshot: {e}")
                 
                 await browser.close()
             
+            tracing.current().set(screenshots=len(screenshots))
             return screenshots
             
         except Exception as e:
             logger.error(f"Screenshot capture failed: {str(e)}")
+            tracing.current().set(error=str(e), placeholders=True)
             return self._generate_placeholder_screenshots(task_id, model_short_name)
     
     def _generate_placeholder_screenshots(self, task_id: str, model_short_name: str) -> Dict[str, str]:
@@ -125,27 +139,60 @@ class XenScreenshot:
         Returns:
             Dict with placeholder paths
         """
+        screenshot_dir = self.screenshot_dir.relative_to(self.base_dir)
         screenshots = {
-            "xen_orchestra_vm_list": f"screenshots/{task_id}_{model_short_name}_xo_list.png",
-            "vm_details": f"screenshots/{task_id}_{model_short_name}_vm_details.png",
-            "resource_usage": f"screenshots/{task_id}_{model_short_name}_resources.png"
+            "xen_orchestra_vm_list": str(screenshot_dir / f"{task_id}_{model_short_name}_xo_list.png"),
+            "vm_details": str(screenshot_dir / f"{task_id}_{model_short_name}_vm_details.png"),
+            "resource_usage": str(screenshot_dir / f"{task_id}_{model_short_name}_resources.png")
         }
         
         # Create empty placeholder files
         for key, path in screenshots.items():
-            full_path = Path("/app/golden_dataset") / path
+            full_path = self.base_dir / path
             full_path.parent.mkdir(parents=True, exist_ok=True)
             if not full_path.exists():
                 full_path.write_text(f"Placeholder for {key}")
         
         return screenshots
     
+    @tracing.traced("xo.vm_details", category="screenshot")
     async def get_vm_details_from_xo(self) -> List[Dict]:
-        """Get VM details from Xen Orchestra API
+        """Get VM details from the Xen Orchestra REST API
+        
+        Uses the XO_TOKEN authentication token when set.
         
         Returns:
-            List of VM details dicts
+            List of VM details dicts (name_label, power_state, ram_gb, cpus),
+            empty if XO could not be reached
         """
-        # This would use the XO API to get VM details
-        # For now, return placeholder
-        return []
+        import requests
+        
+        rest_url = re.sub(r'^ws(s?)://', r'http\1://', self.xo_url).rstrip('/') + "/rest/v0/vms"
+        token = os.getenv("XO_TOKEN")
+        
+        def fetch():
+            response = requests.get(
+                rest_url,
+                params={"fields": "name_label,power_state,memory,CPUs"},
+                cookies={"authenticationToken": token} if token else None,
+                timeout=30
+            )
+            response.raise_for_status()
+            return response.json()
+        
+        try:
+            vms = await asyncio.to_thread(fetch)
+        except Exception as e:
+            logger.warning(f"Could not get VM details from XO: {e}")
+            tracing.current().set(error=str(e))
+            return []
+        
+        return [
+            {
+                "name_label": vm.get("name_label"),
+                "power_state": vm.get("power_state"),
+                "ram_gb": round((vm.get("memory") or {}).get("size", 0) / 1024 ** 3, 2),
+                "cpus": (vm.get("CPUs") or {}).get("number")
+            }
+            for vm in vms
+        ]
@@ -15,6 +15,11 @@ from dotenv import load_dotenv, set_key
 sys.path.insert(0, str(Path(__file__).parent))
 
 from automation.orchestrator import GoldenDatasetOrchestrator
+from automation.capacity import HostCapacity
+from automation.cost import CostLedger, ModelCatalog
+from automation.scheduler import Scheduler
+from automation.key_pool import APIKeyPool, keys_from_env
+from automation.local_llm_client import LocalLLMClient, LOCAL_MODEL_PREFIX
 from automation.task_definitions import TASK_ORDER
 from api_models import RunInfo, TaskStatus
 
@@ -24,10 +29,29 @@ class AutomationService:
     """Service for managing automation runs"""
     
     def __init__(self):
+        self.base_dir = Path('/app/golden_dataset')
         self.runs: Dict[str, RunInfo] = {}
         self.active_threads: Dict[str, threading.Thread] = {}
+        # Usage of active runs, reported live through RunInfo.usage
+        self.ledgers: Dict[str, CostLedger] = {}
         self.env_file = Path(__file__).parent / '.env'
         load_dotenv(self.env_file)
+        
+        # All runs share one host, so they share its capacity reservations
+        self.capacity = HostCapacity()
+        # ...and LLM/Terraform concurrency, queued fairly between runs
+        self.scheduler = Scheduler.from_env()
+        # ...and OpenRouter keys, so throttled keys stay out of rotation for all runs
+        self.key_pool: Optional[APIKeyPool] = None
+    
+    def _key_pool(self) -> APIKeyPool:
+        """Shared key pool, rebuilt when the configured keys change"""
+        keys = keys_from_env()
+        if not keys:
+            raise ValueError("OpenRouter API key not configured")
+        if self.key_pool is None or self.key_pool.keys != keys:
+            self.key_pool = APIKeyPool(keys)
+        return self.key_pool
     
     def get_config(self) -> Dict[str, Any]:
         """Get current configuration"""
@@ -35,6 +59,7 @@ class AutomationService:
         return {
             'has_api_key': bool(api_key and api_key.strip()),
             'api_key_preview': f"{api_key[:8]}...{api_key[-4:]}" if api_key and len(api_key) > 12 else None,
+            'api_key_count': len(keys_from_env()),
             'xo_url': os.getenv('XO_URL', 'http://localhost:8080'),
             'xo_username': os.getenv('XO_USERNAME', 'admin@admin.net')
         }
@@ -65,17 +90,21 @@ class AutomationService:
             return {'success': False, 'message': str(e)}
     
     def get_available_models(self) -> List[Dict[str, Any]]:
-        """Get available models from OpenRouter API"""
-        import requests
-        
+        """Get available models: OpenRouter's, then the local server's (ids prefixed 'local:')"""
+        return self._openrouter_models() + self._local_models()
+    
+    def _openrouter_models(self) -> List[Dict[str, Any]]:
+        """Models from OpenRouter API (cached catalog shared with cost accounting)"""
         try:
-            response = requests.get('https://openrouter.ai/api/v1/models', timeout=10)
-            response.raise_for_status()
-            models_data = response.json()
+            base_url = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')
+            catalog = ModelCatalog(self.base_dir / 'cache' / 'openrouter_models.json', base_url)
+            models_data = catalog.models()
+            if not models_data:
+                raise ValueError("Model catalog unavailable")
             
             # Format models for frontend
             models = []
-            for model in models_data.get('data', []):
+            for model in models_data:
                 models.append({
                     'id': model.get('id', ''),
                     'name': model.get('name', model.get('id', '')),
@@ -95,7 +124,36 @@ class AutomationService:
                 {'id': 'openai/gpt-4-turbo', 'name': 'GPT-4 Turbo', 'description': 'OpenAI GPT-4 Turbo'},
             ]
     
-    def start_automation(self, models: List[str], tasks: Optional[List[str]] = None, max_iterations: int = 20) -> str:
+    def _local_models(self) -> List[Dict[str, Any]]:
+        """Models of the local OpenAI-compatible server, if LOCAL_LLM_BASE_URL is set"""
+        if not os.getenv('LOCAL_LLM_BASE_URL'):
+            return []
+        try:
+            models_data = LocalLLMClient().list_models()
+        except Exception as e:
+            logger.warning(f"Could not list local models: {e}")
+            return []
+        return [
+            {
+                'id': f"{LOCAL_MODEL_PREFIX}{model.get('id', '')}",
+                'name': f"{model.get('name') or model.get('id', '')} (local)",
+                'description': 'Local OpenAI-compatible server',
+                'context_length': model.get('context_length', 0),
+                'pricing': {}
+            }
+            for model in models_data
+        ]
+    
+    def start_automation(
+        self,
+        models: List[str],
+        tasks: Optional[List[str]] = None,
+        max_iterations: int = 20,
+        profile: bool = False,
+        budget_usd: Optional[float] = None,
+        best_of: int = 1,
+        trials: int = 1
+    ) -> str:
         """Start automation tasks in background"""
         run_id = str(uuid.uuid4())
         tasks_to_run = tasks or TASK_ORDER
@@ -108,13 +166,19 @@ class AutomationService:
             tasks=tasks_to_run,
             max_iterations=max_iterations,
             start_time=datetime.now(timezone.utc),
-            total_tasks=len(models) * len(tasks_to_run)
+            total_tasks=len(models) * len(tasks_to_run),
+            profile=profile,
+            budget_usd=budget_usd
         )
         
         self.runs[run_id] = run_info
         
         # Start background thread
-        thread = threading.Thread(target=self._run_automation, args=(run_id, models, tasks_to_run, max_iterations))
+        thread = threading.Thread(
+            target=self._run_automation,
+            args=(run_id, models, tasks_to_run, max_iterations, profile, budget_usd, best_of, trials),
+            name=f"run-{run_id[:8]}"
+        )
         thread.daemon = True
         thread.start()
         
@@ -123,38 +187,60 @@ class AutomationService:
         logger.info(f"Started automation run {run_id}")
         return run_id
     
-    def _run_automation(self, run_id: str, models: List[str], tasks: List[str], max_iterations: int):
+    def _run_automation(
+        self,
+        run_id: str,
+        models: List[str],
+        tasks: List[str],
+        max_iterations: int,
+        profile: bool = False,
+        budget_usd: Optional[float] = None,
+        best_of: int = 1,
+        trials: int = 1
+    ):
         """Run automation in background thread"""
+        orchestrator = None
         try:
             self.runs[run_id].status = 'running'
             
-            # Check API key
-            api_key = os.getenv('OPENROUTER_API_KEY')
-            if not api_key or not api_key.strip():
-                raise ValueError("OpenRouter API key not configured")
+            # Check API keys (only models served by OpenRouter need one)
+            key_pool = None
+            if not all(model_id.startswith(LOCAL_MODEL_PREFIX) for model_id in models):
+                key_pool = self._key_pool()
             
             # Create orchestrator
             orchestrator = GoldenDatasetOrchestrator(
-                base_dir=Path('/app/golden_dataset'),
+                base_dir=self.base_dir,
                 max_iterations=max_iterations,
-                openrouter_api_key=api_key
+                key_pool=key_pool,
+                run_id=run_id,
+                capacity=self.capacity,
+                scheduler=self.scheduler,
+                profile=profile,
+                budget_usd=budget_usd,
+                best_of=best_of,
+                trials=trials
             )
+            self.ledgers[run_id] = orchestrator.ledger
             
             # Map model IDs to short names for directory structure
             model_mapping = {}
             for i, model_id in enumerate(models):
                 # Create a safe directory name from model ID
-                safe_name = model_id.replace('/', '_').replace('.', '_')
+                safe_name = model_id.replace('/', '_').replace('.', '_').replace(':', '_')
                 model_mapping[model_id] = safe_name
             
             # Update orchestrator models dynamically
             orchestrator.models = {}
             for model_id in models:
                 short_name = model_mapping[model_id]
+                # 'local:<id>' runs on the local server, everything else on OpenRouter
+                local = model_id.startswith(LOCAL_MODEL_PREFIX)
                 orchestrator.models[short_name] = {
                     'full_name': model_id,
-                    'api_id': model_id,
-                    'short_name': short_name
+                    'api_id': model_id[len(LOCAL_MODEL_PREFIX):] if local else model_id,
+                    'short_name': short_name,
+                    'backend': 'local' if local else 'openrouter'
                 }
             
             # Run tasks
@@ -164,6 +250,8 @@ class AutomationService:
             )
             
             # Update run status
+            self.runs[run_id].profile_files = orchestrator.profile_paths
+            self.runs[run_id].usage = orchestrator.ledger.summary()
             self.runs[run_id].status = 'completed'
             self.runs[run_id].end_time = datetime.now(timezone.utc)
             
@@ -179,6 +267,9 @@ class AutomationService:
             
         except Exception as e:
             logger.error(f"Automation run {run_id} failed: {e}")
+            if orchestrator is not None:
+                self.runs[run_id].profile_files = orchestrator.profile_paths
+                self.runs[run_id].usage = orchestrator.ledger.summary()
             self.runs[run_id].status = 'failed'
             self.runs[run_id].end_time = datetime.now(timezone.utc)
         
@@ -186,15 +277,43 @@ class AutomationService:
             # Clean up thread reference
             if run_id in self.active_threads:
                 del self.active_threads[run_id]
+            self.ledgers.pop(run_id, None)
+    
+    def get_profile_file(self, run_id: str, kind: str = "summary") -> Optional[Path]:
+        """Profile file of a run (wall, cpu, summary or summary_text), None if missing"""
+        run_info = self.runs.get(run_id)
+        if not run_info or not run_info.profile_files or kind not in run_info.profile_files:
+            return None
+        path = Path(run_info.profile_files[kind])
+        return path if path.exists() else None
+    
+    def get_scheduler_status(self) -> Dict[str, Any]:
+        """Slots in use and queued requests per run, plus host capacity"""
+        return {**self.scheduler.status(), "capacity": self.capacity.usage()}
+    
+    def get_key_stats(self) -> List[Dict[str, Any]]:
+        """Requests, 429s, tokens, spend and eviction state per API key (masked)"""
+        return self.key_pool.stats() if self.key_pool else []
     
     def get_run_status(self, run_id: str) -> Optional[RunInfo]:
         """Get status of a run"""
-        return self.runs.get(run_id)
+        run_info = self.runs.get(run_id)
+        if run_info:
+            self._refresh_usage(run_info)
+        return run_info
     
     def get_all_runs(self) -> List[RunInfo]:
         """Get all runs"""
+        for run_info in self.runs.values():
+            self._refresh_usage(run_info)
         return list(self.runs.values())
     
+    def _refresh_usage(self, run_info: RunInfo):
+        """Copy the live usage of an active run into its RunInfo"""
+        ledger = self.ledgers.get(run_info.run_id)
+        if ledger is not None:
+            run_info.usage = ledger.summary()
+    
     def cancel_run(self, run_id: str) -> bool:
         """Cancel a running automation"""
         if run_id in self.runs and self.runs[run_id].status == 'running':
@@ -207,7 +326,7 @@ class AutomationService:
     
     def get_logs(self, lines: int = 100) -> List[str]:
         """Get recent log lines"""
-        log_file = Path('/app/golden_dataset/logs/automation.log')
+        log_file = self.base_dir / 'logs' / 'automation.log'
         if not log_file.exists():
             return []
         
@@ -221,7 +340,7 @@ class AutomationService:
     
     def get_datasets(self) -> List[Dict[str, Any]]:
         """Get list of generated datasets"""
-        dataset_dir = Path('/app/golden_dataset/dataset')
+        dataset_dir = self.base_dir / 'dataset'
         if not dataset_dir.exists():
             return []
         
@@ -235,6 +354,7 @@ class AutomationService:
                     'filename': json_file.name,
                     'path': str(json_file),
                     'model': json_file.parent.name,
+                    'run_id': json_file.parent.parent.name if json_file.parent.parent != dataset_dir else None,
                     'task_id': parts[0] if parts else 'unknown',
                     'size_bytes': stat.st_size,
                     'timestamp': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat()
@@ -246,20 +366,22 @@ class AutomationService:
     
     def get_screenshots(self) -> List[Dict[str, Any]]:
         """Get list of screenshots"""
-        screenshot_dir = Path('/app/golden_dataset/screenshots')
+        screenshot_dir = self.base_dir / 'screenshots'
         if not screenshot_dir.exists():
             return []
         
         screenshots = []
-        for img_file in screenshot_dir.glob('*.png'):
+        for img_file in screenshot_dir.rglob('*.png'):
             try:
                 stat = img_file.stat()
-                # Parse filename
+                # Parse filename (runs started from the API capture into screenshots/<run_id>/)
                 parts = img_file.stem.split('_')
+                relative_path = img_file.relative_to(screenshot_dir).as_posix()
                 screenshots.append({
-                    'filename': img_file.name,
+                    'filename': relative_path,
                     'path': str(img_file),
-                    'url': f'/api/screenshots/{img_file.name}',
+                    'url': f'/api/screenshots/{relative_path}',
+                    'run_id': img_file.parent.name if img_file.parent != screenshot_dir else None,
                     'model': parts[1] if len(parts) > 1 else 'unknown',
                     'task_id': parts[0] if parts else 'unknown',
                     'type': '_'.join(parts[2:]) if len(parts) > 2 else 'screenshot'
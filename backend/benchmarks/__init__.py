@@ -0,0 +1,9 @@
+"""Performance benchmarks for the automation pipeline
+
+Run from the backend directory, e.g.:
+
+    python -m benchmarks.orchestrator_throughput --tasks 1000 --iterations 20
+
+Each benchmark prints a report and can write machine-readable JSON results
+(--output) and compare them with an earlier run (--compare).
+"""
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Microbenchmarks for the pipeline's hot paths
+
+Covers the code every iteration or every listing runs through:
+
+- OpenRouterClient.extract_terraform_code / extract_questions_asked on
+  multi-hundred-KB reasoning-model outputs
+- ConversationMemory._save as a conversation grows to 40 messages
+- DatasetGenerator.generate_entry writing 10k entries
+- AutomationService.get_datasets listing 10k dataset files
+
+Metrics are normalised per unit (ms per MB, ms per entry, ...) so the
+regression thresholds hold for any --scale. The run fails (exit code 1)
+when a metric exceeds its threshold or regresses by more than --tolerance
+against a --baseline run.
+
+Usage (from the backend directory):
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --scale 0.1 --output hot_paths.json
+    python -m benchmarks.hot_paths --baseline hot_paths.json --tolerance 0.3
+"""
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from automation.memory_manager import ConversationMemory
+from automation.dataset_generator import DatasetGenerator
+from automation.standin.llm_server import default_response
+from benchmarks.stubs import StubLLMClient, filler_text, reasoning_response
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds per metric, about 3x a typical developer machine: loose
+# enough for a loaded CI runner, tight enough to catch accidental quadratic
+# behaviour. Question extraction is a known slow path (regex backtracking
+# over every sentence).
+THRESHOLDS = {
+    "extract_code_fenced_ms_per_mb": 5.0,
+    "extract_code_unfenced_ms_per_mb": 25.0,
+    "extract_questions_ms_per_mb": 3500.0,
+    "memory_save_last_ms": 10.0,
+    "memory_save_growth": 20.0,
+    "dataset_generate_ms_per_entry": 3.0,
+    "get_datasets_ms_per_1k_files": 150.0,
+}
+
+def _best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Fastest of several timed runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def _sample_code() -> str:
+    return default_response("c2_3").split("```hcl\n", 1)[1].rsplit("\n```", 1)[0]
+
+def bench_extraction(response_kb: float, repeat: int) -> Dict[str, float]:
+    """Code and question extraction on a large reasoning-model response"""
+    client = StubLLMClient()
+    code = _sample_code()
+    fenced = reasoning_response(code, response_kb)
+    # No code fence: extraction falls back to scanning lines for the provider block
+    unfenced = fenced.replace("```hcl\n", "").replace("\n```", "")
+    megabytes = len(fenced) / 1024 ** 2
+    
+    assert client.extract_terraform_code(fenced), "fenced code not extracted"
+    return {
+        "response_kb": round(len(fenced) / 1024, 1),
+        "extract_code_fenced_ms_per_mb": _best_of(repeat, lambda: client.extract_terraform_code(fenced)) * 1000 / megabytes,
+        "extract_code_unfenced_ms_per_mb": _best_of(repeat, lambda: client.extract_terraform_code(unfenced)) * 1000 / megabytes,
+        "extract_questions_ms_per_mb": _best_of(repeat, lambda: client.extract_questions_asked(fenced)) * 1000 / megabytes,
+    }
+
+def bench_memory_save(work_dir: Path, messages: int, message_kb: float, repeat: int) -> Dict[str, float]:
+    """Cost of each save as a conversation grows
+    
+    Alternates model answers and error feedback of message_kb each, the
+    shape of a long-running task.
+    """
+    content = filler_text(int(message_kb * 1024))
+    runs = []
+    for attempt in range(repeat):
+        memory = ConversationMemory("C2.3", "Benchmark Model", work_dir / f"memory_{attempt}")
+        memory.work_dir.mkdir(parents=True, exist_ok=True)
+        save_times = []
+        for index in range(messages):
+            start = time.perf_counter()
+            if index % 2:
+                memory.add_user_message(content)
+            else:
+                memory.add_assistant_message(content)
+            save_times.append(time.perf_counter() - start)
+        runs.append(save_times)
+    
+    # Per position, the fastest attempt
+    per_message = [min(run[i] for run in runs) for i in range(messages)]
+    head = statistics.mean(per_message[:3])
+    tail = statistics.mean(per_message[-3:])
+    return {
+        "messages": messages,
+        "history_kb": round(memory.memory_file.stat().st_size / 1024, 1),
+        "memory_save_first_ms": head * 1000,
+        "memory_save_last_ms": tail * 1000,
+        "memory_save_total_ms": sum(per_message) * 1000,
+        # How much slower the last saves are than the first ones
+        "memory_save_growth": tail / head if head else 0.0,
+    }
+
+def _dataset_arguments(index: int) -> Dict:
+    """generate_entry arguments for a typical successful entry"""
+    phase = {
+        "status": "success",
+        "exit_code": 0,
+        "execution_time_seconds": 1.5,
+        "error_message": None,
+        "stdout": filler_text(2048, index),
+        "stderr": ""
+    }
+    return {
+        "task_id": "C2.3",
+        "task_description": "Multiple Identical VMs - Detailed + Idempotency",
+        "model_name": "Benchmark Model",
+        # Unique per entry: entries written in the same second would share a filename
+        "model_short_name": f"bench_{index:05d}",
+        "prompt_data": {
+            "input_text": "Create 3 Ubuntu 22.04 VMs",
+            "prompt_type": "detailed",
+            "infrastructure_state_before": "clean_server_0_vms",
+            "information_provided": [],
+            "information_missing": []
+        },
+        "llm_response_data": {
+            "generated_code": _sample_code(),
+            "questions_asked": [],
+            "time_seconds": 12.5,
+            "inferred_defaults": {}
+        },
+        "terraform_results": {name: dict(phase) for name in ("init", "validate", "plan", "apply")},
+        "verification_data": {"vms_exist_in_xo": True, "meets_requirements": True, "vm_details": []},
+        "screenshots": {"xen_orchestra_vm_list": "screenshots/c2_3_xo_list.png"},
+        "iteration_count": 3,
+        "worked_as_generated": False
+    }
+
+def bench_datasets(base_dir: Path, entries: int) -> Dict[str, float]:
+    """Write dataset entries, then list them through the API service"""
+    from automation_service import AutomationService
+    
+    generator = DatasetGenerator(base_dir / "dataset" / "bench_model")
+    arguments = [_dataset_arguments(index) for index in range(entries)]
+    
+    start = time.perf_counter()
+    for kwargs in arguments:
+        generator.generate_entry(**kwargs)
+    generate_seconds = time.perf_counter() - start
+    
+    service = AutomationService()
+    service.base_dir = base_dir
+    listing_seconds = _best_of(3, service.get_datasets)
+    listed = len(service.get_datasets())
+    assert listed == entries, f"listed {listed} of {entries} entries"
+    
+    return {
+        "entries": entries,
+        "dataset_generate_ms_per_entry": generate_seconds * 1000 / entries,
+        "dataset_generate_total_seconds": generate_seconds,
+        "get_datasets_ms_per_1k_files": listing_seconds * 1000 / (entries / 1000),
+    }
+
+def check(metrics: Dict[str, float], thresholds: Dict[str, float], baseline: Optional[Dict] = None, tolerance: float = 0.25) -> List[Dict]:
+    """Compare metrics with thresholds and (optionally) a baseline run
+    
+    Returns:
+        List of dicts with metric, value, threshold, baseline and failure reason
+    """
+    rows = []
+    for metric, threshold in thresholds.items():
+        value = metrics.get(metric)
+        if value is None:
+            continue
+        previous = (baseline or {}).get("metrics", {}).get(metric)
+        reason = None
+        if value > threshold:
+            reason = f"above threshold {threshold}"
+        elif previous and value > previous * (1 + tolerance):
+            reason = f"{(value / previous - 1) * 100:.0f}% slower than baseline"
+        rows.append({
+            "metric": metric,
+            "value": round(value, 3),
+            "threshold": threshold,
+            "baseline": previous,
+            "failure": reason
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks with regression thresholds")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Scale workload sizes (0.1 for a quick run; metrics are per unit) (default: 1.0)')
+    parser.add_argument('--response-kb', type=float, default=400, help='Reasoning response size in KB (default: 400)')
+    parser.add_argument('--messages', type=int, default=40, help='Conversation length for memory saves (default: 40)')
+    parser.add_argument('--message-kb', type=float, default=8, help='Size of each conversation message in KB (default: 8)')
+    parser.add_argument('--entries', type=int, default=10000, help='Dataset entries to write and list (default: 10000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions; the fastest counts (default: 5)')
+    parser.add_argument('--thresholds', type=str, help='JSON file overriding metric thresholds')
+    parser.add_argument('--baseline', type=str, help='JSON results of an earlier run; slower metrics beyond --tolerance fail')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown against --baseline (default: 0.25)')
+    parser.add_argument('--output', type=str, help='Write JSON results to this file')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.CRITICAL)
+    
+    thresholds = dict(THRESHOLDS)
+    if args.thresholds:
+        thresholds.update(json.loads(Path(args.thresholds).read_text()))
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="hot-paths-bench-"))
+    try:
+        metrics = {}
+        print("Benchmarking extraction...")
+        metrics.update(bench_extraction(args.response_kb * args.scale, args.repeat))
+        print("Benchmarking conversation memory saves...")
+        metrics.update(bench_memory_save(work_dir, args.messages, args.message_kb, args.repeat))
+        print("Benchmarking dataset generation and listing...")
+        metrics.update(bench_datasets(work_dir, max(100, int(args.entries * args.scale))))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    rows = check(metrics, thresholds, baseline, args.tolerance)
+    failures = [row for row in rows if row["failure"]]
+    
+    print("\n" + "=" * 80)
+    print("  Hot-Path Microbenchmarks")
+    print("=" * 80)
+    for metric, value in metrics.items():
+        print(f"  {metric:<38}{value:>14.3f}")
+    print("\n  Metric                                     value   threshold  baseline")
+    print("  " + "-" * 74)
+    for row in rows:
+        marker = f"❌ {row['failure']}" if row["failure"] else "✅"
+        previous = "" if row["baseline"] is None else f"{row['baseline']:.3f}"
+        print(f"  {row['metric']:<38}{row['value']:>10.3f}{row['threshold']:>11}{previous:>10}  {marker}")
+    print("=" * 80 + "\n")
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "benchmark": "hot_paths",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "config": {
+                "scale": args.scale,
+                "response_kb": args.response_kb,
+                "messages": args.messages,
+                "message_kb": args.message_kb,
+                "entries": args.entries,
+                "repeat": args.repeat
+            },
+            "metrics": {metric: round(value, 4) for metric, value in metrics.items()},
+            "checks": rows
+        }, indent=2))
+        print(f"Results written to {args.output}")
+    
+    if failures:
+        print(f"❌ {len(failures)} hot-path regression(s)")
+        sys.exit(1)
+    print("✅ All hot paths within thresholds")
+
+if __name__ == "__main__":
+    main()
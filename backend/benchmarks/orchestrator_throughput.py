@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""End-to-end throughput benchmark for GoldenDatasetOrchestrator
+
+Drives the real orchestrator with in-process LLM, Terraform and screenshot
+stubs (benchmarks/stubs.py), so every millisecond measured is pipeline
+overhead: prompt and memory handling, extraction, pre-flight validation,
+phase caching, capacity admission, verification and dataset generation.
+
+Tasks are run in rounds of models x tasks, each round as its own run
+(run_id), until the requested number of tasks has been executed. Reports
+tasks/minute, time per phase, peak RSS and bytes written, and optionally
+writes JSON results and compares them with a previous run.
+
+Usage (from the backend directory):
+    python -m benchmarks.orchestrator_throughput --tasks 1000 --iterations 20 --response-kb 32
+    python -m benchmarks.orchestrator_throughput --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import inspect
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import functools
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from automation.orchestrator import GoldenDatasetOrchestrator
+from automation.openrouter_client import OpenRouterClient
+from automation.memory_manager import ConversationMemory
+from automation.dataset_generator import DatasetGenerator
+from automation.phase_cache import PhaseResultCache
+from automation.preflight import PreflightValidator
+from automation.capacity import HostCapacity
+from automation.task_definitions import TASK_ORDER
+from benchmarks.stubs import RevisingModel, StubLLMClient, StubScreenshots, StubTerraformExecutor
+
+logger = logging.getLogger(__name__)
+
+# Sections timed during the run: name -> (class, method names).
+# Stub sections stand in for external services and are not orchestrator overhead.
+SECTIONS = {
+    "llm.stub_request": (StubLLMClient, ["_post_with_retries"]),
+    "llm.parse_response": (OpenRouterClient, ["split_reasoning"]),
+    "extract.code": (OpenRouterClient, ["extract_terraform_code"]),
+    "extract.questions": (OpenRouterClient, ["extract_questions_asked"]),
+    "memory.save": (ConversationMemory, ["_save", "save_reasoning"]),
+    "preflight.validate": (PreflightValidator, ["validate"]),
+    "phase_cache": (PhaseResultCache, ["hash_workspace", "lookup", "store"]),
+    "capacity.admission": (HostCapacity, ["admit", "commit"]),
+    "terraform.stub_init": (StubTerraformExecutor, ["init"]),
+    "terraform.stub_validate": (StubTerraformExecutor, ["validate"]),
+    "terraform.stub_plan": (StubTerraformExecutor, ["plan"]),
+    "terraform.stub_apply": (StubTerraformExecutor, ["apply"]),
+    "terraform.write_main_tf": (StubTerraformExecutor, ["write_main_tf"]),
+    "screenshots.stub": (StubScreenshots, ["capture_screenshots", "get_vm_details_from_xo"]),
+    "verification": (GoldenDatasetOrchestrator, ["_generate_verification_data"]),
+    "dataset.generate_entry": (DatasetGenerator, ["generate_entry"]),
+}
+
+# Run on reaper threads, overlapping the main loop (reported, not subtracted)
+BACKGROUND_SECTIONS = {
+    "terraform.stub_destroy": (StubTerraformExecutor, ["destroy"]),
+}
+
+# Headline metrics compared by --compare, and whether higher is better
+COMPARED_METRICS = {
+    "tasks_per_minute": True,
+    "iterations_per_second": True,
+    "wall_seconds": False,
+    "orchestrator_overhead_ms_per_iteration": False,
+    "peak_rss_mb": False,
+    "bytes_written": False,
+    "bytes_on_disk": False,
+}
+
+class SectionTimer:
+    """Accumulate wall time of selected methods by patching their classes"""
+    
+    def __init__(self):
+        self.totals: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.patched: List = []
+    
+    def _record(self, name: str, seconds: float):
+        with self.lock:
+            entry = self.totals.setdefault(name, {"calls": 0, "seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+    
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def timed_async(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    self._record(name, time.perf_counter() - start)
+            return timed_async
+        
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._record(name, time.perf_counter() - start)
+        return timed
+    
+    def install(self, sections: Dict):
+        for name, (cls, methods) in sections.items():
+            for method_name in methods:
+                original = cls.__dict__.get(method_name)
+                if original is None:
+                    # Inherited: patch on this class only
+                    original = getattr(cls, method_name)
+                    self.patched.append((cls, method_name, None))
+                else:
+                    self.patched.append((cls, method_name, original))
+                if isinstance(original, (staticmethod, classmethod)):
+                    wrapped = type(original)(self._wrap(name, original.__func__))
+                else:
+                    wrapped = self._wrap(name, original)
+                setattr(cls, method_name, wrapped)
+    
+    def uninstall(self):
+        for cls, method_name, original in reversed(self.patched):
+            if original is None:
+                delattr(cls, method_name)
+            else:
+                setattr(cls, method_name, original)
+        self.patched = []
+
+def _io_counters() -> Dict[str, int]:
+    """Bytes this process passed to write() (Linux /proc; empty elsewhere)"""
+    try:
+        text = Path("/proc/self/io").read_text()
+    except OSError:
+        return {}
+    return {key: int(value) for key, value in (line.split(": ") for line in text.splitlines())}
+
+def _disk_usage(root: Path) -> Dict[str, int]:
+    files = 0
+    size = 0
+    for path in root.rglob("*"):
+        if path.is_file():
+            files += 1
+            size += path.stat().st_size
+    return {"files": files, "bytes": size}
+
+def run_benchmark(
+    base_dir: Path,
+    tasks: int = 1000,
+    iterations: int = 20,
+    response_kb: float = 32,
+    models: Optional[List[str]] = None,
+    task_ids: Optional[List[str]] = None,
+    llm_latency: float = 0.0,
+    phase_seconds: float = 0.0,
+    screenshot_kb: float = 0.0,
+    use_fixtures: bool = False
+) -> Dict:
+    """Run the orchestrator against stubs and measure it
+    
+    Args:
+        base_dir: Output directory for the runs
+        tasks: (model, task) executions to run in total
+        iterations: Iterations per task (the first iterations - 1 applies fail)
+        response_kb: Size of every LLM response (reasoning + answer)
+        models: Model keys (default: all orchestrator models)
+        task_ids: Task IDs per round (default: TASK_ORDER)
+        llm_latency: Simulated seconds per LLM call
+        phase_seconds: Simulated seconds per Terraform command
+        screenshot_kb: Size of each placeholder screenshot
+        use_fixtures: Provision preconditions through the fixture engine
+    
+    Returns:
+        Results dict (config, results, phases)
+    """
+    task_ids = task_ids or list(TASK_ORDER)
+    terraform_factory = functools.partial(
+        StubTerraformExecutor,
+        failing_applies=iterations - 1,
+        phase_seconds=phase_seconds
+    )
+    capacity = HostCapacity()
+    
+    timer = SectionTimer()
+    timer.install(SECTIONS)
+    timer.install(BACKGROUND_SECTIONS)
+    
+    io_before = _io_counters()
+    start = time.perf_counter()
+    executed = 0
+    succeeded = 0
+    total_iterations = 0
+    rounds = 0
+    
+    try:
+        while executed < tasks:
+            orchestrator = GoldenDatasetOrchestrator(
+                base_dir=base_dir,
+                max_iterations=iterations,
+                openrouter_api_key="benchmark",
+                use_fixtures=use_fixtures,
+                run_id=f"bench{rounds:04d}",
+                capacity=capacity,
+                terraform_factory=terraform_factory,
+                inter_task_delay=0
+            )
+            orchestrator.openrouter = StubLLMClient(RevisingModel(response_kb), latency_seconds=llm_latency)
+            orchestrator.xen_screenshot = StubScreenshots(base_dir, run_id=orchestrator.run_id, image_kb=screenshot_kb)
+            
+            round_models = models or list(orchestrator.models)
+            remaining = tasks - executed
+            # The last round may run only part of the task list
+            round_tasks = task_ids[:max(1, -(-remaining // len(round_models)))]
+            
+            results = orchestrator.run_all_tasks(models=round_models, tasks=round_tasks)
+            for model_results in results.values():
+                for task_result in model_results.values():
+                    executed += 1
+                    succeeded += bool(task_result.get("success"))
+                    total_iterations += task_result.get("iterations") or task_result.get("iteration") or 0
+            rounds += 1
+    finally:
+        timer.uninstall()
+    
+    wall_seconds = time.perf_counter() - start
+    io_after = _io_counters()
+    
+    phases = {
+        name: {
+            "calls": entry["calls"],
+            "total_seconds": round(entry["seconds"], 4),
+            "mean_ms": round(entry["seconds"] * 1000 / entry["calls"], 3),
+            "share": round(entry["seconds"] / wall_seconds, 4) if name not in BACKGROUND_SECTIONS else None
+        }
+        for name, entry in sorted(timer.totals.items())
+    }
+    stub_seconds = sum(
+        entry["seconds"] for name, entry in timer.totals.items()
+        if ".stub" in name and name not in BACKGROUND_SECTIONS
+    )
+    accounted = sum(entry["seconds"] for name, entry in timer.totals.items() if name not in BACKGROUND_SECTIONS)
+    phases["other"] = {
+        "calls": None,
+        "total_seconds": round(wall_seconds - accounted, 4),
+        "mean_ms": None,
+        "share": round((wall_seconds - accounted) / wall_seconds, 4)
+    }
+    overhead_seconds = wall_seconds - stub_seconds
+    disk = _disk_usage(base_dir)
+    
+    return {
+        "benchmark": "orchestrator_throughput",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "config": {
+            "tasks": tasks,
+            "iterations": iterations,
+            "response_kb": response_kb,
+            "models": models,
+            "task_ids": task_ids,
+            "llm_latency": llm_latency,
+            "phase_seconds": phase_seconds,
+            "screenshot_kb": screenshot_kb,
+            "use_fixtures": use_fixtures
+        },
+        "results": {
+            "tasks": executed,
+            "succeeded": succeeded,
+            "rounds": rounds,
+            "iterations": total_iterations,
+            "wall_seconds": round(wall_seconds, 3),
+            "tasks_per_minute": round(executed / wall_seconds * 60, 2),
+            "iterations_per_second": round(total_iterations / wall_seconds, 2),
+            "stub_seconds": round(stub_seconds, 3),
+            "orchestrator_overhead_seconds": round(overhead_seconds, 3),
+            "orchestrator_overhead_ms_per_iteration": round(overhead_seconds * 1000 / max(total_iterations, 1), 3),
+            # ru_maxrss is in KiB on Linux, bytes on macOS
+            "peak_rss_mb": round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024), 1
+            ),
+            "bytes_written": io_after.get("wchar", 0) - io_before.get("wchar", 0) if io_before else None,
+            "bytes_on_disk": disk["bytes"],
+            "files_on_disk": disk["files"]
+        },
+        "phases": phases
+    }
+
+def compare(current: Dict, baseline: Dict) -> List[Dict]:
+    """Relative change of the headline metrics against a baseline run
+    
+    Returns:
+        List of dicts with metric, baseline, current, change (fraction) and
+        whether the change is an improvement
+    """
+    rows = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        before = baseline.get("results", {}).get(metric)
+        after = current["results"].get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        rows.append({
+            "metric": metric,
+            "baseline": before,
+            "current": after,
+            "change": round(change, 4),
+            "improved": change > 0 if higher_is_better else change < 0
+        })
+    return rows
+
+def print_report(report: Dict, comparison: Optional[List[Dict]] = None):
+    results = report["results"]
+    print("\n" + "=" * 80)
+    print("  Orchestrator Throughput Benchmark")
+    print("=" * 80)
+    print(f"  Tasks:        {results['tasks']} ({results['succeeded']} succeeded, {results['rounds']} rounds)")
+    print(f"  Iterations:   {results['iterations']}")
+    print(f"  Wall time:    {results['wall_seconds']:.2f}s")
+    print(f"  Throughput:   {results['tasks_per_minute']:.1f} tasks/min, {results['iterations_per_second']:.1f} iterations/s")
+    print(f"  Overhead:     {results['orchestrator_overhead_ms_per_iteration']:.2f} ms/iteration (excluding stubs)")
+    print(f"  Peak RSS:     {results['peak_rss_mb']:.1f} MB")
+    if results["bytes_written"] is not None:
+        print(f"  Written:      {results['bytes_written'] / 1024 ** 2:.1f} MB")
+    print(f"  On disk:      {results['bytes_on_disk'] / 1024 ** 2:.1f} MB in {results['files_on_disk']} files")
+    
+    print("\n  Phase                         calls     total s   mean ms   share")
+    print("  " + "-" * 66)
+    for name, phase in sorted(report["phases"].items(), key=lambda item: -item[1]["total_seconds"]):
+        calls = "" if phase["calls"] is None else str(phase["calls"])
+        mean = "" if phase["mean_ms"] is None else f"{phase['mean_ms']:.3f}"
+        share = "(bg)" if phase["share"] is None else f"{phase['share'] * 100:.1f}%"
+        print(f"  {name:<28}{calls:>7}{phase['total_seconds']:>12.3f}{mean:>10}{share:>8}")
+    
+    if comparison:
+        if not report["comparison"]["same_config"]:
+            print("\n  ⚠️ The baseline was run with a different configuration")
+        print("\n  Metric                                  baseline     current    change")
+        print("  " + "-" * 72)
+        for row in comparison:
+            marker = "✅" if row["improved"] else "⚠️"
+            print(f"  {row['metric']:<38}{row['baseline']:>10}{row['current']:>12}{row['change'] * 100:>+9.1f}% {marker}")
+    print("=" * 80 + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Orchestrator throughput benchmark (stubbed LLM, Terraform and screenshots)")
+    parser.add_argument('--tasks', type=int, default=1000, help='(model, task) executions to run (default: 1000)')
+    parser.add_argument('--iterations', type=int, default=20, help='Iterations per task; all but the last apply fail (default: 20)')
+    parser.add_argument('--response-kb', type=float, default=32, help='Size of each LLM response in KB (default: 32)')
+    parser.add_argument('--models', nargs='+', help='Model keys (default: all)')
+    parser.add_argument('--task-ids', nargs='+', choices=TASK_ORDER, help='Tasks per round (default: all)')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Simulated seconds per LLM call (default: 0)')
+    parser.add_argument('--phase-seconds', type=float, default=0.0, help='Simulated seconds per Terraform command (default: 0)')
+    parser.add_argument('--screenshot-kb', type=float, default=0.0, help='Size of each placeholder screenshot in KB (default: 0)')
+    parser.add_argument('--use-fixtures', action='store_true', help='Provision preconditions through the fixture engine')
+    parser.add_argument('--base-dir', type=str, help='Output directory (default: a temporary directory, removed afterwards)')
+    parser.add_argument('--output', type=str, help='Write JSON results to this file')
+    parser.add_argument('--compare', type=str, help='JSON results of an earlier run to compare against')
+    parser.add_argument('--log-level', default='CRITICAL', help='Log level for the pipeline (default: CRITICAL)')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    base_dir = Path(args.base_dir) if args.base_dir else Path(tempfile.mkdtemp(prefix="orchestrator-bench-"))
+    try:
+        report = run_benchmark(
+            base_dir=base_dir,
+            tasks=args.tasks,
+            iterations=args.iterations,
+            response_kb=args.response_kb,
+            models=args.models,
+            task_ids=args.task_ids,
+            llm_latency=args.llm_latency,
+            phase_seconds=args.phase_seconds,
+            screenshot_kb=args.screenshot_kb,
+            use_fixtures=args.use_fixtures
+        )
+    finally:
+        if not args.base_dir:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    
+    comparison = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        comparison = compare(report, baseline)
+        report["comparison"] = {
+            "baseline": args.compare,
+            "same_config": baseline.get("config") == report["config"],
+            "metrics": comparison
+        }
+    
+    print_report(report, comparison)
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""In-process stand-ins for the LLM, Terraform and screenshot layers
+
+Unlike automation/standin (real HTTP servers and a terraform CLI for offline
+runs), these stubs answer without sockets or subprocesses, so a benchmark
+measures the orchestrator's own overhead.
+"""
+import json
+import random
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from automation import diagnostics
+from automation.openrouter_client import OpenRouterClient
+from automation.terraform_executor import TerraformExecutor
+from automation.xen_screenshot import XenScreenshot
+from automation.standin.llm_server import FakeLLMServer, ScriptedModel, default_response
+from automation.standin.provider_schema import schema_document
+
+WORDS = (
+    "the terraform provider xenorchestra template network storage repository pool "
+    "memory cpus disk cloud config should must could we need to check whether "
+    "resource data source plan apply state vm ubuntu install media size bytes"
+).split()
+
+def filler_text(size_bytes: int, seed: int = 0) -> str:
+    """Deterministic prose of roughly size_bytes characters"""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size_bytes:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize()
+        # Reasoning models ask themselves questions; extraction has to skip these
+        sentence += "?" if rng.random() < 0.1 else "."
+        words.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(words)[:size_bytes]
+
+def reasoning_response(code: str, response_kb: float, seed: int = 0) -> str:
+    """A reasoning-model answer: <think> block, prose, then the code block
+    
+    Three quarters of the size goes to the chain of thought, the rest to
+    explanation around the code.
+    """
+    size = int(response_kb * 1024)
+    thinking = filler_text(size * 3 // 4, seed)
+    explanation = filler_text(size // 4, seed + 1)
+    return (
+        f"<think>\n{thinking}\n</think>\n\n"
+        f"{explanation[:len(explanation) // 2]}\n\n"
+        f"```hcl\n{code}\n```\n\n"
+        f"{explanation[len(explanation) // 2:]}\n"
+    )
+
+class RevisingModel(ScriptedModel):
+    """Canned answers that change every iteration, padded to a response size
+    
+    Each iteration's code differs (a revision comment), so the phase cache
+    never short-circuits and every iteration runs the full Terraform phases.
+    """
+    
+    def __init__(self, response_kb: float = 0):
+        super().__init__()
+        self.response_kb = response_kb
+    
+    def respond(self, task_key: Optional[str], iteration: int, broken: bool = False) -> str:
+        code = default_response(task_key or "").split("```hcl\n", 1)[1].rsplit("\n```", 1)[0]
+        code = f"# revision {iteration}\n{code}"
+        if not self.response_kb:
+            return f"```hcl\n{code}\n```\n"
+        return reasoning_response(code, self.response_kb, seed=iteration)
+
+class _StubResponse:
+    """Just enough of requests.Response for OpenRouterClient.call_llm"""
+    
+    def __init__(self, body: Dict):
+        self.status_code = 200
+        self.headers = {}
+        self.body = body
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self) -> Dict:
+        return self.body
+
+class StubLLMClient(OpenRouterClient):
+    """OpenRouterClient answering from a ScriptedModel without HTTP
+    
+    Everything above the HTTP request (payload, response parsing, reasoning
+    split, extraction) is the real client code.
+    """
+    
+    def __init__(self, model: Optional[ScriptedModel] = None, latency_seconds: float = 0.0):
+        super().__init__(api_key="benchmark", base_url="http://stub.invalid", max_retries=0)
+        self.server = FakeLLMServer(model=model or RevisingModel())
+        self.latency_seconds = latency_seconds
+    
+    def _post_with_retries(self, payload: Dict, cancel: Optional[threading.Event] = None):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        # Round-trip through JSON like a real response body
+        return _StubResponse(json.loads(json.dumps(self.server.complete(payload)))), 1, self.api_key
+
+class StubTerraformExecutor(TerraformExecutor):
+    """TerraformExecutor that answers commands in-process
+    
+    Logs are still written and output still goes through diagnostics
+    parsing, so the executor's own overhead is included. The first
+    `failing_applies` applies of each workspace fail with a distinct error.
+    """
+    
+    SCHEMA_JSON = json.dumps(schema_document())
+    
+    def __init__(self, work_dir: Path, failing_applies: int = 0, phase_seconds: float = 0.0):
+        super().__init__(work_dir, terraform_bin="terraform-stub")
+        self.failing_applies = failing_applies
+        self.phase_seconds = phase_seconds
+        self.applies = 0
+        self.lock = threading.Lock()
+    
+    def _execute_command(self, command: str, log_file: str, timeout: int = 300, json_output: bool = False) -> Dict:
+        start_time = time.time()
+        if self.phase_seconds:
+            time.sleep(self.phase_seconds)
+        
+        stdout, stderr, exit_code = "", "", 0
+        if " show " in command:
+            stdout = json.dumps({"format_version": "1.2", "resource_changes": []})
+        elif " providers schema" in command:
+            stdout = self.SCHEMA_JSON
+        elif " validate" in command:
+            stdout = json.dumps({"valid": True, "error_count": 0, "warning_count": 0, "diagnostics": []})
+        elif " apply" in command:
+            with self.lock:
+                self.applies += 1
+                attempt = self.applies
+            if attempt <= self.failing_applies:
+                exit_code = 1
+                stderr = (
+                    f"Error: Simulated provider failure {attempt}\n\n"
+                    f"  with xenorchestra_vm.vm,\n"
+                    f"  on main.tf line 20, in resource \"xenorchestra_vm\" \"vm\":\n"
+                    f"  20: resource \"xenorchestra_vm\" \"vm\" {{\n\n"
+                    f"The stub fails the first {self.failing_applies} applies of each workspace.\n"
+                )
+            else:
+                stdout = "Apply complete! Resources: 1 added, 0 changed, 0 destroyed.\n"
+        
+        elapsed = time.time() - start_time
+        (self.work_dir / log_file).write_text(
+            f"Command: {command}\nExit Code: {exit_code}\nExecution Time: {elapsed:.2f}s\n"
+            f"\n=== STDOUT ===\n{stdout}\n=== STDERR ===\n{stderr}"
+        )
+        records = diagnostics.parse_diagnostics(stdout, stderr, json_output=json_output)
+        return {
+            "status": "success" if exit_code == 0 else "failed",
+            "command": command,
+            "exit_code": exit_code,
+            "execution_time_seconds": round(elapsed, 2),
+            "error_message": (diagnostics.summarize(records) or stderr.strip()) if exit_code else None,
+            "diagnostics": records,
+            "stdout": stdout,
+            "stderr": stderr
+        }
+
+class StubScreenshots(XenScreenshot):
+    """XenScreenshot that writes placeholder images instead of driving a browser"""
+    
+    def __init__(self, base_dir: Path, run_id: Optional[str] = None, image_kb: float = 0):
+        super().__init__(base_dir=base_dir, run_id=run_id)
+        self.image_bytes = b"\x89PNG\r\n\x1a\n" + b"\0" * int(image_kb * 1024)
+    
+    async def capture_screenshots(self, task_id: str, model_short_name: str) -> Dict[str, str]:
+        screenshots = self._generate_placeholder_screenshots(task_id, model_short_name)
+        if len(self.image_bytes) > 8:
+            for path in screenshots.values():
+                (self.base_dir / path).write_bytes(self.image_bytes)
+        return screenshots
+    
+    async def get_vm_details_from_xo(self) -> List[Dict]:
+        return []
@@ -12,6 +12,11 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from automation.orchestrator import GoldenDatasetOrchestrator
 from automation.task_definitions import TASK_ORDER
+from automation.error_tracker import ErrorSignatureTracker
+from automation import planner
+from automation import metrics
+from automation import cost
+from automation.key_pool import keys_from_env, format_stats
 
 # Configure logging
 logging.basicConfig(
@@ -64,8 +69,8 @@ Examples:
     parser.add_argument(
         '--models',
         nargs='+',
-        choices=['deepseek_r1', 'google_gemini_3_pro'],
-        help='Specific models to test (default: both)'
+        choices=['deepseek_r1', 'google_gemini_3_pro', 'local'],
+        help='Specific models to test (default: both, plus local with --local-llm-model)'
     )
     
     parser.add_argument(
@@ -75,6 +80,166 @@ Examples:
         help='Maximum retry iterations per task (default: 20)'
     )
     
+    parser.add_argument(
+        '--repeat-error-limit',
+        type=int,
+        default=3,
+        help='Identical consecutive errors before escalating (default: 3)'
+    )
+    
+    parser.add_argument(
+        '--repeat-error-policy',
+        nargs='+',
+        choices=ErrorSignatureTracker.POLICIES,
+        help='Escalation steps applied in order on repeated errors '
+             '(default: raise_temperature fresh_conversation abort)'
+    )
+    
+    parser.add_argument(
+        '--use-fixtures',
+        action='store_true',
+        help='Provision task preconditions from fixtures so tasks can run in isolation'
+    )
+    
+    parser.add_argument(
+        '--ordering',
+        choices=planner.ORDERINGS,
+        default=planner.AUTO,
+        help='Run tasks model by model, or each task for all models back to back '
+             '(task_major, requires --use-fixtures); auto picks whichever needs fewer '
+             'applies and destroys (default: auto)'
+    )
+    
+    parser.add_argument(
+        '--offline-xo',
+        action='store_true',
+        help='Run against a local Xen Orchestra stand-in and fake terraform CLI (no network or host needed)'
+    )
+    
+    parser.add_argument(
+        '--offline-xo-latency',
+        type=float,
+        default=0.0,
+        help='Seconds added to every VM operation on the stand-in (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--offline-xo-failure-rate',
+        type=float,
+        default=0.0,
+        help='Probability (0-1) that a stand-in VM operation fails (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--fake-llm',
+        action='store_true',
+        help='Answer LLM calls from a local OpenRouter stand-in instead of the API (no credits used)'
+    )
+    
+    parser.add_argument(
+        '--fake-llm-script',
+        type=str,
+        help='JSON file of responses per task and iteration, or a directory of recorded '
+             'conversations to replay (default: canned working answers)'
+    )
+    
+    parser.add_argument(
+        '--fake-llm-latency',
+        type=float,
+        default=0.0,
+        help='Seconds before the stand-in answers each LLM call (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--fake-llm-tail',
+        type=float,
+        nargs=2,
+        metavar=('RATE', 'SECONDS'),
+        default=(0.0, 0.0),
+        help='Make a fraction RATE of stand-in LLM calls SECONDS slower (latency outliers)'
+    )
+    
+    parser.add_argument(
+        '--fake-llm-error-rate',
+        type=float,
+        default=0.0,
+        help='Probability (0-1) that the stand-in answers an LLM call with 429 (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--fake-llm-broken-rate',
+        type=float,
+        default=0.0,
+        help='Probability (0-1) that a canned stand-in answer has invalid code (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--stream-llm',
+        action='store_true',
+        help='Stream LLM responses, which also records time to first token'
+    )
+    
+    parser.add_argument(
+        '--hedge-llm',
+        action='store_true',
+        help="Send a duplicate LLM request when a call outlives the model's rolling p90 "
+             "latency (via the lowest-latency provider); the first response wins"
+    )
+    
+    parser.add_argument(
+        '--trace',
+        action='store_true',
+        help='Write a trace of the run (Chrome trace format, open in ui.perfetto.dev) '
+             'to <base-dir>/traces or <base-dir>/runs/<run-id>/traces'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Sample the process while tasks run; writes flamegraph-ready stacks and '
+             'top-N summaries to <base-dir>/profiles or <base-dir>/runs/<run-id>/profiles'
+    )
+    
+    parser.add_argument(
+        '--profile-interval',
+        type=float,
+        default=0.01,
+        help='Seconds between profiler samples (default: 0.01)'
+    )
+    
+    parser.add_argument(
+        '--best-of',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Sample N completions per iteration, check them with validate and plan in parallel '
+             'scratch workspaces and apply the first that passes (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--trials',
+        type=int,
+        default=1,
+        metavar='K',
+        help='pass@k evaluation: run K independent trials of each task concurrently, each in its '
+             'own workspace and VM namespace, and write a summary entry with success rate, '
+             'pass@k, iteration distribution and timing (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--budget-usd',
+        type=float,
+        help='Stop starting new LLM iterations once the run has spent this much (USD); '
+             'remaining tasks are reported as "Budget exhausted"'
+    )
+    
+    parser.add_argument(
+        '--run-id',
+        type=str,
+        help='Isolate this run under <base-dir>/runs/<run-id> and prefix its VM names '
+             '(needed when several runs share one host)'
+    )
+    
     parser.add_argument(
         '--base-dir',
         type=str,
@@ -82,10 +247,23 @@ Examples:
         help='Base directory for output (default: /app/golden_dataset)'
     )
     
+    parser.add_argument(
+        '--local-llm-model',
+        type=str,
+        help='Model name on a local OpenAI-compatible server, run as model "local" '
+             '(sets LOCAL_LLM_MODEL)'
+    )
+    
+    parser.add_argument(
+        '--local-llm-url',
+        type=str,
+        help='API root of the local server (sets LOCAL_LLM_BASE_URL, default: http://localhost:8000/v1)'
+    )
+    
     parser.add_argument(
         '--api-key',
         type=str,
-        help='OpenRouter API key (overrides environment variable)'
+        help='OpenRouter API key (overrides OPENROUTER_API_KEY/OPENROUTER_API_KEYS)'
     )
     
     args = parser.parse_args()
@@ -93,15 +271,52 @@ Examples:
     # Validate arguments
     if not args.all and not args.tasks:
         parser.error("Must specify either --all or --tasks")
+    if args.ordering == planner.TASK_MAJOR and not args.use_fixtures:
+        parser.error("--ordering task_major requires --use-fixtures")
     
     # Load environment variables
     load_dotenv(Path(__file__).parent / '.env')
+    if args.local_llm_model:
+        os.environ['LOCAL_LLM_MODEL'] = args.local_llm_model
+    if args.local_llm_url:
+        os.environ['LOCAL_LLM_BASE_URL'] = args.local_llm_url
+    if args.models and 'local' in args.models and not os.getenv('LOCAL_LLM_MODEL'):
+        parser.error("--models local requires --local-llm-model (or LOCAL_LLM_MODEL)")
+    
+    # Start the offline stand-in before anything reads TERRAFORM_BIN or XO_URL
+    if args.offline_xo:
+        from automation.standin import start_offline_xo
+        xo_server = start_offline_xo(
+            latency_seconds=args.offline_xo_latency,
+            failure_rate=args.offline_xo_failure_rate
+        )
+        logger.info(f"Using offline Xen Orchestra stand-in at {xo_server.url}")
+    
+    if args.fake_llm:
+        from automation.standin import start_fake_llm, ScriptedModel
+        model = None
+        if args.fake_llm_script:
+            script_path = Path(args.fake_llm_script)
+            if script_path.is_dir():
+                model = ScriptedModel.from_recordings(script_path)
+            else:
+                model = ScriptedModel.from_file(script_path)
+        llm_server = start_fake_llm(
+            model=model,
+            latency_seconds=args.fake_llm_latency,
+            tail_rate=args.fake_llm_tail[0],
+            tail_latency_seconds=args.fake_llm_tail[1],
+            rate_limit_rate=args.fake_llm_error_rate,
+            broken_rate=args.fake_llm_broken_rate
+        )
+        logger.info(f"Using fake LLM server at {llm_server.url}")
     
     # Check for API key
-    api_key = args.api_key or os.getenv('OPENROUTER_API_KEY')
-    if not api_key:
+    # Only models served by OpenRouter need a key
+    openrouter_models = [model for model in (args.models or ['deepseek_r1', 'google_gemini_3_pro']) if model != 'local']
+    if openrouter_models and not args.api_key and not keys_from_env():
         logger.error("OpenRouter API key is required!")
-        logger.error("Set OPENROUTER_API_KEY environment variable or use --api-key argument")
+        logger.error("Set OPENROUTER_API_KEY (or comma-separated OPENROUTER_API_KEYS) or use --api-key argument")
         sys.exit(1)
     
     # Print banner
@@ -118,7 +333,19 @@ Examples:
     orchestrator = GoldenDatasetOrchestrator(
         base_dir=Path(args.base_dir),
         max_iterations=args.max_iterations,
-        openrouter_api_key=api_key
+        openrouter_api_key=args.api_key,
+        repeat_error_limit=args.repeat_error_limit,
+        repeat_error_policies=args.repeat_error_policy,
+        use_fixtures=args.use_fixtures,
+        run_id=args.run_id,
+        stream_llm=args.stream_llm,
+        hedge_llm=args.hedge_llm,
+        trace=args.trace,
+        profile=args.profile,
+        profile_interval=args.profile_interval,
+        budget_usd=args.budget_usd,
+        best_of=args.best_of,
+        trials=args.trials
     )
     
     # Determine tasks to run
@@ -128,9 +355,30 @@ Examples:
     try:
         results = orchestrator.run_all_tasks(
             models=args.models,
-            tasks=tasks_to_run
+            tasks=tasks_to_run,
+            ordering=args.ordering
         )
         
+        print("\n" + "="*80)
+        print("  Timing Metrics")
+        print("="*80)
+        print(metrics.format_summary())
+        print("="*80)
+        print("  Token Usage and Cost")
+        print("="*80)
+        print(cost.format_summary(orchestrator.ledger.summary()))
+        if orchestrator.openrouter and len(orchestrator.openrouter.key_pool) > 1:
+            print("="*80)
+            print("  API Keys")
+            print("="*80)
+            print(format_stats(orchestrator.openrouter.key_pool.stats()))
+        print("="*80 + "\n")
+        if orchestrator.trace_path:
+            print(f"Trace: {orchestrator.trace_path}\n")
+        if orchestrator.profile_paths:
+            print(Path(orchestrator.profile_paths["summary_text"]).read_text())
+            print(f"Profile: {Path(orchestrator.profile_paths['wall']).parent}\n")
+        
         # Check if all succeeded
         all_success = all(
             task_result.get('success', False)
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, APIRouter, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -16,6 +16,7 @@ import json
 from automation_service import automation_service
 from api_models import ConfigUpdate, ConfigResponse, TaskRequest, RunInfo
 from automation.task_definitions import TASK_ORDER
+from automation import metrics
 
 
 ROOT_DIR = Path(__file__).parent
@@ -119,7 +120,11 @@ async def start_automation(request: TaskRequest):
         run_id = automation_service.start_automation(
             models=request.models,
             tasks=request.tasks,
-            max_iterations=request.max_iterations
+            max_iterations=request.max_iterations,
+            profile=request.profile,
+            budget_usd=request.budget_usd,
+            best_of=request.best_of,
+            trials=request.trials
         )
         return {"run_id": run_id, "message": "Automation started successfully"}
     except Exception as e:
@@ -136,6 +141,24 @@ async def get_all_runs():
         logger.error(f"Error getting runs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/automation/scheduler")
+async def get_scheduler_status():
+    """Get LLM/Terraform slots in use and queued requests per run"""
+    try:
+        return automation_service.get_scheduler_status()
+    except Exception as e:
+        logger.error(f"Error getting scheduler status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/automation/keys")
+async def get_key_stats():
+    """Get usage and eviction state per OpenRouter API key (masked)"""
+    try:
+        return {"keys": automation_service.get_key_stats()}
+    except Exception as e:
+        logger.error(f"Error getting key stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.get("/automation/runs/{run_id}")
 async def get_run_status(run_id: str):
     """Get status of a specific run"""
@@ -150,6 +173,27 @@ async def get_run_status(run_id: str):
         logger.error(f"Error getting run status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/automation/runs/{run_id}/profile")
+async def download_profile(run_id: str, kind: str = "summary"):
+    """Download a run's profile (started with profile: true)
+    
+    kind: summary (JSON top-N tables), summary_text, wall or cpu
+    (collapsed stacks for flamegraph.pl / speedscope)
+    """
+    try:
+        if not automation_service.get_run_status(run_id):
+            raise HTTPException(status_code=404, detail="Run not found")
+        file_path = automation_service.get_profile_file(run_id, kind)
+        if not file_path:
+            raise HTTPException(status_code=404, detail="Profile not available (run not profiled or still running)")
+        media_type = 'application/json' if kind == 'summary' else 'text/plain'
+        return FileResponse(file_path, media_type=media_type, filename=f"{run_id}_{file_path.name}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting profile: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.post("/automation/runs/{run_id}/cancel")
 async def cancel_run(run_id: str):
     """Cancel a running automation"""
@@ -188,7 +232,11 @@ async def get_datasets():
 async def download_dataset(model: str, filename: str):
     """Download a specific dataset file"""
     try:
-        file_path = Path(f'/app/golden_dataset/dataset/{model}/{filename}')
+        dataset_dir = automation_service.base_dir / 'dataset'
+        file_path = dataset_dir / model / filename
+        if not file_path.exists():
+            # Entries from API-started runs live under dataset/<run_id>/<model>/
+            file_path = next(dataset_dir.glob(f'*/{model}/{filename}'), file_path)
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="Dataset not found")
         return FileResponse(file_path, media_type='application/json', filename=filename)
@@ -208,12 +256,13 @@ async def get_screenshots():
         logger.error(f"Error getting screenshots: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/screenshots/{filename}")
+@api_router.get("/screenshots/{filename:path}")
 async def get_screenshot(filename: str):
-    """Get a specific screenshot"""
+    """Get a specific screenshot (may be nested under a run id)"""
     try:
-        file_path = Path(f'/app/golden_dataset/screenshots/{filename}')
-        if not file_path.exists():
+        screenshot_dir = (automation_service.base_dir / 'screenshots').resolve()
+        file_path = (screenshot_dir / filename).resolve()
+        if screenshot_dir not in file_path.parents or not file_path.exists():
             raise HTTPException(status_code=404, detail="Screenshot not found")
         return FileResponse(file_path, media_type='image/png')
     except HTTPException:
@@ -225,6 +274,12 @@ async def get_screenshot(filename: str):
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint (outside /api, where scrapers expect it)
+@app.get("/metrics")
+async def get_metrics():
+    """LLM, Terraform, screenshot and dataset timings of all runs in this process"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -95,7 +95,7 @@ def print_workflow_diagram():
 ║  │  • terraform plan -out=tfplan                                          │  ║
 ║  │  • Capture logs to plan.log                                           │  ║
 ║  │  • Parse resource counts                                              │  ║
-║  │  • Generate plan_readable.txt                                         │  ║
+║  │  • Generate plan_show.log (terraform show -json)                      │  ║
 ║  └────────────────────┬───────────────────────────────────────────────────┘  ║
 ║                       │                                 │                     ║
 ║                       ├──[FAIL]──> Add error feedback ──┤                     ║
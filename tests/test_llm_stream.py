@@ -0,0 +1,47 @@
+"""Streamed completions keep non-ASCII text intact
+
+The stand-in LLM server sends raw UTF-8 server-sent events without a charset
+parameter, like OpenRouter, and the clients must decode them as UTF-8.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from automation.openrouter_client import OpenRouterClient  # noqa: E402
+from automation.local_llm_client import LocalLLMClient  # noqa: E402
+from automation.standin.llm_server import FakeLLMServer, ScriptedModel  # noqa: E402
+
+ANSWER = "héllo — ✓ 日本語 🚀\n```terraform\n# naïve café\n```"
+MODEL = "deepseek/deepseek-r1"
+MESSAGES = [{"role": "user", "content": "Say hello"}]
+
+@pytest.fixture
+def server():
+    # Small chunks put multi-byte characters next to every event boundary
+    server = FakeLLMServer(model=ScriptedModel({"*": [ANSWER]}), chunk_chars=3, latency_seconds=0.3).start()
+    yield server
+    server.stop()
+
+def test_streamed_answer_is_decoded_as_utf8(server):
+    client = OpenRouterClient(api_key="standin", base_url=server.url, stream=True)
+    result = client.call_llm(MODEL, MESSAGES)
+    assert result["success"], result.get("error")
+    assert result["content"] == ANSWER
+
+def test_hedged_answer_is_decoded_as_utf8(server):
+    client = OpenRouterClient(api_key="standin", base_url=server.url, hedge=True, hedge_min_samples=1)
+    # Earlier calls were fast, so this one is hedged while the server waits
+    client._record_latency(MODEL, 0.01)
+    result = client.call_llm(MODEL, MESSAGES)
+    assert result["success"], result.get("error")
+    assert result["hedge"]["fired"]
+    assert result["content"] == ANSWER
+
+def test_local_streamed_answer_is_decoded_as_utf8(server):
+    client = LocalLLMClient(base_url=server.url, stream=True)
+    result = client.call_llm(MODEL, MESSAGES)
+    assert result["success"], result.get("error")
+    assert result["content"] == ANSWER